@@ -0,0 +1 @@
+# Benchmarks : python -m flask_auth.benchmarks.<nom>
@@ -0,0 +1,97 @@
+# bench_compression.py
+#
+# Octets envoyés et temps CPU par requête pour un fil de 200 tweets
+# (PAGE_SIZE = 200, avec commentaires), selon l'encodage négocié :
+#   - identity : pas d'Accept-Encoding
+#   - gzip, br, zstd : ceux que compress.available() trouve dans ce processus
+# Le temps CPU (process_time) couvre toute la requête : vue, rendu et
+# compression ; "compress" mesure la compression seule de la même page,
+# au niveau configuré (COMPRESS_LEVELS).
+#
+#   python -m flask_auth.benchmarks.bench_compression
+
+import os
+import statistics
+import tempfile
+import time
+
+from werkzeug.security import generate_password_hash
+
+from flask_auth.project import compress, create_app, db
+from flask_auth.project.models import User
+
+TWEETS = 200
+COMMENTS_EVERY = 4
+RUNS = 30
+
+
+def measure(client, headers):
+    samples, size = [], 0
+    for _ in range(RUNS):
+        start = time.process_time()
+        resp = client.get("/home", headers=headers)
+        size = len(resp.data)
+        samples.append((time.process_time() - start) * 1000)
+    return size, statistics.median(samples)
+
+
+def compression_only(body, codec, level):
+    samples = []
+    for _ in range(RUNS):
+        start = time.process_time()
+        compressor = codec(level)
+        compressor.compress(body)
+        compressor.finish()
+        samples.append((time.process_time() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    fd, path = tempfile.mkstemp(suffix=".sqlite")
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}",
+        "PAGE_SIZE": TWEETS,
+        "PASSWORD_HASH_WORKERS": 0,
+        "NOTIFICATIONS_ASYNC": False,
+        "WTF_CSRF_ENABLED": False,  # formulaires postés directement
+    })
+    try:
+        with app.app_context():
+            db.session.add(User(email="bench@example.com", name="Bench",
+                                password=generate_password_hash("Abcdef1!", method="pbkdf2:sha256:1000")))
+            db.session.commit()
+        client = app.test_client()
+        client.post("/login", data={"email": "bench@example.com", "password": "Abcdef1!"})
+        for i in range(TWEETS):
+            client.post("/tweet", data={"content": f"Tweet number {i} about #topic{i % 10} and #bench"})
+            if i % COMMENTS_EVERY == 0:
+                client.post(f"/comment/{i + 1}", data={"comment_content": f"comment on {i}"})
+        client.get("/profile")  # consomme les messages flash
+        client.get("/home")  # cartes en cache (fragments.py)
+
+        body = client.get("/home").data
+        rows = [("identity",) + measure(client, {}) + (0.0,)]
+        for encoding in compress.PREFERENCE[::-1]:
+            if encoding in compress.available():
+                only = compression_only(body, compress.available()[encoding], app.config["COMPRESS_LEVELS"][encoding])
+                rows.append((encoding,) + measure(client, {"Accept-Encoding": encoding}) + (only,))
+
+        base_size = rows[0][1]
+        print(f"{TWEETS}-tweet feed, median of {RUNS} requests")
+        print(f"{'encoding':>10} {'bytes':>10} {'ratio':>7} {'cpu ms':>8} {'compress':>9}")
+        for encoding, size, cpu, only in rows:
+            print(f"{encoding:>10} {size:>10} {base_size / size:>6.1f}x {cpu:>8.2f} {only:>9.2f}")
+        missing = [e for e in compress.PREFERENCE if e not in compress.available()]
+        if missing:
+            print(f"not installed: {', '.join(missing)}")
+    finally:
+        with app.app_context():
+            db.engine.dispose()
+        os.close(fd)
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.unlink(path + suffix)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# bench_db_contention.py
+#
+# Écritures concurrentes sur SQLite (likes + notifications synchrones, le
+# chemin de like_tweet) pendant que d'autres threads lisent des fils :
+#   - default : aucun PRAGMA (journal DELETE, synchronous FULL)
+#   - tuned   : SQLITE_PRAGMAS de create_app (WAL, NORMAL, busy_timeout...)
+# On compte les écritures réussies par seconde, les "database is locked" et
+# la latence p95 d'une écriture.
+#
+#   python -m flask_auth.benchmarks.bench_db_contention
+
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import OperationalError
+
+from flask_auth.project import create_app, db
+from flask_auth.project.likes import toggle_like
+from flask_auth.project.models import User, Tweet
+
+USERS = 200
+TWEETS = 500
+WRITERS = 8
+READERS = 8
+DURATION = 5  # secondes par configuration
+
+
+def run(label, pragmas):
+    fd, path = tempfile.mkstemp(suffix=".sqlite")
+    overrides = {"SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}", "NOTIFICATIONS_ASYNC": False}
+    if pragmas is not None:
+        overrides["SQLITE_PRAGMAS"] = pragmas
+    app = create_app(overrides)
+    try:
+        with app.app_context():
+            db.create_all()
+            db.session.execute(insert(User), [
+                {"email": f"u{i}@example.com", "name": f"u{i}", "password": "x"} for i in range(USERS)
+            ])
+            db.session.execute(insert(Tweet), [
+                {"content": f"tweet {i}", "user_id": i % USERS + 1} for i in range(TWEETS)
+            ])
+            db.session.commit()
+
+        stop = time.perf_counter() + DURATION
+        latencies, errors, reads = [], [0], [0]
+
+        def writer(seed):
+            with app.app_context():
+                users = [db.session.get(User, u) for u in range(seed + 1, USERS + 1, WRITERS)]
+                tweets = db.session.scalars(select(Tweet)).all()
+                i = 0
+                while time.perf_counter() < stop:
+                    i += 1
+                    start = time.perf_counter()
+                    try:
+                        toggle_like(users[i % len(users)], tweets[(i * 7 + seed) % len(tweets)])
+                        latencies.append((time.perf_counter() - start) * 1000)
+                    except OperationalError:
+                        db.session.rollback()
+                        errors[0] += 1
+
+        def reader():
+            with app.app_context():
+                while time.perf_counter() < stop:
+                    try:
+                        db.session.scalars(
+                            select(Tweet).order_by(Tweet.like_count.desc()).limit(20)
+                        ).all()
+                        db.session.commit()
+                        reads[0] += 1
+                    except OperationalError:
+                        db.session.rollback()
+                        errors[0] += 1
+
+        threads = [threading.Thread(target=writer, args=(s,)) for s in range(WRITERS)]
+        threads += [threading.Thread(target=reader) for _ in range(READERS)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else float("nan")
+        print(f"{label:>8} {len(latencies) / DURATION:>10.0f} {reads[0] / DURATION:>10.0f} {errors[0]:>8} {p95:>12.1f}")
+    finally:
+        with app.app_context():
+            db.engine.dispose()
+        os.close(fd)
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.unlink(path + suffix)
+
+
+def main():
+    print(f"{WRITERS} writers + {READERS} readers, {DURATION}s each")
+    print(f"{'setup':>8} {'writes/s':>10} {'reads/s':>10} {'locked':>8} {'write p95 ms':>12}")
+    run("default", {})
+    run("tuned", None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# bench_hashing.py
+#
+# Rafale de connexions contre un serveur werkzeug multi-thread, avec et
+# sans pool de hachage (hashing.py) :
+#   - inline : PASSWORD_HASH_WORKERS = 0, hachage dans le thread de requête
+#   - pool   : PASSWORD_HASH_WORKERS processus, file bornée, 503 au-delà
+# On mesure le débit de connexions réussies, le nombre de 503 et la latence
+# d'une page sans hachage (/login en GET) pendant la rafale.
+#
+#   python -m flask_auth.benchmarks.bench_hashing
+
+import http.client
+import os
+import statistics
+import tempfile
+import threading
+import time
+from urllib.parse import urlencode
+
+from werkzeug.security import generate_password_hash
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from flask_auth.project import create_app, db
+from flask_auth.project.models import User
+
+METHOD = "pbkdf2:sha256:200000"
+CLIENTS = 32
+LOGINS_PER_CLIENT = 8
+PAGE_VIEWS = 50
+WORKERS = min(4, os.cpu_count() or 1)
+QUEUE_DEPTH = 8
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def request(port, method, path, body=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+    headers = {"Content-Type": "application/x-www-form-urlencoded"} if body else {}
+    start = time.perf_counter()
+    conn.request(method, path, body=body, headers=headers)
+    status = conn.getresponse().status
+    conn.close()
+    return status, (time.perf_counter() - start) * 1000
+
+
+def run(label, workers, path):
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}",
+        "PASSWORD_HASH_METHOD": METHOD,
+        "PASSWORD_HASH_WORKERS": workers,
+        "PASSWORD_HASH_QUEUE_DEPTH": QUEUE_DEPTH,
+    })
+    server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=QuietHandler)
+    port = server.server_port
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    body = urlencode({"email": "bench@example.com", "password": "Bench!123"})
+    statuses, page_ms = [], []
+
+    def login_burst():
+        for _ in range(LOGINS_PER_CLIENT):
+            statuses.append(request(port, "POST", "/login", body)[0])
+
+    def page_views():
+        for _ in range(PAGE_VIEWS):
+            page_ms.append(request(port, "GET", "/login")[1])
+            time.sleep(0.01)
+
+    request(port, "POST", "/login", body)  # chauffe (démarrage du pool)
+    clients = [threading.Thread(target=login_burst) for _ in range(CLIENTS)]
+    viewer = threading.Thread(target=page_views)
+    start = time.perf_counter()
+    for t in clients + [viewer]:
+        t.start()
+    for t in clients + [viewer]:
+        t.join()
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+    with app.app_context():
+        app.extensions["hasher"].shutdown()
+
+    ok = sum(1 for s in statuses if s == 302)
+    busy = sum(1 for s in statuses if s == 503)
+    p95 = statistics.quantiles(page_ms, n=20)[-1]
+    print(f"{label:>8} {ok / elapsed:>10.1f} {busy:>6} {statistics.median(page_ms):>12.1f} {p95:>12.1f}")
+
+
+def main():
+    fd, path = tempfile.mkstemp(suffix=".sqlite")
+    try:
+        app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}"})
+        with app.app_context():
+            db.create_all()
+            db.session.add(User(email="bench@example.com", name="bench",
+                                password=generate_password_hash("Bench!123", method=METHOD)))
+            db.session.commit()
+
+        print(f"{CLIENTS} clients x {LOGINS_PER_CLIENT} logins, {METHOD}, {WORKERS} workers, queue {QUEUE_DEPTH}")
+        print(f"{'mode':>8} {'logins/s':>10} {'503':>6} {'page p50 ms':>12} {'page p95 ms':>12}")
+        run("inline", 0, path)
+        run("pool", WORKERS, path)
+    finally:
+        os.close(fd)
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
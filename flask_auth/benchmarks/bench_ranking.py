@@ -0,0 +1,89 @@
+# bench_ranking.py
+#
+# Latence du fil "Most Popular" quand la table Like grossit :
+#   - legacy : GROUP BY sur Like joint aux tweets des comptes suivis
+#   - engine : top-K sur les scores décroissants (ranking.top_tweets)
+#
+#   python -m flask_auth.benchmarks.bench_ranking
+
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert
+
+from flask_auth.project import create_app, db, ranking
+from flask_auth.project.models import User, Tweet, Like
+
+AUTHORS = 50
+TWEETS_PER_AUTHOR = 40
+LIKE_LEVELS = [1_000, 10_000, 100_000]
+K = 20
+RUNS = 20
+
+
+def timed(fn):
+    samples = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def legacy(author_ids):
+    return (
+        db.session.query(Tweet, func.count(Like.id))
+        .outerjoin(Like, Like.tweet_id == Tweet.id)
+        .filter(Tweet.user_id.in_(author_ids))
+        .group_by(Tweet.id)
+        .order_by(func.count(Like.id).desc(), Tweet.timestamp.desc())
+        .limit(K)
+        .all()
+    )
+
+
+def main():
+    fd, path = tempfile.mkstemp(suffix=".sqlite")
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}", "RANKING_CACHE_TTL": 3600})
+    rnd = random.Random(42)
+    try:
+        with app.app_context():
+            db.create_all()
+            db.session.execute(insert(User), [
+                {"email": f"u{i}@example.com", "name": f"u{i}", "password": "x"} for i in range(AUTHORS)
+            ])
+            now = datetime.utcnow()
+            db.session.execute(insert(Tweet), [
+                {"content": "bench", "user_id": a + 1, "timestamp": now - timedelta(minutes=rnd.randint(0, 60 * 24 * 30))}
+                for a in range(AUTHORS) for _ in range(TWEETS_PER_AUTHOR)
+            ])
+            db.session.commit()
+            ranking.rescore()
+            db.session.commit()
+            author_ids = list(range(1, AUTHORS + 1))
+            n_tweets = AUTHORS * TWEETS_PER_AUTHOR
+
+            print(f"{'likes':>10} {'legacy (ms)':>12} {'engine (ms)':>12}")
+            inserted = 0
+            for level in LIKE_LEVELS:
+                db.session.execute(insert(Like), [
+                    {"user_id": rnd.randint(1, AUTHORS), "tweet_id": rnd.randint(1, n_tweets)}
+                    for _ in range(level - inserted)
+                ])
+                db.session.commit()
+                inserted = level
+                ranking.get_index().top(author_ids, K)  # chauffe
+                t_legacy = timed(lambda: legacy(author_ids))
+                t_engine = timed(lambda: ranking.top_tweets(author_ids, K))
+                print(f"{level:>10} {t_legacy:>12.2f} {t_engine:>12.2f}")
+    finally:
+        os.close(fd)
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# bench_search.py
+#
+# Latence de la recherche plein texte quand la table Tweet grossit :
+#   - legacy : LIKE '%mot%' (aucun index utilisable)
+#   - fts    : search.search_tweets (FTS5, préfixe, BM25, 1re et 2e page)
+#
+#   python -m flask_auth.benchmarks.bench_search [nb_tweets]
+
+import itertools
+import os
+import random
+import string
+import statistics
+import sys
+import tempfile
+import time
+
+from sqlalchemy import insert
+
+from flask_auth.project import create_app, db
+from flask_auth.project.models import User, Tweet
+from flask_auth.project.search import search_tweets, to_match
+
+TWEETS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+AUTHORS = 1_000
+VOCABULARY = 20_000
+WORDS_PER_TWEET = (6, 14)
+CHUNK = 50_000
+PER_PAGE = 20
+RUNS = 20
+
+
+def vocabulary(rnd):
+    """Mots aléatoires de 3 à 10 lettres, pour des préfixes répartis comme dans un vrai texte."""
+    words = set()
+    while len(words) < VOCABULARY:
+        words.add(''.join(rnd.choices(string.ascii_lowercase, k=rnd.randint(3, 10))))
+    return sorted(words, key=lambda w: rnd.random())
+
+
+def queries(words):
+    # words[rang] suit la distribution de Zipf : words[0] est le plus fréquent
+    return {
+        "rare word": words[VOCABULARY - 7],
+        "common word": words[5],
+        "very common": words[0],
+        "prefix": words[300][:3],
+        "two words": f"{words[40]} {words[900]}",
+    }
+
+
+def timed(fn):
+    samples = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def legacy(word):
+    return (
+        Tweet.query.filter(Tweet.content.ilike(f"%{word}%"))
+        .order_by(Tweet.id.desc()).limit(PER_PAGE).all()
+    )
+
+
+def main():
+    fd, path = tempfile.mkstemp(suffix=".sqlite")
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}"})
+    rnd = random.Random(42)
+    words = vocabulary(rnd)
+    # distribution de Zipf : quelques mots très fréquents, une longue traîne
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(VOCABULARY)))
+    try:
+        with app.test_request_context():
+            db.create_all()
+            db.session.execute(insert(User), [
+                {"email": f"u{i}@example.com", "name": f"u{i}", "password": "x"} for i in range(AUTHORS)
+            ])
+            start = time.perf_counter()
+            for offset in range(0, TWEETS, CHUNK):
+                db.session.execute(insert(Tweet), [
+                    {"content": " ".join(rnd.choices(words, cum_weights=cum_weights, k=rnd.randint(*WORDS_PER_TWEET))),
+                     "user_id": rnd.randint(1, AUTHORS)}
+                    for _ in range(min(CHUNK, TWEETS - offset))
+                ])
+                db.session.commit()
+            print(f"{TWEETS} tweets indexed in {time.perf_counter() - start:.1f} s")
+            db.session.execute(db.text("INSERT INTO tweet_fts (tweet_fts) VALUES ('optimize')"))
+            db.session.commit()
+
+            print(f"{'query':>12} {'matches':>9} {'legacy (ms)':>12} {'fts p1 (ms)':>12} {'fts p2 (ms)':>12}")
+            for label, query in queries(words).items():
+                matches = db.session.execute(
+                    db.text("SELECT count(*) FROM tweet_fts WHERE tweet_fts MATCH :q"), {"q": to_match(query)},
+                ).scalar()
+                t_legacy = timed(lambda: legacy(query.split()[0]))
+                t_first = timed(lambda: search_tweets(query, per_page=PER_PAGE))
+                cursor = search_tweets(query, per_page=PER_PAGE).next_cursor
+                t_second = f"{timed(lambda: search_tweets(query, cursor=cursor, per_page=PER_PAGE)):.2f}" if cursor else "-"
+                print(f"{label:>12} {matches:>9} {t_legacy:>12.2f} {t_first:>12.2f} {t_second:>12}")
+    finally:
+        os.close(fd)
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# bench_startup.py
+#
+# Temps de démarrage d'un worker : import à froid du package + create_app(),
+# mesuré dans un nouveau processus Python à chaque essai, sur une base déjà
+# à jour. Trois cas :
+#   - verified : DB_AUTO_UPGRADE (une lecture de la version du schéma)
+#   - no-check : DB_AUTO_UPGRADE = False (schéma géré par `flask db-upgrade`)
+#   - factory  : un second create_app() dans le même processus (tests)
+# Le script échoue si la médiane "verified" dépasse STARTUP_BUDGET_MS.
+#
+#   python -m flask_auth.benchmarks.bench_startup
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from flask_auth.project import create_app
+
+RUNS = 7
+STARTUP_BUDGET_MS = 750
+
+CHILD = """
+import time
+start = time.perf_counter()
+from flask_auth.project import create_app
+create_app({{"SQLALCHEMY_DATABASE_URI": {uri!r}, "DB_AUTO_UPGRADE": {upgrade}}})
+cold = time.perf_counter() - start
+start = time.perf_counter()
+create_app({{"SQLALCHEMY_DATABASE_URI": {uri!r}, "DB_AUTO_UPGRADE": {upgrade}}})
+print(cold * 1000, (time.perf_counter() - start) * 1000)
+"""
+
+
+def measure(uri, upgrade):
+    cold, warm = [], []
+    for _ in range(RUNS):
+        out = subprocess.run(
+            [sys.executable, "-c", CHILD.format(uri=uri, upgrade=upgrade)],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+        ).stdout.split()
+        cold.append(float(out[0]))
+        warm.append(float(out[1]))
+    return statistics.median(cold), statistics.median(warm)
+
+
+def main():
+    fd, path = tempfile.mkstemp(suffix=".sqlite")
+    uri = f"sqlite:///{path}"
+    try:
+        create_app({"SQLALCHEMY_DATABASE_URI": uri})  # crée le schéma une fois
+        verified, factory = measure(uri, True)
+        no_check, _ = measure(uri, False)
+        print(f"{'case':>10} {'median ms':>10}")
+        print(f"{'verified':>10} {verified:>10.1f}")
+        print(f"{'no-check':>10} {no_check:>10.1f}")
+        print(f"{'factory':>10} {factory:>10.1f}")
+        assert verified <= STARTUP_BUDGET_MS, (
+            f"cold import + create_app took {verified:.0f} ms (budget {STARTUP_BUDGET_MS} ms)"
+        )
+        print(f"within budget ({STARTUP_BUDGET_MS} ms)")
+    finally:
+        os.close(fd)
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.unlink(path + suffix)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,34 +3,129 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
+import click
+import importlib
+import logging
 import os
 
 # Init SQLAlchemy pour pouvoir l'utiliser dans les modèles
 db = SQLAlchemy()
 
-def create_app():
-    app = Flask(__name__)
+logger = logging.getLogger(__name__)
 
-    # 🔐 Configuration
+# Commandes CLI : (nom, module, attribut), importées seulement quand on les lance
+CLI_COMMANDS = [
+    ('rebuild-timelines', '.timeline', 'rebuild_timelines_command'),
+    ('recount-tweets', '.counters', 'recount_tweets_command'),
+    ('recount-notifications', '.counters', 'recount_notifications_command'),
+    ('rescore-tweets', '.ranking', 'rescore_tweets_command'),
+    ('rebuild-trending', '.trending', 'rebuild_trending_command'),
+    ('rerender-content', '.render', 'rerender_content_command'),
+    ('db-upgrade', '.migrations', 'upgrade_command'),
+]
+
+
+class LazyCommand(click.Command):
+    """Commande dont le module n'est importé qu'à l'exécution (ou pour afficher son aide)."""
+
+    def __init__(self, name, module, attr):
+        super().__init__(name)
+        self.module, self.attr = module, attr
+
+    def load(self):
+        return getattr(importlib.import_module(self.module, __name__), self.attr)
+
+    def make_context(self, info_name, args, parent=None, **extra):
+        # le contexte porte la vraie commande : c'est elle que click invoque ensuite
+        return self.load().make_context(info_name, args, parent=parent, **extra)
+
+    def get_short_help_str(self, limit=45):
+        return self.load().get_short_help_str(limit)
+
+def create_app(config=None):
+    app = Flask(__name__, instance_relative_config=True)
+
+    # 🔐 Configuration (valeurs par défaut ; instance/config.py et FLASK_* les surchargent, voir settings.py)
     app.config['SECRET_KEY'] = '9OLWxND4o83j4K4iuopO'
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///db.sqlite'
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SQLITE_PRAGMAS'] = {
+        'journal_mode': 'WAL',  # lecteurs et écrivain ne se bloquent plus
+        'synchronous': 'NORMAL',  # sûr en WAL, bien moins de fsync
+        'busy_timeout': 5000,  # ms d'attente du verrou d'écriture avant "database is locked"
+        'mmap_size': 256 * 1024 * 1024,  # lectures via mmap (octets)
+        'cache_size': -64 * 1024,  # cache de pages par connexion (KiB si négatif)
+    }
+    app.config['DB_POOL_SIZE'] = 10  # connexions gardées ouvertes (bases serveur uniquement)
+    app.config['DB_MAX_OVERFLOW'] = 20  # connexions temporaires au-delà du pool
+    app.config['DB_POOL_TIMEOUT'] = 30  # secondes d'attente d'une connexion libre
+    app.config['DB_POOL_RECYCLE'] = 1800  # secondes avant de recycler une connexion
+    app.config['DB_AUTO_UPGRADE'] = False  # True : vérifie / migre le schéma au démarrage (sinon `flask db-upgrade` au déploiement)
+    app.config['TIMELINE_MAX_LENGTH'] = 800  # nb max d'entrées par home pré-calculée
+    app.config['PAGE_SIZE'] = 20  # nb d'éléments par page (pagination par curseur)
+    app.config['API_MAX_LIMIT'] = 100  # taille de page maximale demandée via ?limit= (api.py)
+    app.config['RANKING_HALF_LIFE_HOURS'] = 24  # demi-vie du score "Most Popular"
+    app.config['RANKING_CACHE_TTL'] = 60  # secondes avant de relire les scores d'un auteur
+    app.config['FOLLOW_GRAPH_TTL'] = 300  # secondes avant de relire tout le graphe de follow
+    app.config['NOTIFICATIONS_ASYNC'] = True  # écriture différée des notifications (notify.py)
+    app.config['NOTIFICATIONS_QUEUE_SIZE'] = 10000
+    app.config['NOTIFICATIONS_ENQUEUE_TIMEOUT'] = 0.05  # secondes d'attente si la file est pleine, puis écriture directe
+    app.config['NOTIFICATIONS_BATCH_SIZE'] = 200
+    app.config['NOTIFICATIONS_FLUSH_INTERVAL'] = 0.5  # secondes d'attente pour compléter un lot
+    app.config['NOTIFICATIONS_COALESCE_WINDOW'] = 3600  # secondes pendant lesquelles on regroupe
+    app.config['NOTIFICATIONS_STREAM_HEARTBEAT'] = 15  # secondes entre deux keep-alive SSE
+    app.config['NOTIFICATIONS_STREAM_MAX_AGE'] = 300  # secondes avant de fermer un flux (le client se reconnecte)
+    app.config['SEARCH_CANDIDATES'] = 1000  # correspondances les plus récentes classées par BM25 (les plus anciennes ne sont pas renvoyées)
+    app.config['TRENDING_CACHE_TTL'] = 10  # secondes de validité du top-K des tendances
+    app.config['TRENDING_SNAPSHOT_INTERVAL'] = 60  # secondes entre deux sauvegardes des tendances
+    app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000000'  # format werkzeug ; les anciens hash sont refaits à la connexion
+    app.config['PASSWORD_HASH_WORKERS'] = min(4, os.cpu_count() or 1)  # processus de hachage (0 = dans la requête)
+    app.config['PASSWORD_HASH_QUEUE_DEPTH'] = 32  # demandes en attente avant de répondre 503
+    app.config['PASSWORD_HASH_TIMEOUT'] = 10  # secondes max d'attente d'un résultat
+    app.config['USER_CACHE_SIZE'] = 10000  # utilisateurs connectés gardés en cache (identity.py)
+    app.config['USER_CACHE_TTL'] = 60  # secondes avant de relire un utilisateur en base
+    app.config['FRAGMENT_CACHE_MAX_BYTES'] = 32 * 1024 * 1024  # octets de cartes de tweets rendues gardées en mémoire (0 = pas de cache)
+    app.config['FRAGMENT_CACHE_DIR'] = None  # dossier du second niveau sur disque, partagé entre workers
+    app.config['COMPRESS_ENABLED'] = True  # compression des réponses (compress.py)
+    app.config['COMPRESS_MIN_SIZE'] = 500  # octets en dessous desquels on envoie tel quel
+    app.config['COMPRESS_MIMETYPES'] = {
+        'text/html', 'text/css', 'text/plain', 'text/javascript',
+        'application/javascript', 'application/json', 'image/svg+xml',
+    }
+    app.config['COMPRESS_LEVELS'] = {'gzip': 6, 'br': 4, 'zstd': 3}  # br et zstd seulement si le module est installé
+    app.config['ASSETS_MAX_AGE'] = 365 * 24 * 3600  # secondes de cache des fichiers statiques versionnés (assets.py)
+    app.config['LOGIN_THROTTLE_ENABLED'] = True  # limitation des tentatives de connexion (throttle.py)
+    app.config['LOGIN_THROTTLE_EMAIL_BURST'] = 5  # tentatives d'affilée sur un même email
+    app.config['LOGIN_THROTTLE_EMAIL_RATE'] = 1 / 60  # jetons regagnés par seconde, par email
+    app.config['LOGIN_THROTTLE_IP_BURST'] = 30  # tentatives d'affilée depuis une même IP
+    app.config['LOGIN_THROTTLE_IP_RATE'] = 0.5  # jetons regagnés par seconde, par IP
+    app.config['LOGIN_THROTTLE_BACKOFF'] = 2  # secondes de blocage au premier refus, doublées ensuite
+    app.config['LOGIN_THROTTLE_MAX_BACKOFF'] = 900  # blocage maximal, en secondes
+    app.config['LOGIN_THROTTLE_MAX_KEYS'] = 100000  # seaux gardés en mémoire (LRU)
+    app.config['LOGIN_THROTTLE_STORE'] = None  # chemin d'un fichier SQLite pour partager l'état entre workers
+
+    # Instance, environnement puis surcharges (tests, benchmarks), avant la création du moteur SQL
+    from . import settings
+    settings.load(app, config)
 
     # Init DB
     db.init_app(app)
+    settings.init_app(app, db)
 
     # Init LoginManager
     login_manager = LoginManager()
     login_manager.login_view = 'auth.login'
+    login_manager.blueprint_login_views = {'api': None}  # l'API répond 401 au lieu de rediriger
     login_manager.init_app(app)
 
     # Importer tous les modèles pour que db.create_all() crée toutes les tables
-    from .models import User, Tweet, Like, Comment
+    from .models import User, Tweet, Like, Comment, TimelineEntry
 
-    # User loader pour Flask-Login
+    # User loader pour Flask-Login : instantané mis en cache (identity.py)
     @login_manager.user_loader
     def load_user(user_id):
-        return db.session.get(User, int(user_id))
+        from .identity import load_user
+        return load_user(int(user_id))
 
     # Blueprints
     from .auth import auth as auth_blueprint
@@ -39,11 +134,27 @@ def create_app():
     from .main import main as main_blueprint
     app.register_blueprint(main_blueprint)
 
-    # ⚡ Créer la base et les tables si elles n’existent pas
-    with app.app_context():
-        print("DB path:", os.path.abspath("db.sqlite"))
-        print("Création de la DB si elle n'existe pas...")
-        db.create_all()
-        print("DB prête !")
+    from .assets import assets as assets_blueprint
+    app.register_blueprint(assets_blueprint)
+
+    from .api import api as api_blueprint
+    app.register_blueprint(api_blueprint)
+
+    # Compression des réponses (gzip / br / zstd)
+    from . import compress
+    compress.init_app(app)
+
+    # Commandes CLI (modules importés au lancement de la commande)
+    for name, module, attr in CLI_COMMANDS:
+        app.cli.add_command(LazyCommand(name, module, attr))
+
+    # ⚡ Créer la base et les tables si elles n’existent pas, migrer les anciennes
+    # (une seule lecture de version par base et par processus, voir migrations.py)
+    if app.config['DB_AUTO_UPGRADE']:
+        from .migrations import ensure_schema
+        with app.app_context():
+            applied = ensure_schema()
+            if applied:
+                logger.info("Database %s upgraded to v%d", db.engine.url, applied[-1].version)
 
     return app
@@ -0,0 +1,177 @@
+# api.py
+#
+# API JSON en lecture (/api/...) pour rafraîchir un fil sans retélécharger
+# la page HTML.
+#
+# Chaque liste renvoie {"items": [...], "next_cursor": ...} :
+#   - ?cursor=   : page suivante (plus ancienne), même keyset que les pages
+#                  HTML (pagination.py) ;
+#   - ?since_id= : seulement les éléments d'id > since_id, les plus récents
+#                  d'abord ; next_cursor continue vers le bas sans repasser
+#                  sous since_id. Un client qui sonde passe l'id le plus
+#                  récent qu'il a déjà ;
+#   - ?limit=    : taille de page, bornée par API_MAX_LIMIT.
+# Les projections sont compactes : ids, texte brut, auteur (id, nom),
+# compteurs et, pour un lecteur connecté, `liked`. Auteurs et likes sont
+# chargés pour toute la page en une requête chacun.
+#
+# Les fils de tweets ont les mêmes validateurs que les pages (validators.py) :
+# un sondage sur un fil inchangé reçoit 304 sans requête de tweets.
+# Les notifications regroupées (notify.py) gardent leur id : since_id ne
+# renvoie que les nouvelles lignes, pas les compteurs mis à jour.
+
+import json
+
+from flask import Blueprint, abort, current_app, jsonify, request
+from flask_login import current_user, login_required
+from sqlalchemy import select
+from werkzeug.exceptions import HTTPException
+
+from . import db, timeline, validators
+from .loaders import viewer_id
+from .models import Hashtag, Like, Notification, TimelineEntry, Tweet, User
+from .pagination import page_size, paginate
+
+api = Blueprint('api', __name__, url_prefix='/api')
+
+
+@api.errorhandler(HTTPException)
+def json_error(e):
+    # même statut et mêmes en-têtes (Retry-After...), corps en JSON
+    resp = e.get_response()
+    resp.data = json.dumps({"error": e.name, "status": e.code})
+    resp.content_type = 'application/json'
+    return resp
+
+
+# ====================
+# Paramètres
+# ====================
+def _int_arg(name):
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        abort(400)
+
+
+def _limit():
+    limit = _int_arg('limit') or page_size()
+    return max(1, min(limit, current_app.config.get('API_MAX_LIMIT', 100)))
+
+
+def _page(query, ts_col, id_col, key=None):
+    """Keyset de pagination.py, restreint aux ids > since_id si demandé."""
+    since_id = _int_arg('since_id')
+    if since_id is not None:
+        query = query.filter(id_col > since_id)
+    return paginate(query, ts_col, id_col, per_page=_limit(), key=key)
+
+
+# ====================
+# Projections
+# ====================
+def _names(user_ids):
+    if not user_ids:
+        return {}
+    return dict(db.session.execute(select(User.id, User.name).where(User.id.in_(set(user_ids)))).all())
+
+
+def _tweets(page):
+    tweets = page.items
+    names = _names([t.user_id for t in tweets])
+    liked = set()
+    viewer = viewer_id(current_user)
+    if viewer is not None and tweets:
+        liked = set(db.session.execute(
+            select(Like.tweet_id)
+            .where(Like.user_id == viewer)
+            .where(Like.tweet_id.in_([t.id for t in tweets]))
+        ).scalars())
+    items = []
+    for t in tweets:
+        item = {
+            "id": t.id,
+            "content": t.content,
+            "created_at": t.timestamp.isoformat() if t.timestamp else None,
+            "author": {"id": t.user_id, "name": names.get(t.user_id)},
+            "like_count": t.like_count,
+            "comment_count": t.comment_count,
+        }
+        if viewer is not None:
+            item["liked"] = t.id in liked
+        items.append(item)
+    return jsonify({"items": items, "next_cursor": page.next_cursor})
+
+
+def _send(validator, build):
+    not_modified = validators.not_modified(validator)
+    if not_modified is not None:
+        return not_modified
+    return validators.send(build(), validator)
+
+
+# ====================
+# Fils de tweets
+# ====================
+@api.route('/home')
+@login_required
+def home():
+    following_ids = current_user.following_ids | {current_user.id}
+    validator = validators.for_authors('f', current_user.id, following_ids, shows_flashes=False)
+    return _send(validator, lambda: _tweets(_page(
+        timeline.home_query(current_user.id),
+        TimelineEntry.timestamp, TimelineEntry.tweet_id,
+        key=lambda t: (t.timestamp, t.id),
+    )))
+
+
+@api.route('/users/<int:user_id>/tweets')
+@login_required
+def user_tweets(user_id):
+    validator = validators.for_authors('p', current_user.id, [user_id], shows_flashes=False)
+    if validator is None and db.session.get(User, user_id) is None:
+        abort(404)
+    return _send(validator, lambda: _tweets(_page(
+        Tweet.query.filter_by(user_id=user_id), Tweet.timestamp, Tweet.id,
+    )))
+
+
+@api.route('/hashtags/<string:tag>')
+def hashtag(tag):
+    validator = validators.for_hashtag(viewer_id(current_user), tag, shows_flashes=False)
+
+    def build():
+        hashtag = Hashtag.query.filter_by(tag=tag).first()
+        if hashtag is None:
+            return jsonify({"items": [], "next_cursor": None})
+        return _tweets(_page(hashtag.tweets, Tweet.timestamp, Tweet.id))
+    return _send(validator, build)
+
+
+# ====================
+# Notifications
+# ====================
+@api.route('/notifications')
+@login_required
+def notifications():
+    page = _page(
+        Notification.query.filter_by(recipient_id=current_user.id),
+        Notification.created_at, Notification.id,
+    )
+    names = _names([n.actor_id for n in page.items])
+    items = [{
+        "id": n.id,
+        "type": n.type,
+        "actor": {"id": n.actor_id, "name": names.get(n.actor_id)},
+        "others": (n.actor_count or 1) - 1,
+        "tweet_id": n.tweet_id,
+        "payload": n.get_payload(),
+        "is_read": n.is_read,
+        "created_at": n.created_at.isoformat() if n.created_at else None,
+    } for n in page.items]
+    resp = jsonify({"items": items, "next_cursor": page.next_cursor})
+    resp.headers['Cache-Control'] = 'private, no-cache'
+    return resp
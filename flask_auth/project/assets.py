@@ -0,0 +1,71 @@
+# assets.py
+#
+# Fichiers statiques (static/) servis sous une URL qui contient l'empreinte
+# de leur contenu : asset_url('css/base.css') -> /assets/css/base.3f2a9c1e0b7d.css
+#
+# Comme l'URL change dès que le fichier change, la réponse peut être gardée
+# indéfiniment par le navigateur et les proxies (Cache-Control: public,
+# max-age=ASSETS_MAX_AGE, immutable). Les pages ne transportent plus leurs
+# styles : une carte de tweet ou la mise en page ne coûtent plus d'octets à
+# chaque affichage.
+#
+# Les empreintes sont calculées au premier usage de chaque fichier (rien au
+# démarrage), puis gardées ; en mode debug elles suivent la date du fichier.
+# Une empreinte périmée (page rendue avant un déploiement) sert le fichier
+# actuel, mais sans cache longue durée.
+
+import hashlib
+import os
+
+from flask import Blueprint, abort, current_app, send_from_directory, url_for
+from werkzeug.security import safe_join
+
+assets = Blueprint('assets', __name__)
+
+DIGEST_LENGTH = 12
+
+
+def _digest(filename):
+    """Empreinte du contenu de static/<filename>, None si le fichier n'existe pas."""
+    path = safe_join(current_app.static_folder, filename)
+    if path is None or not os.path.isfile(path):
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    manifest = current_app.extensions.setdefault('assets', {})
+    entry = manifest.get(filename)
+    if entry is None or (current_app.debug and entry[0] != stat.st_mtime_ns):
+        with open(path, 'rb') as f:
+            entry = (stat.st_mtime_ns, hashlib.sha256(f.read()).hexdigest()[:DIGEST_LENGTH])
+        manifest[filename] = entry
+    return entry[1]
+
+
+@assets.app_template_global()
+def asset_url(filename):
+    """URL versionnée d'un fichier de static/ (ex. asset_url('css/base.css'))."""
+    digest = _digest(filename)
+    if digest is None:
+        raise FileNotFoundError(f"static/{filename}")
+    stem, ext = os.path.splitext(filename)
+    return url_for('assets.asset', filename=f'{stem}.{digest}{ext}')
+
+
+@assets.route('/assets/<path:filename>')
+def asset(filename):
+    stem, ext = os.path.splitext(filename)
+    stem, _, digest = stem.rpartition('.')
+    if not stem:
+        abort(404)
+    real = stem + ext
+    current = _digest(real)
+    if current is None:
+        abort(404)
+    if digest != current:
+        return send_from_directory(current_app.static_folder, real, max_age=0)
+    resp = send_from_directory(current_app.static_folder, real,
+                               max_age=current_app.config.get('ASSETS_MAX_AGE', 365 * 24 * 3600))
+    resp.cache_control.immutable = True
+    return resp
@@ -1,10 +1,12 @@
 # auth.py
 
-from flask import Blueprint, render_template, redirect, url_for, request, flash
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import Blueprint, render_template, redirect, url_for, request, flash, current_app
 from flask_login import login_user, logout_user, login_required, current_user
 from .models import User
 from . import db
+from .hashing import hash_password, check_password
+from . import identity
+from .throttle import get_throttle
 import re
 
 def password_errors(password: str) -> list[str]:
@@ -41,6 +43,11 @@ def login_post():
         return redirect(url_for('auth.login')) # reload the page
 
     user = User.query.filter_by(email=email).first()
+
+    # limitation par email et par IP avant tout hachage (429 si épuisé, voir throttle.py)
+    throttle = get_throttle() if current_app.config.get('LOGIN_THROTTLE_ENABLED', True) else None
+    if throttle:
+        throttle.hit(email, request.remote_addr, would_hash=user is not None)
     
     # check if user actually exists
     if not user:
@@ -49,10 +56,16 @@ def login_post():
 
     
     # take the user supplied password, hash it, and compare it to the hashed password in database
-    if not user or not check_password_hash(user.password, password): 
+    # (hors du thread de requête, voir hashing.py ; 503 si le pool est saturé)
+    if not user or not check_password(user, password): 
         flash('Please check your login details and try again.', category="error")
         return redirect(url_for('auth.login')) # if user doesn't exist or password is wrong, reload the page
 
+    # enregistre le hash mis à niveau s'il utilisait d'anciens paramètres
+    db.session.commit()
+    if throttle:
+        throttle.succeeded(email)
+
     # if the above check passes, then we know the user has the right credentials
     login_user(user, remember=remember)
     return redirect(url_for('main.profile'))
@@ -86,11 +99,11 @@ def signup_post():
             flash(e, category="error")
         return redirect(url_for('auth.signup'))
 
-    # ⚡ Utilisation correcte de pbkdf2:sha256
+    # Algorithme et coût : PASSWORD_HASH_METHOD
     new_user = User(
         email=email,
         name=name,
-        password=generate_password_hash(password, method='pbkdf2:sha256')
+        password=hash_password(password)
     )
 
     db.session.add(new_user)
@@ -124,7 +137,7 @@ def password_post():
         return redirect(url_for('auth.password_page'))
 
     # Vérif du mot de passe actuel
-    if not check_password_hash(current_user.password, current_pwd):
+    if not check_password(current_user.row, current_pwd):
         flash("Current password is incorrect.", category="error")
         return redirect(url_for('auth.password_page'))
 
@@ -141,8 +154,9 @@ def password_post():
         return redirect(url_for('auth.password_page'))
 
     # Mise à jour
-    current_user.password = generate_password_hash(new_pwd, method='pbkdf2:sha256')
+    current_user.row.password = hash_password(new_pwd)
     db.session.commit()
+    identity.invalidate(current_user.id)
 
     flash("Password successfully changed.", category="success")
     return redirect(url_for('main.profile'))
\ No newline at end of file
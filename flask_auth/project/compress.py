@@ -0,0 +1,168 @@
+# compress.py
+#
+# Compression des réponses (gzip, et br / zstd si le module est installé).
+#
+# Les pages de fil répètent le même balisage de carte par tweet : elles se
+# compressent très bien. L'encodage est négocié avec Accept-Encoding (qualité
+# du client d'abord, puis ordre de PREFERENCE) ; on ne compresse que :
+#   - les réponses 200 sans Content-Encoding ni Cache-Control: no-transform ;
+#   - dont le type est dans COMPRESS_MIMETYPES ;
+#   - d'au moins COMPRESS_MIN_SIZE octets (toujours pour un flux, dont on ne
+#     connaît pas la taille).
+# Une réponse en flux (stream_with_context, générateur) n'est pas mise en
+# tampon : chaque morceau est compressé puis vidé (sync flush), le client
+# le reçoit aussitôt.
+#
+# Toute réponse compressible porte Vary: Accept-Encoding. Une réponse
+# compressée a un ETag faible : ce n'est plus la même suite d'octets, mais
+# la comparaison faible de If-None-Match (validators.py) la reconnaît.
+#
+# brotli / zstandard ne sont importés qu'à la première réponse compressée.
+
+import zlib
+
+from flask import current_app, request
+
+PREFERENCE = ('br', 'zstd', 'gzip')
+
+_codecs = None
+
+
+# ====================
+# Encodages
+# ====================
+class _Gzip:
+    def __init__(self, level):
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data):
+        return self._z.compress(data)
+
+    def flush(self):
+        return self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._z.flush()
+
+
+class _Brotli:
+    def __init__(self, level):
+        import brotli
+        self._c = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self._c.process(data)
+
+    def flush(self):
+        return self._c.flush()
+
+    def finish(self):
+        return self._c.finish()
+
+
+class _Zstd:
+    def __init__(self, level):
+        import zstandard
+        self._flush_block = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        self._c = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self._c.compress(data)
+
+    def flush(self):
+        return self._c.flush(self._flush_block)
+
+    def finish(self):
+        return self._c.flush()
+
+
+def available():
+    """Encodages utilisables dans ce processus -> classe du compresseur."""
+    global _codecs
+    if _codecs is None:
+        codecs = {'gzip': _Gzip}
+        try:
+            import brotli  # noqa: F401
+            codecs['br'] = _Brotli
+        except ImportError:
+            pass
+        try:
+            import zstandard  # noqa: F401
+            codecs['zstd'] = _Zstd
+        except ImportError:
+            pass
+        _codecs = codecs
+    return _codecs
+
+
+def negotiate(accept_encodings, codecs):
+    """Encodage à utiliser pour ce client, ou None (identity)."""
+    best, best_q = None, 0
+    for name in PREFERENCE:
+        if name not in codecs:
+            continue
+        q = accept_encodings.quality(name)
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+# ====================
+# Réponses
+# ====================
+def _compressible(response, config):
+    if response.status_code != 200 or 'Content-Encoding' in response.headers:
+        return False
+    if 'no-transform' in (response.headers.get('Cache-Control') or ''):
+        return False
+    if response.mimetype not in config['COMPRESS_MIMETYPES']:
+        return False
+    if response.is_streamed:
+        return True
+    return response.calculate_content_length() >= config['COMPRESS_MIN_SIZE']
+
+
+def _stream(chunks, compressor):
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = compressor.compress(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+def compress_response(response):
+    config = current_app.config
+    if not config.get('COMPRESS_ENABLED', True) or not _compressible(response, config):
+        return response
+    response.vary.add('Accept-Encoding')
+    codecs = available()
+    encoding = negotiate(request.accept_encodings, codecs)
+    if encoding is None:
+        return response
+
+    compressor = codecs[encoding](config['COMPRESS_LEVELS'][encoding])
+    if response.is_streamed:
+        # la réponse reste un flux : aucun morceau n'est retenu
+        chunks = response.response
+        response.direct_passthrough = False
+        response.response = _stream(chunks, compressor)
+        response.headers.pop('Content-Length', None)
+    else:
+        response.set_data(compressor.compress(response.get_data()) + compressor.finish())
+
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_app(app):
+    app.after_request(compress_response)
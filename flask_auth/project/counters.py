@@ -0,0 +1,98 @@
+# counters.py
+#
+# Compteurs dénormalisés sur Tweet (like_count, comment_count) et sur User
+# (unread_notifications). Les mises à jour se font en SQL (col = col + delta)
+# dans la transaction de l'écriture, pour éviter les pertes en cas de
+# requêtes concurrentes (like_count est maintenu par likes.toggle_like).
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func, select, update
+
+from . import db
+from .models import User, Tweet, Like, Comment, Notification
+
+
+def add_comments(tweet_id, delta):
+    db.session.execute(
+        update(Tweet)
+        .where(Tweet.id == tweet_id)
+        .values(comment_count=Tweet.comment_count + delta)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def add_unread(user_id, delta):
+    """Ajuste le compteur de non-lues et incrémente sa version (ETag)."""
+    db.session.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(
+            unread_notifications=User.unread_notifications + delta,
+            notifications_version=User.notifications_version + 1,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def unread(user_id):
+    """(nb de non-lues, version) lus directement en base, sans passer par l'objet en session."""
+    row = db.session.execute(
+        select(User.unread_notifications, User.notifications_version).where(User.id == user_id)
+    ).one_or_none()
+    return tuple(row) if row else (0, 0)
+
+
+def recount():
+    """Recalcule les compteurs depuis les tables Like/Comment ; retourne le nb de tweets corrigés."""
+    likes = (
+        select(func.count(Like.id))
+        .where(Like.tweet_id == Tweet.id)
+        .scalar_subquery()
+    )
+    comments = (
+        select(func.count(Comment.id))
+        .where(Comment.tweet_id == Tweet.id)
+        .scalar_subquery()
+    )
+    result = db.session.execute(
+        update(Tweet)
+        .where((Tweet.like_count != likes) | (Tweet.comment_count != comments))
+        .values(like_count=likes, comment_count=comments)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def recount_unread():
+    """Recalcule les compteurs de non-lues ; retourne le nb d'utilisateurs corrigés."""
+    count = (
+        select(func.count(Notification.id))
+        .where(Notification.recipient_id == User.id, Notification.is_read.is_(False))
+        .scalar_subquery()
+    )
+    result = db.session.execute(
+        update(User)
+        .where(User.unread_notifications != count)
+        .values(unread_notifications=count, notifications_version=User.notifications_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+@click.command('recount-tweets')
+@with_appcontext
+def recount_tweets_command():
+    """Répare les compteurs like_count/comment_count qui auraient dérivé."""
+    fixed = recount()
+    db.session.commit()
+    click.echo(f"{fixed} tweets fixed.")
+
+
+@click.command('recount-notifications')
+@with_appcontext
+def recount_notifications_command():
+    """Répare les compteurs de notifications non lues qui auraient dérivé."""
+    fixed = recount_unread()
+    db.session.commit()
+    click.echo(f"{fixed} users fixed.")
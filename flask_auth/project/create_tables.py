@@ -21,9 +21,10 @@ def main():
     create_app = getattr(pkg, 'create_app', None)
 
     # si create_app existe, appelle-la pour obtenir l'app
+    # (sans contrôle automatique du schéma : la migration est faite ci-dessous)
     if callable(create_app):
         try:
-            app = create_app()
+            app = create_app({'DB_AUTO_UPGRADE': False})
         except Exception as e:
             print("Erreur lors de l'appel à create_app():", e)
             raise
@@ -42,9 +43,12 @@ def main():
     if app is None or db is None:
         raise RuntimeError("Impossible de trouver 'app' et/ou 'db' dans flask_auth.project. Vérifie __init__.py")
 
+    from flask_auth.project.migrations import upgrade, current_version
+
     with app.app_context():
-        db.create_all()
-        print("Tables created successfully")
+        for m in upgrade():
+            print(f"  v{m.version} : {m.description}")
+        print(f"Tables created successfully (schema v{current_version()})")
 
 if __name__ == '__main__':
     main()
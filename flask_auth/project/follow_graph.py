@@ -0,0 +1,107 @@
+# follow_graph.py
+#
+# Index en mémoire du graphe de follow (table d'association `followers`).
+# Adjacence par ensembles, indexée par id utilisateur, dans les deux sens.
+# Chargé paresseusement en une requête, puis tenu à jour à chaque commit
+# contenant un follow/unfollow (les opérations sont notées dans la session
+# et appliquées seulement si la transaction réussit). Relu entièrement après
+# FOLLOW_GRAPH_TTL secondes pour rattraper les écritures des autres workers.
+
+import threading
+import time
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from . import db
+
+_OPS_KEY = 'follow_graph_ops'
+_EMPTY = frozenset()
+
+
+class FollowGraph:
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._following = {}  # follower_id -> {followed_id}
+        self._followers = {}  # followed_id -> {follower_id}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def _ensure_loaded(self):
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at <= self.ttl:
+            return
+        from .models import followers
+        rows = db.session.execute(select(followers.c.follower_id, followers.c.followed_id)).all()
+        following, followers_ = {}, {}
+        for a, b in rows:
+            following.setdefault(a, set()).add(b)
+            followers_.setdefault(b, set()).add(a)
+        with self._lock:
+            self._following, self._followers = following, followers_
+            self._loaded_at = time.monotonic()
+
+    @property
+    def loaded(self):
+        return self._loaded_at is not None
+
+    # -------- lecture --------
+    def following(self, user_id):
+        self._ensure_loaded()
+        return frozenset(self._following.get(user_id, _EMPTY))
+
+    def followers(self, user_id):
+        self._ensure_loaded()
+        return frozenset(self._followers.get(user_id, _EMPTY))
+
+    def is_following(self, follower_id, followed_id):
+        self._ensure_loaded()
+        return followed_id in self._following.get(follower_id, _EMPTY)
+
+    def following_count(self, user_id):
+        self._ensure_loaded()
+        return len(self._following.get(user_id, _EMPTY))
+
+    def followers_count(self, user_id):
+        self._ensure_loaded()
+        return len(self._followers.get(user_id, _EMPTY))
+
+    # -------- écriture --------
+    def add(self, follower_id, followed_id):
+        with self._lock:
+            self._following.setdefault(follower_id, set()).add(followed_id)
+            self._followers.setdefault(followed_id, set()).add(follower_id)
+
+    def remove(self, follower_id, followed_id):
+        with self._lock:
+            self._following.get(follower_id, set()).discard(followed_id)
+            self._followers.get(followed_id, set()).discard(follower_id)
+
+
+def get_graph():
+    ext = current_app.extensions
+    if 'follow_graph' not in ext:
+        ext.setdefault('follow_graph', FollowGraph(current_app.config.get('FOLLOW_GRAPH_TTL', 300)))
+    return ext['follow_graph']
+
+
+def record(op, follower_id, followed_id):
+    """Note un follow ('add') ou unfollow ('remove') à appliquer au prochain commit."""
+    db.session.info.setdefault(_OPS_KEY, []).append((op, follower_id, followed_id))
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_ops(session):
+    ops = session.info.pop(_OPS_KEY, None)
+    if not ops or not has_app_context():
+        return
+    graph = current_app.extensions.get('follow_graph')
+    if graph is None or not graph.loaded:
+        return  # sera lu en base au premier accès
+    for op, follower_id, followed_id in ops:
+        getattr(graph, op)(follower_id, followed_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_ops(session):
+    session.info.pop(_OPS_KEY, None)
@@ -0,0 +1,186 @@
+# fragments.py
+#
+# Cache des cartes de tweets déjà rendues.
+#
+# Une carte (_tweet_card_fragment.html) affiche le tweet, son auteur, son
+# compteur de likes et ses commentaires : rien qui dépende du lecteur. Un
+# tweet populaire apparaît dans des milliers de fils, on ne la rend donc
+# qu'une fois par version :
+#   - clé : id du tweet ;
+#   - version : sel du rendu (templates, RENDER_VERSION), html_version,
+#     like_count et comment_count. Le contenu d'un tweet ne change pas et les
+#     commentaires ne font que s'ajouter : ces compteurs suffisent.
+# Les parties propres au lecteur (bouton supprimer, état "liked") sont
+# marquées dans le template par des commentaires HTML, découpées une fois
+# au remplissage et recollées à chaque affichage (Fragment.splice).
+#
+# Le cache mémoire est un LRU borné en octets (FRAGMENT_CACHE_MAX_BYTES).
+# FRAGMENT_CACHE_DIR ajoute un second niveau sur disque, partagé par les
+# workers et conservé entre redémarrages : un fichier par tweet, remplacé
+# à chaque nouvelle version. Les statistiques (hits, hit_rate...) sont dans
+# FragmentCache.stats.
+
+import json
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict, namedtuple
+
+from flask import current_app
+from markupsafe import Markup
+
+from .render import template_salt
+
+TEMPLATE = '_tweet_card_fragment.html'
+
+# <!--#delete-->formulaire<!--#/delete--> ... class="like-btn<!--#liked-->"
+_MARKERS = re.compile(r'<!--#delete-->|<!--#/delete-->|<!--#liked-->')
+
+
+class Fragment(namedtuple('Fragment', 'head delete middle tail')):
+    """Carte découpée autour des parties propres au lecteur."""
+
+    @classmethod
+    def parse(cls, html):
+        return cls(*_MARKERS.split(html))
+
+    def splice(self, show_delete=False, liked=False):
+        return Markup(''.join((
+            self.head,
+            self.delete if show_delete else '',
+            self.middle,
+            ' liked' if liked else '',
+            self.tail,
+        )))
+
+    @property
+    def size(self):
+        return sum(len(part.encode('utf-8')) for part in self)
+
+
+class FragmentCache:
+    def __init__(self, max_bytes=32 * 1024 * 1024, directory=None):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.bytes = 0
+        self._entries = OrderedDict()  # id -> (version, Fragment, taille)
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'stale': 0, 'evictions': 0, 'disk_errors': 0}
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def hit_rate(self):
+        hits = self.stats['hits'] + self.stats['disk_hits']
+        total = hits + self.stats['misses']
+        return hits / total if total else 0.0
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return entry[1]
+            if entry is not None:
+                self.stats['stale'] += 1
+        fragment = self._read(key, version)
+        if fragment is not None:
+            self.stats['disk_hits'] += 1
+            self._store(key, version, fragment)
+            return fragment
+        self.stats['misses'] += 1
+        return None
+
+    def set(self, key, version, fragment):
+        self._store(key, version, fragment)
+        self._write(key, version, fragment)
+
+    def discard(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.bytes -= entry[2]
+        if self.directory:
+            try:
+                os.unlink(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def _store(self, key, version, fragment):
+        size = fragment.size
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[2]
+            self._entries[key] = (version, fragment, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+                self.stats['evictions'] += 1
+
+    # ====================
+    # Niveau disque
+    # ====================
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key % 256:02x}', f'{key}.json')
+
+    def _read(self, key, version):
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(key), encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            self.stats['disk_errors'] += 1
+            return None
+        if data.get('version') != version:
+            return None
+        return Fragment(*data['parts'])
+
+    def _write(self, key, version, fragment):
+        if not self.directory:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # écriture atomique : un autre worker ne lit jamais un fichier à moitié écrit
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'version': version, 'parts': list(fragment)}, f)
+            os.replace(tmp, path)
+        except OSError:
+            self.stats['disk_errors'] += 1
+
+
+def get_cache():
+    ext = current_app.extensions
+    if 'fragments' not in ext:
+        config = current_app.config
+        ext['fragments'] = FragmentCache(
+            max_bytes=config.get('FRAGMENT_CACHE_MAX_BYTES', 32 * 1024 * 1024),
+            directory=config.get('FRAGMENT_CACHE_DIR'),
+        )
+    return ext['fragments']
+
+
+def version_of(tweet):
+    return f'{template_salt()}.{tweet.html_version}.{tweet.like_count}.{tweet.comment_count}'
+
+
+def render(tweet, cards):
+    """Rend la partie commune de la carte (l'appelant a préchargé auteurs et commentaires)."""
+    html = current_app.jinja_env.get_template(TEMPLATE).render(tweet=tweet, cards=cards)
+    return Fragment.parse(html)
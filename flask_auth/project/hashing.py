@@ -0,0 +1,163 @@
+# hashing.py
+#
+# Hachage des mots de passe hors du thread de requête.
+#
+# pbkdf2 / scrypt sont volontairement coûteux en CPU : appelés directement
+# dans la vue, une rafale de connexions occupe tous les workers et bloque
+# les pages qui n'ont rien à voir. Ici, le calcul part dans un pool de
+# processus de taille fixe (PASSWORD_HASH_WORKERS). Au plus
+# PASSWORD_HASH_QUEUE_DEPTH demandes attendent en plus de celles en cours ;
+# au-delà, HasherBusy (503 + Retry-After) est levée immédiatement plutôt que
+# d'empiler les requêtes.
+#
+# L'algorithme et son coût viennent de PASSWORD_HASH_METHOD (format
+# werkzeug, ex. "pbkdf2:sha256:1000000"). Un hash stocké avec d'autres
+# paramètres est recalculé à la connexion suivante (needs_rehash).
+# PASSWORD_HASH_WORKERS = 0 hache dans le thread appelant.
+
+import atexit
+import threading
+from concurrent.futures import TimeoutError
+
+from flask import current_app
+from werkzeug.exceptions import ServiceUnavailable
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+
+class HasherBusy(ServiceUnavailable):
+    description = "Too many sign-in attempts are being processed. Please try again in a moment."
+
+    def __init__(self, retry_after=1):
+        super().__init__(retry_after=retry_after)
+
+
+def _context():
+    import multiprocessing  # importé au premier hachage, pas au démarrage
+    # forkserver : les workers ne sont pas des copies d'un processus à threads
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+def method_prefix(method):
+    """Préfixe que werkzeug écrit dans un hash fait avec `method`, paramètres par défaut explicités.
+
+    "scrypt" -> "scrypt:32768:8:1", "pbkdf2:sha256" -> "pbkdf2:sha256:1000000".
+    """
+    name, *args = method.split(':')
+    if name == 'scrypt' and not args:
+        return f"scrypt:{2 ** 15}:8:1"
+    if name == 'pbkdf2' and len(args) < 2:
+        return f"pbkdf2:{args[0] if args else 'sha256'}:{DEFAULT_PBKDF2_ITERATIONS}"
+    return method
+
+
+class PasswordHasher:
+    def __init__(self, method, workers=2, queue_depth=32, timeout=10):
+        self.method = method
+        self.prefix = method_prefix(method)
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(workers + queue_depth) if workers else None
+        self._pool = None
+        self._lock = threading.Lock()
+        # compteurs incrémentés par tous les threads de requête ; verrou à part
+        # pour ne pas attendre la création du pool
+        self._stats_lock = threading.Lock()
+        self.stats = {'hashed': 0, 'verified': 0, 'rehashed': 0, 'rejected': 0, 'timeouts': 0}
+
+    def _count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                from concurrent.futures import ProcessPoolExecutor
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=_context())
+            return self._pool
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        from concurrent.futures.process import BrokenProcessPool
+        if not self._slots.acquire(blocking=False):
+            self._count('rejected')
+            raise HasherBusy()
+        pool = self._executor()
+        try:
+            future = pool.submit(fn, *args)
+        except BrokenProcessPool:
+            self._slots.release()
+            self._reset(pool)
+            raise HasherBusy()
+        # la place n'est rendue qu'à la fin du calcul, même si l'appelant abandonne
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            self._count('timeouts')
+            raise HasherBusy()
+        except BrokenProcessPool:
+            self._reset(pool)
+            raise HasherBusy()
+
+    def _reset(self, pool):
+        # un worker mort casse tout le pool : on en recrée un à la prochaine demande
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def hash(self, password):
+        self._count('hashed')
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, stored, password):
+        self._count('verified')
+        return self._run(check_password_hash, stored, password)
+
+    def needs_rehash(self, stored):
+        """Vrai si le hash stocké n'utilise pas l'algorithme / le coût configurés."""
+        return stored.split('$', 1)[0] != self.prefix
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+def get_hasher():
+    ext = current_app.extensions
+    if 'hasher' not in ext:
+        config = current_app.config
+        hasher = PasswordHasher(
+            config.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:1000000'),
+            workers=config.get('PASSWORD_HASH_WORKERS', 2),
+            queue_depth=config.get('PASSWORD_HASH_QUEUE_DEPTH', 32),
+            timeout=config.get('PASSWORD_HASH_TIMEOUT', 10),
+        )
+        if ext.setdefault('hasher', hasher) is hasher:
+            atexit.register(hasher.shutdown)
+    return ext['hasher']
+
+
+def hash_password(password):
+    return get_hasher().hash(password)
+
+
+def check_password(user, password):
+    """Vérifie le mot de passe ; en cas de succès, met à niveau un hash aux paramètres périmés.
+
+    La mise à niveau est seulement ajoutée à la session : l'appelant valide.
+    """
+    hasher = get_hasher()
+    if not hasher.verify(user.password, password):
+        return False
+    if hasher.needs_rehash(user.password):
+        try:
+            user.password = hasher.hash(password)
+            hasher._count('rehashed')
+        except HasherBusy:
+            pass  # ce sera pour la prochaine connexion
+    return True
@@ -0,0 +1,51 @@
+# hashtags.py
+#
+# Extraction et indexation des hashtags.
+#
+# TAG_RE est le seul tokenizer de hashtags du projet (indexation à la
+# publication, rendu HTML). À la publication, tous les tags d'un tweet
+# sont indexés en un nombre fixe de requêtes, quel que soit leur nombre :
+#   1. INSERT ... ON CONFLICT DO NOTHING des tags (executemany) ;
+#   2. un SELECT ... WHERE tag IN (...) pour récupérer tous les id ;
+#   3. un executemany sur tweet_hashtag.
+# Deux publications concurrentes du même nouveau tag ne se gênent plus :
+# la seconde ignore le conflit au lieu d'annuler tout le tweet.
+
+import re
+
+from sqlalchemy import select
+
+from . import db
+from .models import Hashtag, tweet_hashtag
+from .sql import insert_ignore
+
+TAG_RE = re.compile(r'#(\w+)')
+
+# longueur de la colonne Hashtag.tag
+MAX_TAG_LENGTH = 100
+
+
+def extract(text):
+    """Tags distincts de `text`, dans l'ordre d'apparition."""
+    return list(dict.fromkeys(t[:MAX_TAG_LENGTH] for t in TAG_RE.findall(text or '')))
+
+
+def resolve(tags):
+    """{tag: id}, en créant les tags manquants."""
+    if not tags:
+        return {}
+    db.session.execute(insert_ignore(Hashtag.__table__, 'tag'), [{'tag': t} for t in tags])
+    rows = db.session.execute(select(Hashtag.id, Hashtag.tag).where(Hashtag.tag.in_(tags)))
+    return {tag: id_ for id_, tag in rows}
+
+
+def index_tweet(tweet):
+    """Rattache le tweet (déjà flushé) à ses hashtags ; retourne la liste des tags."""
+    tags = extract(tweet.content)
+    ids = resolve(tags)
+    if ids:
+        db.session.execute(
+            insert_ignore(tweet_hashtag, 'tweet_id', 'hashtag_id'),
+            [{'tweet_id': tweet.id, 'hashtag_id': id_} for id_ in ids.values()],
+        )
+    return tags
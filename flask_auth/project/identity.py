@@ -0,0 +1,144 @@
+# identity.py
+#
+# Cache d'identité pour Flask-Login.
+#
+# load_user est appelé à chaque requête authentifiée, y compris les
+# /notifications/count interrogés en boucle. Au lieu d'un SELECT sur user à
+# chaque fois, on garde un instantané léger (id, email, nom, bio) dans un
+# LRU borné (USER_CACHE_SIZE) dont les entrées expirent après
+# USER_CACHE_TTL secondes.
+#
+# current_user devient alors un CachedUser : il répond aux lectures
+# courantes sans toucher la base (les compteurs de follow viennent de
+# follow_graph), et ne charge la ligne ORM (`.row`) que lorsqu'une vue doit
+# la modifier ou lit un attribut absent de l'instantané. Les vues qui
+# modifient l'utilisateur appellent invalidate() après le commit.
+#
+# Le cache est propre au processus : avec plusieurs workers, une
+# modification faite ailleurs est visible au plus tard après le TTL.
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from flask import current_app
+from flask_login import UserMixin
+
+from . import db
+from .models import User
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    id: int
+    email: str
+    name: str
+    bio: str
+
+    @classmethod
+    def of(cls, user):
+        return cls(user.id, user.email, user.name, user.bio)
+
+
+class CachedUser(UserMixin):
+    """Utilisateur courant construit depuis un instantané ; la ligne ORM est chargée à la demande."""
+
+    # lectures qui ne dépendent que de l'id (follow_graph, likes)
+    is_following = User.is_following
+    following_ids = User.following_ids
+    following_count = User.following_count
+    followers_count = User.followers_count
+    has_liked = User.has_liked
+
+    def __init__(self, snapshot):
+        object.__setattr__(self, '_snapshot', snapshot)
+        object.__setattr__(self, '_row', None)
+
+    id = property(lambda self: self._snapshot.id)
+    email = property(lambda self: self._snapshot.email)
+    name = property(lambda self: self._snapshot.name)
+    bio = property(lambda self: self._snapshot.bio)
+
+    @property
+    def row(self):
+        """Ligne User de la session courante (une requête au premier accès)."""
+        if self._row is None:
+            object.__setattr__(self, '_row', db.session.get(User, self.id))
+        return self._row
+
+    def __getattr__(self, name):
+        # attribut absent de l'instantané (relations, mot de passe...)
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.row, name)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"CachedUser is read-only, write to current_user.row.{name}")
+
+
+class IdentityCache:
+    def __init__(self, maxsize=10000, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()   # user_id -> (expire_at, UserSnapshot)
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0, 'invalidations': 0}
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(user_id)
+                    self.stats['hits'] += 1
+                    return entry[1]
+                del self._entries[user_id]
+                self.stats['expired'] += 1
+            self.stats['misses'] += 1
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        snapshot = UserSnapshot.of(user)
+        self.put(snapshot, now)
+        return snapshot
+
+    def put(self, snapshot, now=None):
+        if self.maxsize <= 0:
+            return
+        expire_at = (now or time.monotonic()) + self.ttl
+        with self._lock:
+            self._entries[snapshot.id] = (expire_at, snapshot)
+            self._entries.move_to_end(snapshot.id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def invalidate(self, *user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                if self._entries.pop(user_id, None) is not None:
+                    self.stats['invalidations'] += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def get_cache():
+    ext = current_app.extensions
+    if 'identity' not in ext:
+        ext.setdefault('identity', IdentityCache(
+            current_app.config.get('USER_CACHE_SIZE', 10000),
+            current_app.config.get('USER_CACHE_TTL', 60),
+        ))
+    return ext['identity']
+
+
+def load_user(user_id):
+    snapshot = get_cache().get(user_id)
+    return CachedUser(snapshot) if snapshot is not None else None
+
+
+def invalidate(*user_ids):
+    get_cache().invalidate(*user_ids)
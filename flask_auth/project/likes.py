@@ -0,0 +1,67 @@
+# likes.py
+#
+# Like / unlike en une seule transaction.
+# La contrainte unique (user_id, tweet_id) sur Like rend l'opération
+# idempotente : on tente un DELETE ... RETURNING ; s'il ne supprime rien, on
+# insère (ON CONFLICT DO NOTHING, pour le double-clic concurrent). Compteur,
+# score de popularité, versions des pages (validators.py) et notification
+# (like seulement) sont écrits dans la même transaction ; le regroupement de
+# la notification avec les autres likes du tweet est ensuite laissé au
+# pipeline différé (notify.stage).
+
+from datetime import datetime
+
+from sqlalchemy import delete, update
+
+from . import db
+from . import notify, ranking, validators
+from .models import Like, Tweet
+from .sql import insert_ignore
+
+
+def toggle_like(user, tweet):
+    """Inverse le like de `user` sur `tweet` ; retourne (liked, like_count)."""
+    removed = db.session.execute(
+        delete(Like)
+        .where(Like.user_id == user.id, Like.tweet_id == tweet.id)
+        .returning(Like.created_at)
+    ).first()
+
+    if removed:
+        liked, delta = False, -1
+        score = ranking.unliked_score(tweet, removed.created_at or tweet.timestamp)
+    else:
+        now = datetime.utcnow()
+        inserted = db.session.execute(
+            insert_ignore(Like, 'user_id', 'tweet_id')
+            .values(user_id=user.id, tweet_id=tweet.id, created_at=now)
+        )
+        if not inserted.rowcount:
+            # like concurrent déjà présent : rien à changer
+            db.session.commit()
+            return True, tweet.like_count
+        liked, delta = True, 1
+        score = ranking.liked_score(tweet, now)
+
+    count = db.session.execute(
+        update(Tweet)
+        .where(Tweet.id == tweet.id)
+        .values(like_count=Tweet.like_count + delta, rank_score=score)
+        .returning(Tweet.like_count)
+        .execution_options(synchronize_session=False)
+    ).scalar_one()
+    validators.touch_tweet(tweet)
+    notification = None
+    if liked:
+        notification = notify.stage(
+            recipient_id=tweet.user_id,
+            actor_id=user.id,
+            notif_type="like",
+            payload={"tweet_id": tweet.id},
+        )
+    db.session.commit()
+
+    ranking.get_index().update(tweet.user_id, tweet.id, score)
+    if notification:
+        notify.dispatch(notification)  # regroupement seulement : la ligne est déjà écrite
+    return liked, count
@@ -0,0 +1,108 @@
+# loaders.py
+#
+# Chargement groupé (façon DataLoader) des données affichées par les cartes.
+# Au lieu de laisser chaque _tweet_card.html déclencher ses propres requêtes
+# (auteur, commentaires, auteurs des commentaires, like du lecteur), on charge
+# tout pour la page entière en un nombre fixe de requêtes IN (...).
+# Les cartes déjà rendues (fragments.py) ne chargent que le like du lecteur.
+
+from collections import defaultdict
+
+from sqlalchemy import select
+
+from . import db, fragments
+from .follow_graph import get_graph
+from .models import User, Comment, Like
+
+
+class TweetCards:
+    """Données préchargées pour une liste de tweets, vue par `viewer_id`."""
+
+    def __init__(self, tweets, viewer_id=None):
+        self.viewer_id = viewer_id
+        self._authors = {}
+        self._comments = defaultdict(list)
+        self._liked = set()
+        self._fragments = {}
+        self._load(list(tweets))
+
+    def _load(self, tweets):
+        if not tweets:
+            return
+        tweet_ids = [t.id for t in tweets]
+
+        if self.viewer_id is not None:
+            self._liked = set(db.session.execute(
+                select(Like.tweet_id)
+                .where(Like.user_id == self.viewer_id)
+                .where(Like.tweet_id.in_(tweet_ids))
+            ).scalars())
+
+        cache = fragments.get_cache()
+        for t in tweets:
+            fragment = cache.get(t.id, fragments.version_of(t))
+            if fragment is not None:
+                self._fragments[t.id] = fragment
+        tweets = [t for t in tweets if t.id not in self._fragments]
+        if not tweets:
+            return
+
+        # cartes à rendre : commentaires et auteurs
+        comments = (
+            Comment.query
+            .filter(Comment.tweet_id.in_([t.id for t in tweets]))
+            .order_by(Comment.id)
+            .all()
+        )
+        for c in comments:
+            self._comments[c.tweet_id].append(c)
+
+        # auteurs des tweets et des commentaires en une seule requête
+        user_ids = {t.user_id for t in tweets} | {c.user_id for c in comments}
+        self._authors = {
+            u.id: u for u in User.query.filter(User.id.in_(user_ids)).all()
+        }
+
+    def author(self, obj):
+        """Auteur d'un tweet ou d'un commentaire."""
+        return self._authors.get(obj.user_id)
+
+    def comments(self, tweet):
+        return self._comments.get(tweet.id, [])
+
+    def liked(self, tweet):
+        return tweet.id in self._liked
+
+    def card(self, tweet, show_delete=False):
+        """HTML de la carte pour ce lecteur : fragment en cache + like / suppression."""
+        fragment = self._fragments.get(tweet.id)
+        if fragment is None:
+            fragment = fragments.render(tweet, self)
+            fragments.get_cache().set(tweet.id, fragments.version_of(tweet), fragment)
+            self._fragments[tweet.id] = fragment
+        return fragment.splice(show_delete=bool(show_delete), liked=self.liked(tweet))
+
+
+class UserCards:
+    """Compteurs de follow et état "suivi" pour une liste d'utilisateurs.
+
+    Tout est lu dans l'index du graphe de follow : aucune requête SQL.
+    """
+
+    def __init__(self, users, viewer_id=None):
+        self._graph = get_graph()
+        self._followed_by_viewer = self._graph.following(viewer_id) if viewer_id is not None else frozenset()
+
+    def followers_count(self, user):
+        return self._graph.followers_count(user.id)
+
+    def following_count(self, user):
+        return self._graph.following_count(user.id)
+
+    def is_followed(self, user):
+        return user.id in self._followed_by_viewer
+
+
+def viewer_id(user):
+    """Id du lecteur courant, ou None s'il est anonyme."""
+    return user.id if getattr(user, 'is_authenticated', False) else None
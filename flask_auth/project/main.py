@@ -1,13 +1,21 @@
 # main.py
 
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, abort
 from flask_login import login_required, current_user
-from .models import User, Tweet, followers, Like, Comment, Notification, create_notification
+from .models import User, Tweet, Comment, Notification, create_notification
 from . import db
 from .forms import TweetForm
-from sqlalchemy import func
-from flask import jsonify, request
+from flask import jsonify, current_app, Response
+from datetime import datetime
 from .models import Hashtag
+from .models import TimelineEntry
+from .pagination import paginate
+from .loaders import TweetCards, UserCards, viewer_id
+from . import validators
+
+# Les sous-systèmes (timeline, ranking, trending, search, stream...) sont
+# importés dans les vues qui s'en servent : importer le blueprint au
+# démarrage d'un worker ne les charge pas tous.
 
 
 main = Blueprint('main', __name__)
@@ -20,28 +28,44 @@ def index():
 @main.route('/home')
 @login_required
 def home():
+    from . import ranking, timeline, trending
     sort = request.args.get('sort', 'timeline')
-    following_ids = [u.id for u in current_user.followed] + [current_user.id]
+    following_ids = current_user.following_ids | {current_user.id}
+    top_trending = trending.top('1h')
 
+    # 304 avant toute requête de fil si rien n'a bougé dans l'ensemble suivi
+    validator = validators.for_authors('f', current_user.id, following_ids, extra=tuple(top_trending))
+    not_modified = validators.not_modified(validator)
+    if not_modified is not None:
+        return not_modified
 
     if sort == 'ranked':
-        ranked_q = (
-            db.session.query(Tweet, func.count(Like.id).label("lc"))
-            .outerjoin(Like, Like.tweet_id == Tweet.id)
-            .filter(Tweet.user_id.in_(following_ids))
-            .group_by(Tweet.id)
-            .order_by(func.count(Like.id).desc(), Tweet.timestamp.desc())
-        )
-        tweets = [t for (t, _lc) in ranked_q.all()]
+        # top-K sur les scores décroissants, fusionnés auteur par auteur, curseur (score, id)
+        page = ranking.ranked_page(following_ids)
     else:
-        tweets = (
-            Tweet.query
-            .filter(Tweet.user_id.in_(following_ids))
-            .order_by(Tweet.timestamp.desc())
-            .all()
+        # lecture de la timeline pré-calculée (fan-out-on-write)
+        page = paginate(
+            timeline.home_query(current_user.id),
+            TimelineEntry.timestamp, TimelineEntry.tweet_id,
+            key=lambda t: (t.timestamp, t.id),
         )
 
-    return render_template('home.html', name=current_user.name, tweets=tweets, sort=sort)
+    return validators.send(render_template(
+        'home.html', name=current_user.name, tweets=page.items,
+        cards=TweetCards(page.items, current_user.id),
+        next_url=page.next_url, sort=sort,
+        trending=top_trending, trending_window='1h',
+    ), validator)
+
+@main.route('/trending')
+@login_required
+def trending_tags():
+    from . import trending
+    window = request.args.get('window', '24h')
+    if window not in trending.WINDOWS:
+        abort(404)
+    return render_template('trending.html', trending=trending.top(window),
+                           trending_window=window, windows=list(trending.WINDOWS))
 
 @main.route('/home/timeline')
 @login_required
@@ -57,55 +81,67 @@ def home_ranked():
 @main.route('/profile')
 @login_required
 def profile():
-    tweets = current_user.tweets.order_by(Tweet.timestamp.desc()).all()
-    following_count = current_user.followed.count()
-    followers_count = current_user.followers.count()
-    return render_template(
+    validator = validators.for_authors('p', current_user.id, [current_user.id])
+    not_modified = validators.not_modified(validator)
+    if not_modified is not None:
+        return not_modified
+    page = paginate(Tweet.query.filter_by(user_id=current_user.id), Tweet.timestamp, Tweet.id)
+    following_count = current_user.following_count
+    followers_count = current_user.followers_count
+    return validators.send(render_template(
         'profile.html',
         user=current_user,
-        tweets=tweets,
+        tweets=page.items,
+        cards=TweetCards(page.items, current_user.id),
+        next_url=page.next_url,
         following_count=following_count,
         followers_count=followers_count,
         is_own_profile=True
-    )
+    ), validator)
 
 @main.route('/profile/<int:user_id>')
 @login_required
 def user_profile(user_id):
+    validator = validators.for_authors('p', current_user.id, [user_id])
+    not_modified = validators.not_modified(validator)
+    if not_modified is not None:
+        return not_modified
     user = User.query.get_or_404(user_id)
-    tweets = user.tweets.order_by(Tweet.timestamp.desc()).all()
-    following_count = user.followed.count()
-    followers_count = user.followers.count()
-    return render_template(
+    page = paginate(user.tweets, Tweet.timestamp, Tweet.id)
+    following_count = user.following_count
+    followers_count = user.followers_count
+    return validators.send(render_template(
         'profile.html',
         user=user,
-        tweets=tweets,
+        tweets=page.items,
+        cards=TweetCards(page.items, current_user.id),
+        next_url=page.next_url,
         following_count=following_count,
         followers_count=followers_count,
         is_own_profile=(user.id == current_user.id)
-    )
+    ), validator)
 
 # -------------------- TWEETS --------------------
 @main.route('/tweet', methods=['GET', 'POST'])
 @login_required
 def tweet():
+    from . import hashtags, ranking, render, timeline, trending
     form = TweetForm()
     if form.validate_on_submit():
-        import re
         try:
-            new_tweet = Tweet(content=form.content.data, user=current_user)
+            new_tweet = Tweet(content=form.content.data, user=current_user.row)
+            render.apply(new_tweet)
             db.session.add(new_tweet)
+            db.session.flush()
 
-             # Extraction des hashtags
-            tags = set(re.findall(r'#(\w+)', new_tweet.content))
-            for tag in tags:
-                hashtag = Hashtag.query.filter_by(tag=tag).first()
-                if not hashtag:
-                    hashtag = Hashtag(tag=tag)
-                    db.session.add(hashtag)
-                # Ajouter la relation many-to-many
-                new_tweet.hashtags.append(hashtag)
+            # Indexation des hashtags (nombre de requêtes fixe, sûr en concurrence)
+            tags = hashtags.index_tweet(new_tweet)
+            validators.touch_tweet(new_tweet)
+            timeline.fan_out(new_tweet)
+            ranking.on_publish(new_tweet)
             db.session.commit()
+            ranking.get_index().update(new_tweet.user_id, new_tweet.id, new_tweet.rank_score)
+            trending.record(new_tweet, tags)
             return redirect(url_for('main.profile'))
         except Exception:
             db.session.rollback()
@@ -119,13 +155,18 @@ def tweet():
 @main.route('/delete_tweet/<int:tweet_id>', methods=['POST'])
 @login_required
 def delete_tweet(tweet_id):
+    from . import fragments, ranking, timeline
     tweet = Tweet.query.get_or_404(tweet_id)
     if tweet.user_id != current_user.id:
         flash("You cannot delete this tweet.", category="error")
         return redirect(url_for('main.profile'))
     try:
+        timeline.remove_tweet(tweet.id)
+        validators.touch_tweet(tweet)
         db.session.delete(tweet)
         db.session.commit()
+        ranking.get_index().discard(tweet.user_id, tweet.id)
+        fragments.get_cache().discard(tweet.id)
     except Exception:
         db.session.rollback()
         flash("An error occurred during deletion.", category="error")
@@ -135,12 +176,15 @@ def delete_tweet(tweet_id):
 @main.route('/profile/edit_bio', methods=['POST'])
 @login_required
 def edit_bio():
+    from . import identity
     new_bio = request.form.get('bio', '').strip()
     if len(new_bio) > 300:
         flash("Bio is too long (max 300 characters)", category='error')
     else:
-        current_user.bio = new_bio
+        current_user.row.bio = new_bio
+        validators.touch_authors(current_user.id)
         db.session.commit()
+        identity.invalidate(current_user.id)
         flash("Your bio has been updated!", category="success")
     return redirect(url_for('main.profile'))
 
@@ -148,25 +192,36 @@ def edit_bio():
 @main.route('/follow/<int:user_id>', methods=['POST'])
 @login_required
 def follow(user_id):
+    from . import identity, timeline
     user = User.query.get_or_404(user_id)
     if user == current_user:
         flash("You cannot follow yourself.", category="error")
         return redirect(url_for('main.user_profile', user_id=user.id))
-    current_user.follow(user)
+    # décidé en base (INSERT OR IGNORE) : l'index de follow d'un worker peut être en retard
+    followed = current_user.row.follow(user)
+    if followed:
+        timeline.backfill(current_user.id, user.id)
+        validators.touch_authors(current_user.id, user.id)
     db.session.commit()
-    create_notification(recipient_id=user.id, actor_id=current_user.id, notif_type="follow")
-    flash(f"You are now following {user.name}!", category="success")
+    identity.invalidate(current_user.id, user.id)
+    if followed:
+        create_notification(recipient_id=user.id, actor_id=current_user.id, notif_type="follow")
+        flash(f"You are now following {user.name}!", category="success")
     return redirect(url_for('main.user_profile', user_id=user.id))
 
 @main.route('/unfollow/<int:user_id>', methods=['POST'])
 @login_required
 def unfollow(user_id):
+    from . import identity, timeline
     user = User.query.get_or_404(user_id)
     if user == current_user:
         flash("You cannot unfollow yourself.", category="error")
         return redirect(url_for('main.user_profile', user_id=user.id))
-    current_user.unfollow(user)
+    if current_user.row.unfollow(user):
+        timeline.prune(current_user.id, user.id)
+        validators.touch_authors(current_user.id, user.id)
     db.session.commit()
+    identity.invalidate(current_user.id, user.id)
     flash(f"You unfollowed {user.name}.", category="success")
     return redirect(url_for('main.user_profile', user_id=user.id))
 
@@ -175,9 +230,12 @@ def unfollow(user_id):
 @main.route('/search', methods=['GET'])
 @login_required
 def search():
+    from .search import search_users, search_tweets
     query = request.args.get('q', '').strip()
+    kind = request.args.get('type', 'users')
     users = []
     tweets = []
+    next_url = None
 
     if query:
         if query.startswith('#'):
@@ -185,49 +243,59 @@ def search():
             tag_text = query[1:]  # retirer le #
             hashtag = Hashtag.query.filter_by(tag=tag_text).first()
             if hashtag:
-                tweets = hashtag.tweets.order_by(Tweet.timestamp.desc()).all()
-            return render_template('hashtag.html', tag=tag_text, tweets=tweets)
+                page = paginate(hashtag.tweets, Tweet.timestamp, Tweet.id)
+                tweets, next_url = page.items, page.next_url
+            return render_template('hashtag.html', tag=tag_text, tweets=tweets,
+                                   cards=TweetCards(tweets, current_user.id), next_url=next_url)
+        elif kind == 'tweets':
+            # Recherche plein texte dans les tweets et leurs commentaires
+            page = search_tweets(query)
+            tweets, next_url = page.items, page.next_url
         else:
-            # Recherche par utilisateur
-            users = User.query.filter(User.name.ilike(f"%{query}%")).all()
+            # Recherche par utilisateur (nom, bio)
+            page = search_users(query)
+            users, next_url = page.items, page.next_url
     
-    return render_template('search_results.html', query=query, users=users, tweets=tweets)
+    return render_template('search_results.html', query=query, kind=kind, users=users, tweets=tweets,
+                           user_cards=UserCards(users, current_user.id),
+                           cards=TweetCards(tweets, current_user.id), next_url=next_url)
 
 
 # -------------------- LIKE --------------------
 @main.route('/like/<int:tweet_id>', methods=['POST'])
 @login_required
 def like_tweet(tweet_id):
+    from .likes import toggle_like
     tweet = Tweet.query.get_or_404(tweet_id)
-    if current_user.has_liked(tweet):
-        like = Like.query.filter_by(user_id=current_user.id, tweet_id=tweet.id).first()
-        if like:
-            db.session.delete(like)
-    else:
-        new_like = Like(user_id=current_user.id, tweet_id=tweet.id)
-        db.session.add(new_like)
-    db.session.commit()
-    if not current_user.has_liked(tweet):  # on some logic frameworks this may be unnecessary; safe to always create here on add
-        pass  # placeholder - kept for readability
-
-    create_notification(
-        recipient_id=tweet.user_id,
-        actor_id=current_user.id,
-        notif_type="like",
-        payload={"tweet_id": tweet.id}
-    )
+    toggle_like(current_user, tweet)
     return redirect(request.referrer or url_for('main.profile'))
 
+@main.route('/like/<int:tweet_id>.json', methods=['POST'])
+@login_required
+def like_tweet_json(tweet_id):
+    from .likes import toggle_like
+    # variante JSON : la carte se met à jour sans rechargement de page
+    tweet = Tweet.query.get_or_404(tweet_id)
+    liked, count = toggle_like(current_user, tweet)
+    return jsonify({"tweet_id": tweet.id, "liked": liked, "like_count": count})
+
 # -------------------- COMMENT --------------------
 @main.route('/comment/<int:tweet_id>', methods=['POST'])
 @login_required
 def comment_tweet(tweet_id):
+    from . import counters, ranking, render
     tweet = Tweet.query.get_or_404(tweet_id)
     content = request.form.get('comment_content', '').strip()
     if content:
-        new_comment = Comment(user_id=current_user.id, tweet_id=tweet.id, content=content)
+        new_comment = Comment(user_id=current_user.id, tweet_id=tweet.id, content=content,
+                              created_at=datetime.utcnow())
+        render.apply(new_comment)
         db.session.add(new_comment)
+        counters.add_comments(tweet.id, 1)
+        validators.touch_tweet(tweet)
+        ranking.on_comment(tweet, new_comment.created_at)
         db.session.commit()
+        ranking.get_index().update(tweet.user_id, tweet.id, tweet.rank_score)
         create_notification(
             recipient_id=tweet.user_id,
             actor_id=current_user.id,
@@ -244,9 +312,11 @@ def comment_tweet(tweet_id):
 @main.route("/notifications")
 @login_required
 def notifications():
-    notifs = Notification.query.filter_by(recipient_id=current_user.id) \
-        .order_by(Notification.created_at.desc()) \
-        .all()
+    page = paginate(
+        Notification.query.filter_by(recipient_id=current_user.id),
+        Notification.created_at, Notification.id,
+    )
+    notifs = page.items
 
     # passe à Jinja une liste de dicts simples
     formatted = [{
@@ -255,26 +325,58 @@ def notifications():
         "actor": n.actor.name if n.actor else "",
         "payload": n.get_payload() if hasattr(n, 'get_payload') else {},
         "is_read": n.is_read,
+        "others": (n.actor_count or 1) - 1,  # notifications regroupées
         "created_at": n.created_at.strftime("%Y-%m-%d %H:%M")
     } for n in notifs]
 
 
-    return render_template("notifications.html", notifications=formatted)
+    return render_template("notifications.html", notifications=formatted, next_url=page.next_url)
 
 
 @main.route('/notifications/count')
 @login_required
 def notifications_count():
-    # retourne le nombre de notifications non lues pour l'utilisateur courant
-    unread = Notification.query.filter_by(recipient_id=current_user.id, is_read=False).count()
-    return jsonify({"unread": unread})
+    from . import counters
+    # retourne le nombre de notifications non lues pour l'utilisateur courant,
+    # lu dans le compteur ; 304 si la version n'a pas bougé depuis le dernier appel
+    unread, version = counters.unread(current_user.id)
+    etag = f"n{current_user.id}-{version}"
+    if etag in request.if_none_match:
+        resp = current_app.response_class(status=304)
+    else:
+        resp = jsonify({"unread": unread})
+    resp.set_etag(etag)
+    resp.headers['Cache-Control'] = 'private, no-cache'
+    return resp
+
+@main.route('/notifications/stream')
+@login_required
+def notifications_stream():
+    from . import stream
+    # flux SSE du nombre de non-lues (remplace le polling de /notifications/count)
+    hub = stream.get_hub()
+    q = hub.subscribe(current_user.id)
+    initial = {"unread": stream.unread_count(current_user.id)}
+    body = stream.events(
+        hub, current_user.id, q, initial,
+        heartbeat=current_app.config['NOTIFICATIONS_STREAM_HEARTBEAT'],
+        max_age=current_app.config['NOTIFICATIONS_STREAM_MAX_AGE'],
+    )
+    return Response(body, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',  # pas de mise en tampon côté proxy (nginx)
+    })
 
 @main.route('/notifications/mark_all_read', methods=['POST'])
 @login_required
 def mark_all_notifications_read():
+    from . import counters, stream
     # marque toutes les notifications non lues de l'utilisateur comme lues
-    Notification.query.filter_by(recipient_id=current_user.id, is_read=False).update({'is_read': True})
+    marked = Notification.query.filter_by(recipient_id=current_user.id, is_read=False).update({'is_read': True})
+    if marked:
+        counters.add_unread(current_user.id, -marked)
     db.session.commit()
+    stream.publish_unread([current_user.id])
     return jsonify({"status":"ok"})
 
 
@@ -282,11 +384,15 @@ def mark_all_notifications_read():
 @main.route('/notifications/<int:notif_id>/read', methods=['POST'])
 @login_required
 def read_notification(notif_id):
+    from . import counters, stream
     n = Notification.query.get_or_404(notif_id)
     if n.recipient_id != current_user.id:
         return jsonify({"error": "forbidden"}), 403
-    n.is_read = True
+    # UPDATE conditionnel : deux lectures concurrentes ne décomptent qu'une fois
+    if Notification.query.filter_by(id=n.id, is_read=False).update({'is_read': True}):
+        counters.add_unread(current_user.id, -1)
     db.session.commit()
+    stream.publish_unread([current_user.id])
     return jsonify({"status": "ok"})
 
 
@@ -296,6 +402,14 @@ def read_notification(notif_id):
 
 @main.route('/hashtag/<string:tag>')
 def hashtag(tag):
+    validator = validators.for_hashtag(viewer_id(current_user), tag)
+    not_modified = validators.not_modified(validator)
+    if not_modified is not None:
+        return not_modified
     hashtag = Hashtag.query.filter_by(tag=tag).first()
-    tweets = hashtag.tweets.order_by(Tweet.timestamp.desc()).all() if hashtag else []
-    return render_template('hashtag.html', tag=tag, tweets=tweets)
+    if not hashtag:
+        return validators.send(render_template('hashtag.html', tag=tag, tweets=[], next_url=None), validator)
+    page = paginate(hashtag.tweets, Tweet.timestamp, Tweet.id)
+    return validators.send(render_template('hashtag.html', tag=tag, tweets=page.items,
+                                           cards=TweetCards(page.items, viewer_id(current_user)),
+                                           next_url=page.next_url), validator)
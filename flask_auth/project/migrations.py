@@ -0,0 +1,318 @@
+# migrations.py
+#
+# Migrations de schéma versionnées, sans dépendance externe.
+#
+# - base neuve : db.create_all() crée directement le schéma courant, qu'on
+#   marque à la dernière version ;
+# - base existante (ex. un vieux db.sqlite) : create_all() ajoute seulement
+#   les tables manquantes, puis chaque migration dont la version est
+#   supérieure à celle enregistrée est appliquée dans sa propre transaction.
+#
+# La version courante est stockée dans la table `schema_version`. Une
+# migration n'écrit qu'en SQL sur la connexion reçue : passer par les modèles
+# la lierait au schéma courant, qu'une migration ultérieure peut modifier.
+#
+# Le schéma est mis à jour au déploiement par `flask db-upgrade` (ou
+# create_tables.py) ; create_app() ne touche pas à la base. Avec
+# DB_AUTO_UPGRADE = True (développement), ensure_schema() est appelé au
+# démarrage et se contente d'une lecture de cette version quand la base est à
+# jour, une seule fois par base et par processus.
+
+import logging
+
+import click
+from flask.cli import with_appcontext
+from flask import current_app
+from sqlalchemy import DateTime, Float, Integer, column, inspect, text
+
+from . import db, ranking, search
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS = []
+
+# bases (URL) déjà vérifiées à jour dans ce processus
+_verified = set()
+
+
+def migration(version, description):
+    def register(fn):
+        fn.version = version
+        fn.description = description
+        MIGRATIONS.append(fn)
+        MIGRATIONS.sort(key=lambda m: m.version)
+        return fn
+    return register
+
+
+def head():
+    return MIGRATIONS[-1].version if MIGRATIONS else 0
+
+
+# ====================
+# Helpers
+# ====================
+def _columns(conn, table):
+    return {c['name'] for c in inspect(conn).get_columns(table)}
+
+
+def _add_column(conn, table, column, ddl):
+    if column not in _columns(conn, table):
+        conn.execute(text(f'ALTER TABLE "{table}" ADD COLUMN {column} {ddl}'))
+
+
+def _rebuild_with_pk(conn, table, left, left_ref, right, right_ref):
+    """Recrée une table d'association avec une clé primaire (left, right), sans doublons."""
+    if inspect(conn).get_pk_constraint(table).get('constrained_columns'):
+        return
+    conn.execute(text(
+        f'CREATE TABLE "{table}_new" ('
+        f'{left} INTEGER NOT NULL REFERENCES {left_ref}, '
+        f'{right} INTEGER NOT NULL REFERENCES {right_ref}, '
+        f'PRIMARY KEY ({left}, {right}))'
+    ))
+    conn.execute(text(
+        f'INSERT INTO "{table}_new" ({left}, {right}) '
+        f'SELECT DISTINCT {left}, {right} FROM "{table}" '
+        f'WHERE {left} IS NOT NULL AND {right} IS NOT NULL'
+    ))
+    conn.execute(text(f'DROP TABLE "{table}"'))
+    conn.execute(text(f'ALTER TABLE "{table}_new" RENAME TO "{table}"'))
+
+
+def _create_index(conn, name, table, columns, unique=False):
+    kind = 'UNIQUE INDEX' if unique else 'INDEX'
+    conn.execute(text(f'CREATE {kind} IF NOT EXISTS {name} ON "{table}" ({columns})'))
+
+
+# ====================
+# Migrations
+# ====================
+@migration(1, "compteurs, score de popularité et dates sur tweet/like/comment")
+def _v1(conn):
+    _add_column(conn, 'tweet', 'like_count', 'INTEGER NOT NULL DEFAULT 0')
+    _add_column(conn, 'tweet', 'comment_count', 'INTEGER NOT NULL DEFAULT 0')
+    _add_column(conn, 'tweet', 'rank_score', 'FLOAT')
+    _add_column(conn, 'like', 'created_at', 'DATETIME')
+    _add_column(conn, 'comment', 'created_at', 'DATETIME')
+    conn.execute(text(
+        'UPDATE tweet SET '
+        'like_count = (SELECT COUNT(*) FROM "like" WHERE "like".tweet_id = tweet.id), '
+        'comment_count = (SELECT COUNT(*) FROM comment WHERE comment.tweet_id = tweet.id)'
+    ))
+
+
+@migration(2, "clés primaires des tables d'association et index de performance")
+def _v2(conn):
+    _rebuild_with_pk(conn, 'followers', 'follower_id', '"user"(id)', 'followed_id', '"user"(id)')
+    _rebuild_with_pk(conn, 'tweet_hashtag', 'tweet_id', 'tweet(id)', 'hashtag_id', 'hashtag(id)')
+    _create_index(conn, 'ix_followers_followed', 'followers', 'followed_id, follower_id')
+    _create_index(conn, 'ix_tweet_hashtag_hashtag', 'tweet_hashtag', 'hashtag_id, tweet_id')
+    _create_index(conn, 'ix_tweet_user_ts', 'tweet', 'user_id, timestamp')
+    _create_index(conn, 'ix_tweet_user_rank', 'tweet', 'user_id, rank_score')
+    _create_index(conn, 'ix_timeline_tweet', 'timeline_entry', 'tweet_id')
+    _create_index(conn, 'ix_like_user_tweet', 'like', 'user_id, tweet_id')
+    _create_index(conn, 'ix_like_tweet', 'like', 'tweet_id')
+    _create_index(conn, 'ix_comment_tweet', 'comment', 'tweet_id')
+    _create_index(conn, 'ix_notif_recipient_read_created', 'notifications', 'recipient_id, is_read, created_at')
+    _create_index(conn, 'ix_notif_recipient_created', 'notifications', 'recipient_id, created_at')
+
+
+@migration(3, "un seul like par (utilisateur, tweet)")
+def _v3(conn):
+    conn.execute(text(
+        'DELETE FROM "like" WHERE id NOT IN '
+        '(SELECT MIN(id) FROM "like" GROUP BY user_id, tweet_id)'
+    ))
+    conn.execute(text('DROP INDEX IF EXISTS ix_like_user_tweet'))
+    _create_index(conn, 'uq_like_user_tweet', 'like', 'user_id, tweet_id', unique=True)
+    conn.execute(text(
+        'UPDATE tweet SET like_count = (SELECT COUNT(*) FROM "like" WHERE "like".tweet_id = tweet.id)'
+    ))
+
+
+@migration(4, "regroupement des notifications (tweet_id, actor_count)")
+def _v4(conn):
+    _add_column(conn, 'notifications', 'tweet_id', 'INTEGER')
+    _add_column(conn, 'notifications', 'actor_count', 'INTEGER NOT NULL DEFAULT 1')
+    conn.execute(text(
+        "UPDATE notifications SET tweet_id = json_extract(payload, '$.tweet_id') "
+        "WHERE payload IS NOT NULL AND json_valid(payload)"
+    ))
+
+
+@migration(5, "compteur de notifications non lues par utilisateur")
+def _v5(conn):
+    _add_column(conn, 'user', 'unread_notifications', 'INTEGER NOT NULL DEFAULT 0')
+    _add_column(conn, 'user', 'notifications_version', 'INTEGER NOT NULL DEFAULT 0')
+    conn.execute(text(
+        'UPDATE "user" SET unread_notifications = (SELECT COUNT(*) FROM notifications '
+        'WHERE notifications.recipient_id = "user".id AND notifications.is_read = 0)'
+    ))
+
+
+@migration(6, "index plein texte FTS5 (utilisateurs, tweets, commentaires)")
+def _v6(conn):
+    if conn.dialect.name != 'sqlite':
+        return
+    search.install(conn)
+    search.rebuild(conn)
+
+
+@migration(7, "HTML des tweets et commentaires rendu à l'écriture")
+def _v7(conn):
+    # les lignes existantes sont rendues à la volée jusqu'à `flask rerender-content`
+    for table in ('tweet', 'comment'):
+        _add_column(conn, table, 'content_html', 'TEXT')
+        _add_column(conn, table, 'html_version', 'INTEGER')
+
+
+@migration(8, "index sur la date des tweets (tendances)")
+def _v8(conn):
+    _create_index(conn, 'ix_tweet_ts', 'tweet', 'timestamp')
+
+
+@migration(9, "versions de contenu pour les GET conditionnels")
+def _v9(conn):
+    _add_column(conn, 'user', 'content_version', 'INTEGER NOT NULL DEFAULT 0')
+    _add_column(conn, 'user', 'content_updated_at', 'DATETIME')
+    _add_column(conn, 'hashtag', 'version', 'INTEGER NOT NULL DEFAULT 0')
+    _add_column(conn, 'hashtag', 'updated_at', 'DATETIME')
+    conn.execute(text(
+        'UPDATE "user" SET content_updated_at = '
+        '(SELECT MAX(timestamp) FROM tweet WHERE tweet.user_id = "user".id)'
+    ))
+    conn.execute(text(
+        'UPDATE hashtag SET updated_at = (SELECT MAX(tweet.timestamp) FROM tweet_hashtag'
+        ' JOIN tweet ON tweet.id = tweet_hashtag.tweet_id WHERE tweet_hashtag.hashtag_id = hashtag.id)'
+    ))
+
+
+@migration(10, "timelines et scores de popularité des tweets existants")
+def _v10(conn):
+    # v1 ajoute rank_score et create_all() la table timeline_entry, sans les remplir
+    _backfill_timelines(conn, current_app.config.get('TIMELINE_MAX_LENGTH', 800))
+    _backfill_rank_scores(conn)
+
+
+def _backfill_timelines(conn, per_user):
+    """Chaque utilisateur reçoit ses tweets et ceux des comptes suivis, les `per_user` plus récents."""
+    conn.execute(text('DELETE FROM timeline_entry'))
+    conn.execute(text(
+        'INSERT INTO timeline_entry (user_id, tweet_id, author_id, timestamp) '
+        'SELECT owner, id, user_id, timestamp FROM ('
+        '  SELECT src.owner, tweet.id, tweet.user_id, tweet.timestamp, ROW_NUMBER() OVER ('
+        '    PARTITION BY src.owner ORDER BY tweet.timestamp DESC, tweet.id DESC) AS position'
+        '  FROM (SELECT id AS owner, id AS author FROM "user"'
+        '        UNION SELECT follower_id, followed_id FROM followers) AS src'
+        '  JOIN tweet ON tweet.user_id = src.author'
+        '  WHERE tweet.timestamp IS NOT NULL'
+        ') AS ranked WHERE position <= :per_user'
+    ), {'per_user': per_user})
+
+
+def _backfill_rank_scores(conn, chunk=1000):
+    """Score de chaque tweet depuis sa publication, ses likes et ses commentaires (voir ranking.py)."""
+    events = conn.execute(text(
+        'SELECT id AS tweet_id, :publish AS weight, timestamp AS at FROM tweet '
+        'UNION ALL SELECT "like".tweet_id, :like, coalesce("like".created_at, tweet.timestamp) '
+        'FROM "like" JOIN tweet ON tweet.id = "like".tweet_id '
+        'UNION ALL SELECT comment.tweet_id, :comment, coalesce(comment.created_at, tweet.timestamp) '
+        'FROM comment JOIN tweet ON tweet.id = comment.tweet_id '
+        'ORDER BY tweet_id'
+    ).columns(column('tweet_id', Integer), column('weight', Float), column('at', DateTime)), {
+        'publish': ranking.PUBLISH_WEIGHT,
+        'like': ranking.LIKE_WEIGHT,
+        'comment': ranking.COMMENT_WEIGHT,
+    })
+
+    update = text('UPDATE tweet SET rank_score = :score WHERE id = :id')
+    scores, current, score = [], None, None
+    for tweet_id, weight, at in events:
+        if tweet_id != current:
+            if score is not None:
+                scores.append({'id': current, 'score': score})
+            current, score = tweet_id, None
+        if at is not None:
+            score = ranking.log_add(score, ranking.contribution(weight, at))
+        if len(scores) >= chunk:
+            conn.execute(update, scores)
+            scores = []
+    if score is not None:
+        scores.append({'id': current, 'score': score})
+    if scores:
+        conn.execute(update, scores)
+
+
+# ====================
+# Exécution
+# ====================
+def _get_version(conn):
+    conn.execute(text('CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)'))
+    version = conn.execute(text('SELECT MAX(version) FROM schema_version')).scalar()
+    return version or 0
+
+
+def _set_version(conn, version):
+    conn.execute(text('DELETE FROM schema_version'))
+    conn.execute(text('INSERT INTO schema_version (version) VALUES (:v)'), {'v': version})
+
+
+def current_version():
+    with db.engine.begin() as conn:
+        return _get_version(conn)
+
+
+def upgrade():
+    """Amène la base à la dernière version ; retourne la liste des migrations appliquées."""
+    engine = db.engine
+    with engine.connect() as conn:
+        fresh = not inspect(conn).has_table('user')
+
+    db.create_all()
+
+    with engine.begin() as conn:
+        current = _get_version(conn)
+        if fresh:
+            _set_version(conn, head())
+            logger.info("Created schema at v%d", head())
+            return []
+
+    applied = []
+    for m in MIGRATIONS:
+        if m.version <= current:
+            continue
+        with engine.begin() as conn:
+            m(conn)
+            _set_version(conn, m.version)
+        logger.info("Applied migration v%d: %s", m.version, m.description)
+        applied.append(m)
+    return applied
+
+
+def ensure_schema():
+    """upgrade() seulement si la version enregistrée n'est pas la dernière."""
+    engine = db.engine
+    url = engine.url
+    # une base en mémoire est propre à chaque connexion : pas de cache
+    cacheable = url.database not in (None, '', ':memory:')
+    if cacheable and str(url) in _verified:
+        return []
+    with engine.connect() as conn:
+        version = None
+        if inspect(conn).has_table('schema_version'):
+            version = conn.execute(text('SELECT MAX(version) FROM schema_version')).scalar()
+    applied = [] if version == head() else upgrade()
+    if cacheable:
+        _verified.add(str(url))
+    return applied
+
+
+@click.command('db-upgrade')
+@with_appcontext
+def upgrade_command():
+    """Applique les migrations de schéma en attente."""
+    applied = upgrade()
+    for m in applied:
+        click.echo(f"  v{m.version} : {m.description}")
+    click.echo(f"Schema at version {current_version()}.")
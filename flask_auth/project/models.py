@@ -2,30 +2,55 @@
 
 from flask_login import UserMixin
 from . import db
+from . import follow_graph
+from .sql import insert_ignore
 from datetime import datetime
 import json
 
 # Table d'association pour le système de follow
+# (clé primaire composite : pas de doublon possible ; index inverse pour "mes followers")
 followers = db.Table(
     'followers',
-    db.Column('follower_id', db.Integer, db.ForeignKey('user.id')),
-    db.Column('followed_id', db.Integer, db.ForeignKey('user.id'))
+    db.Column('follower_id', db.Integer, db.ForeignKey('user.id'), primary_key=True),
+    db.Column('followed_id', db.Integer, db.ForeignKey('user.id'), primary_key=True),
+    db.Index('ix_followers_followed', 'followed_id', 'follower_id'),
 )
 
 # Table d'association Tweet <-> Hashtag
 tweet_hashtag = db.Table(
     'tweet_hashtag',
-    db.Column('tweet_id', db.Integer, db.ForeignKey('tweet.id')),
-    db.Column('hashtag_id', db.Integer, db.ForeignKey('hashtag.id'))
+    db.Column('tweet_id', db.Integer, db.ForeignKey('tweet.id'), primary_key=True),
+    db.Column('hashtag_id', db.Integer, db.ForeignKey('hashtag.id'), primary_key=True),
+    db.Index('ix_tweet_hashtag_hashtag', 'hashtag_id', 'tweet_id'),
 )
 
 
+def _unfollow(follower_id, followed_id):
+    deleted = db.session.execute(
+        followers.delete()
+        .where(followers.c.follower_id == follower_id)
+        .where(followers.c.followed_id == followed_id)
+    ).rowcount
+    follow_graph.record('remove', follower_id, followed_id)
+    return bool(deleted)
+
+
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(100), unique=True)
     password = db.Column(db.String(100))
     name = db.Column(db.String(1000))
     bio = db.Column(db.String(300))
+
+    # Compteur de notifications non lues (maintenu par counters.add_unread)
+    # et sa version, qui sert d'ETag à /notifications/count
+    unread_notifications = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    notifications_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    # Version du contenu affiché sur le profil (tweets, likes, commentaires,
+    # follows), incrémentée à chaque écriture : sert d'ETag (validators.py)
+    content_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    content_updated_at = db.Column(db.DateTime)
     
     # Tweets de l'utilisateur
     tweets = db.relationship('Tweet', back_populates='user', lazy='dynamic')
@@ -47,20 +72,44 @@ class User(UserMixin, db.Model):
     # ====================
     # Méthodes de follow/unfollow
     # ====================
+    # Les écritures décident d'après la base, jamais d'après l'index en mémoire
+    # (follow_graph.py), qui peut dater de FOLLOW_GRAPH_TTL secondes dans un
+    # autre worker : INSERT ... ON CONFLICT DO NOTHING / DELETE, dont le
+    # rowcount dit si quelque chose a changé. L'index est mis à jour au commit.
+    # Retournent True si le lien a été créé / supprimé.
     def follow(self, user):
-        if not self.is_following(user):
-            self.followed.append(user)
+        inserted = db.session.execute(
+            insert_ignore(followers, 'follower_id', 'followed_id')
+            .values(follower_id=self.id, followed_id=user.id)
+        ).rowcount
+        follow_graph.record('add', self.id, user.id)
+        return bool(inserted)
 
     def unfollow(self, user):
-        if self.is_following(user):
-            self.followed.remove(user)
+        return _unfollow(self.id, user.id)
 
     def is_following(self, user):
-        return self.followed.filter(followers.c.followed_id == user.id).count() > 0
+        return follow_graph.get_graph().is_following(self.id, user.id)
 
     def delete_follower(self, user):
-        if user in self.followers:
-            self.followers.remove(user)
+        return _unfollow(user.id, self.id)
+
+    @property
+    def following_ids(self):
+        return follow_graph.get_graph().following(self.id)
+
+    @property
+    def following_count(self):
+        return follow_graph.get_graph().following_count(self.id)
+
+    @property
+    def followers_count(self):
+        return follow_graph.get_graph().followers_count(self.id)
+
+    @property
+    def row(self):
+        # même interface que identity.CachedUser (current_user.row)
+        return self
 
     # ====================
     # Likes
@@ -78,6 +127,17 @@ class Tweet(db.Model):
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
 
+    # Compteurs dénormalisés (maintenus par counters.py)
+    like_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    comment_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    # Score de popularité décroissant avec le temps, en espace log (maintenu par ranking.py)
+    rank_score = db.Column(db.Float, nullable=True)
+
+    # HTML du contenu, rendu une fois à l'écriture (render.py)
+    content_html = db.Column(db.Text, nullable=True)
+    html_version = db.Column(db.Integer, nullable=True)
+
     user = db.relationship('User', back_populates='tweets')
     likes = db.relationship('Like', backref='tweet', lazy='dynamic')
     comments = db.relationship('Comment', backref='tweet', lazy='dynamic')
@@ -90,10 +150,40 @@ class Tweet(db.Model):
         lazy='dynamic'
     )
 
+    @property
+    def html(self):
+        from .render import html_of
+        return html_of(self)
+
+    __table_args__ = (
+        db.Index('ix_tweet_user_ts', 'user_id', 'timestamp'),
+        db.Index('ix_tweet_user_rank', 'user_id', 'rank_score'),
+        db.Index('ix_tweet_ts', 'timestamp'),  # tweets récents (reconstruction des tendances)
+    )
+
     @property
     def likes_count(self):
-        return self.likes.count()
+        return self.like_count
+
+
+# ====================
+# Timeline (fan-out-on-write)
+# ====================
+class TimelineEntry(db.Model):
+    """Une ligne par (lecteur, tweet) : la home d'un utilisateur est pré-calculée à l'écriture."""
+    __tablename__ = "timeline_entry"
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)  # propriétaire de la timeline
+    tweet_id = db.Column(db.Integer, db.ForeignKey('tweet.id'), nullable=False)
+    author_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    timestamp = db.Column(db.DateTime, nullable=False)  # copie de Tweet.timestamp pour trier sans jointure
 
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'tweet_id', name='uq_timeline_user_tweet'),
+        db.Index('ix_timeline_user_ts', 'user_id', 'timestamp'),
+        db.Index('ix_timeline_tweet', 'tweet_id'),
+    )
 
 
 # ====================
@@ -103,6 +193,12 @@ class Like(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     tweet_id = db.Column(db.Integer, db.ForeignKey('tweet.id'), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('uq_like_user_tweet', 'user_id', 'tweet_id', unique=True),
+        db.Index('ix_like_tweet', 'tweet_id'),
+    )
 
 
 # ====================
@@ -113,16 +209,25 @@ class Comment(db.Model):
     content = db.Column(db.Text, nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     tweet_id = db.Column(db.Integer, db.ForeignKey('tweet.id'), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # HTML du contenu, rendu une fois à l'écriture (render.py)
+    content_html = db.Column(db.Text, nullable=True)
+    html_version = db.Column(db.Integer, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_comment_tweet', 'tweet_id'),
+    )
+
+    @property
+    def html(self):
+        from .render import html_of
+        return html_of(self)
 
     @property
     def content_with_hashtags(self):
-        import re
-        from flask import url_for
-        # Remplace #hashtag par lien cliquable
-        def repl(match):
-            tag = match.group(1)
-            return f'<a href="{url_for("main.hashtag", tag=tag)}" class="hashtag">#{tag}</a>'
-        return re.sub(r'#(\w+)', repl, self.content)
+        # Contenu échappé, #hashtag remplacés par des liens cliquables
+        return self.html
 
 
 
@@ -131,6 +236,10 @@ class Hashtag(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     tag = db.Column(db.String(100), unique=True, nullable=False)
 
+    # Version de la page du hashtag (validators.py)
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    updated_at = db.Column(db.DateTime)
+
     # relation inverse vers les tweets
     tweets = db.relationship(
         'Tweet',
@@ -140,6 +249,15 @@ class Hashtag(db.Model):
     )
 
 
+# Instantané des fenêtres de tendances (trending.py), une ligne par fenêtre
+class TrendingSnapshot(db.Model):
+    __tablename__ = 'trending_snapshot'
+    window = db.Column(db.String(10), primary_key=True)
+    payload = db.Column(db.Text, nullable=False)
+    taken_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+
 # Notification model
 class Notification(db.Model):
     __tablename__ = "notifications"
@@ -151,11 +269,18 @@ class Notification(db.Model):
     payload = db.Column(db.Text, nullable=True)  # JSON string
     is_read = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    tweet_id = db.Column(db.Integer, nullable=True)  # clé de regroupement (likes d'un même tweet)
+    actor_count = db.Column(db.Integer, nullable=False, default=1, server_default='1')  # "X et N autres"
 
     # relationships so you can use n.actor and n.recipient in Python code
     actor = db.relationship('User', foreign_keys=[actor_id], backref=db.backref('actor_notifications', lazy='dynamic'))
     recipient = db.relationship('User', foreign_keys=[recipient_id], backref=db.backref('received_notifications', lazy='dynamic'))
 
+    __table_args__ = (
+        db.Index('ix_notif_recipient_read_created', 'recipient_id', 'is_read', 'created_at'),
+        db.Index('ix_notif_recipient_created', 'recipient_id', 'created_at'),
+    )
+
     def set_payload(self, data):
         self.payload = json.dumps(data)
 
@@ -164,15 +289,7 @@ class Notification(db.Model):
 
 
 def create_notification(recipient_id, actor_id, notif_type, payload=None):
-    """Create & persist a notification."""
-    n = Notification(
-        recipient_id=recipient_id,
-        actor_id=actor_id,
-        type=notif_type
-    )
-    if payload:
-        n.set_payload(payload)
-    db.session.add(n)
-    db.session.commit()
-    return n
+    """Publie une notification ; l'écriture en base est différée et regroupée (voir notify.py)."""
+    from .notify import publish
+    publish(recipient_id, actor_id, notif_type, payload)
 # ----------------- END NOTIFICATIONS -----------------
\ No newline at end of file
@@ -0,0 +1,282 @@
+# notify.py
+#
+# Pipeline d'écriture différée des notifications (write-behind).
+#
+# Les producteurs (follow, like, commentaire) déposent un évènement dans une
+# file bornée en mémoire et repartent aussitôt. Un thread de fond vide la
+# file par lots : une seule transaction par lot, et les rafales sont
+# regroupées en une ligne agrégée ("Alice et 41 autres ont aimé votre tweet")
+# par clé (recipient_id, type, tweet_id) et fenêtre de temps. Les acteurs
+# d'un agrégat sont gardés dans son payload (`actor_ids`) : actor_count compte
+# des comptes distincts, pas des évènements.
+#
+# Si la file est pleine, l'évènement est écrit directement par l'appelant
+# (contre-pression plutôt que perte). NOTIFICATIONS_ASYNC = False écrit tout
+# de façon synchrone.
+#
+# Une notification qui ne doit pas être perdue si le processus s'arrête entre
+# le commit de l'action et l'écriture différée passe par stage() : sa ligne
+# est écrite dans la transaction de l'appelant, puis dispatch() confie au
+# pipeline le seul regroupement (fusion dans l'agrégat ouvert de sa clé). Si
+# le pipeline ne passe jamais, la notification reste une ligne à part.
+
+import atexit
+import queue
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import delete
+
+from . import counters, db
+from .models import Notification
+from .stream import publish_unread
+
+# types regroupables : un like / follow de plus ne mérite pas une nouvelle ligne
+COALESCED_TYPES = {'like', 'follow'}
+
+_STOP = object()
+
+
+@dataclass
+class NotificationEvent:
+    recipient_id: int
+    actor_id: int
+    type: str
+    payload: dict = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    stored: bool = False  # ligne déjà écrite par stage() : reste à la regrouper
+
+    @property
+    def tweet_id(self):
+        return (self.payload or {}).get('tweet_id')
+
+    @property
+    def key(self):
+        return (self.recipient_id, self.type, self.tweet_id)
+
+
+def _new_row(e):
+    n = Notification(
+        recipient_id=e.recipient_id,
+        actor_id=e.actor_id,
+        type=e.type,
+        tweet_id=e.tweet_id,
+        actor_count=1,
+        created_at=e.created_at,
+    )
+    if e.type in COALESCED_TYPES:
+        n.set_payload({**(e.payload or {}), 'actor_ids': [e.actor_id]})
+    elif e.payload:
+        n.set_payload(e.payload)
+    return n
+
+
+def _merge(n, actor_ids, actor_id):
+    """Ajoute des acteurs à l'agrégat n ; actor_count compte les comptes distincts."""
+    payload = n.get_payload()
+    known = payload.setdefault('actor_ids', [n.actor_id])
+    new = [a for a in actor_ids if a not in known]
+    if new:
+        known.extend(new)
+        n.actor_count = len(known)
+        n.set_payload(payload)
+    n.actor_id = actor_id  # on affiche le plus récent
+
+
+def _coalesce_stored(events, window):
+    """Fusionne les lignes écrites par stage() dans l'agrégat ouvert de leur clé.
+
+    Retourne le nombre de lignes supprimées par destinataire.
+    """
+    removed = Counter()
+    if not events:
+        return removed
+    keys = {e.key for e in events}
+    rows = (
+        Notification.query
+        .filter(Notification.recipient_id.in_({e.recipient_id for e in events}))
+        .filter(Notification.type.in_({e.type for e in events}))
+        .filter(Notification.is_read.is_(False))
+        .filter(Notification.created_at >= min(e.created_at for e in events) - window)
+        .order_by(Notification.created_at, Notification.id)
+        .all()
+    )
+    aggregates, merged = {}, []
+    for n in rows:
+        key = (n.recipient_id, n.type, n.tweet_id)
+        if key not in keys:
+            continue
+        agg = aggregates.get(key)
+        if agg is None or n.created_at - agg.created_at > window:
+            aggregates[key] = n
+            continue
+        _merge(agg, n.get_payload().get('actor_ids', [n.actor_id]), n.actor_id)
+        merged.append(n.id)
+        removed[n.recipient_id] += 1
+    if merged:
+        db.session.execute(delete(Notification).where(Notification.id.in_(merged)))
+    return removed
+
+
+def write_batch(events, window):
+    """Écrit un lot d'évènements en une transaction, en regroupant les rafales."""
+    if not events:
+        return
+    window = timedelta(seconds=window)
+    removed = _coalesce_stored([e for e in events if e.stored], window)
+    fresh = [e for e in events if not e.stored]
+    coalescable = [e for e in fresh if e.type in COALESCED_TYPES]
+
+    # agrégats non lus encore ouverts, en une seule requête
+    open_rows, created = {}, Counter()
+    if coalescable:
+        oldest = min(e.created_at for e in coalescable) - window
+        candidates = (
+            Notification.query
+            .filter(Notification.recipient_id.in_({e.recipient_id for e in coalescable}))
+            .filter(Notification.type.in_(COALESCED_TYPES))
+            .filter(Notification.is_read.is_(False))
+            .filter(Notification.created_at >= oldest)
+            .order_by(Notification.created_at)
+            .all()
+        )
+        for n in candidates:
+            open_rows[(n.recipient_id, n.type, n.tweet_id)] = n
+
+    for e in fresh:
+        n = open_rows.get(e.key) if e.type in COALESCED_TYPES else None
+        if n is not None and e.created_at - n.created_at <= window:
+            # acteurs distincts : like / unlike / like du même compte ne compte qu'une fois
+            _merge(n, [e.actor_id], e.actor_id)
+            continue
+        n = _new_row(e)
+        db.session.add(n)
+        if e.type in COALESCED_TYPES:
+            open_rows[e.key] = n
+        created[e.recipient_id] += 1
+
+    # une ligne non lue de plus (ou de moins) = ±1 sur le compteur, dans la même transaction
+    created.subtract(removed)
+    for recipient_id, delta in created.items():
+        if delta:
+            counters.add_unread(recipient_id, delta)
+    db.session.commit()
+    publish_unread({e.recipient_id for e in events})
+
+
+class NotificationPipeline:
+    def __init__(self, app):
+        self.app = app
+        self.batch_size = app.config.get('NOTIFICATIONS_BATCH_SIZE', 200)
+        self.flush_interval = app.config.get('NOTIFICATIONS_FLUSH_INTERVAL', 0.5)
+        self.window = app.config.get('NOTIFICATIONS_COALESCE_WINDOW', 3600)
+        self.enqueue_timeout = app.config.get('NOTIFICATIONS_ENQUEUE_TIMEOUT', 0.05)
+        self._queue = queue.Queue(maxsize=app.config.get('NOTIFICATIONS_QUEUE_SIZE', 10000))
+        self._thread = None
+        self._lock = threading.Lock()  # démarrage du thread et compteurs de `stats`
+        self.stats = {'enqueued': 0, 'written': 0, 'batches': 0, 'inline': 0, 'errors': 0}
+
+    def _count(self, name, n=1):
+        # incrémenté par les threads de requête et par le writer
+        with self._lock:
+            self.stats[name] += n
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='notification-writer', daemon=True)
+                self._thread.start()
+
+    def enqueue(self, event):
+        self._start()
+        try:
+            self._queue.put(event, timeout=self.enqueue_timeout)
+            self._count('enqueued')
+        except queue.Full:
+            # file saturée : l'appelant écrit lui-même
+            self._count('inline')
+            write_batch([event], self.window)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                return
+            batch, stop = [item], False
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    nxt = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if nxt is _STOP:
+                    stop = True
+                    self._queue.task_done()
+                    break
+                batch.append(nxt)
+            self._write(batch)
+            if stop:
+                return
+
+    def _write(self, batch):
+        with self.app.app_context():
+            try:
+                write_batch(batch, self.window)
+                self._count('written', len(batch))
+                self._count('batches')
+            except Exception:
+                db.session.rollback()
+                self._count('errors')
+                self.app.logger.exception("notification batch of %d failed", len(batch))
+            finally:
+                db.session.remove()
+                for _ in batch:
+                    self._queue.task_done()
+
+    def flush(self):
+        """Attend que tous les évènements déjà déposés soient écrits."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def shutdown(self, timeout=5):
+        """Vide la file puis arrête le thread."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+
+def get_pipeline():
+    ext = current_app.extensions
+    if 'notifications' not in ext:
+        pipeline = NotificationPipeline(current_app._get_current_object())
+        if ext.setdefault('notifications', pipeline) is pipeline:
+            atexit.register(pipeline.shutdown)
+    return ext['notifications']
+
+
+def stage(recipient_id, actor_id, notif_type, payload=None):
+    """Écrit la notification dans la transaction en cours ; passer l'évènement à dispatch() après le commit."""
+    event = NotificationEvent(recipient_id, actor_id, notif_type, payload, stored=True)
+    db.session.add(_new_row(event))
+    counters.add_unread(recipient_id, 1)
+    return event
+
+
+def publish(recipient_id, actor_id, notif_type, payload=None):
+    dispatch(NotificationEvent(recipient_id, actor_id, notif_type, payload))
+
+
+def dispatch(event):
+    if current_app.config.get('NOTIFICATIONS_ASYNC', True):
+        get_pipeline().enqueue(event)
+    else:
+        write_batch([event], current_app.config.get('NOTIFICATIONS_COALESCE_WINDOW', 3600))
@@ -0,0 +1,101 @@
+# pagination.py
+#
+# Pagination par curseur (keyset) sur (timestamp, id), ou sur (score, id)
+# pour les listes classées (recherche, fil "Most Popular").
+# Contrairement à OFFSET, le coût d'une page ne dépend pas de sa profondeur :
+# on repart toujours de la dernière clé vue, via l'index.
+
+import base64
+from datetime import datetime
+
+from flask import abort, current_app, request, url_for
+from sqlalchemy import and_, or_
+
+
+class Page:
+    """Une page de résultats et le curseur opaque de la suivante (ou None)."""
+
+    def __init__(self, items, next_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    @property
+    def has_more(self):
+        return self.next_cursor is not None
+
+    @property
+    def next_url(self):
+        """URL de la même vue avec le curseur suivant (conserve les autres paramètres)."""
+        if not self.next_cursor:
+            return None
+        args = dict(request.view_args or {})
+        args.update(request.args.to_dict())
+        args['cursor'] = self.next_cursor
+        return url_for(request.endpoint, **args)
+
+
+def page_size():
+    return current_app.config.get('PAGE_SIZE', 20)
+
+
+def encode_cursor(timestamp, id_):
+    raw = f"{timestamp.isoformat() if timestamp else ''}|{id_}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Retourne (timestamp, id) ; lève ValueError si le curseur est invalide."""
+    padded = cursor + '=' * (-len(cursor) % 4)
+    raw = base64.urlsafe_b64decode(padded.encode()).decode()
+    ts, _, id_ = raw.partition('|')
+    return (datetime.fromisoformat(ts) if ts else None), int(id_)
+
+
+def encode_score_cursor(score, id_):
+    raw = f"{score!r}|{id_}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_score_cursor(cursor):
+    """Retourne (score, id) ; lève ValueError si le curseur est invalide."""
+    padded = cursor + '=' * (-len(cursor) % 4)
+    score, _, id_ = base64.urlsafe_b64decode(padded.encode()).decode().partition('|')
+    return float(score), int(id_)
+
+
+def paginate(query, ts_col, id_col, cursor=None, per_page=None, key=None):
+    """Applique un keyset (ts_col, id_col) décroissant à `query`.
+
+    `ts_col` peut être None pour paginer uniquement sur l'id.
+    `key(item)` retourne (timestamp, id) d'un résultat ; par défaut on lit
+    les attributs de même nom que les colonnes.
+    """
+    per_page = per_page or page_size()
+    if key is None:
+        def key(item):
+            ts = getattr(item, ts_col.key) if ts_col is not None else None
+            return ts, getattr(item, id_col.key)
+
+    if cursor is None:
+        cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            last_ts, last_id = decode_cursor(cursor)
+        except (ValueError, UnicodeDecodeError):
+            abort(400)
+        if ts_col is not None and last_ts is not None:
+            query = query.filter(or_(
+                ts_col < last_ts,
+                and_(ts_col == last_ts, id_col < last_id),
+            ))
+        else:
+            query = query.filter(id_col < last_id)
+
+    order = [id_col.desc()] if ts_col is None else [ts_col.desc(), id_col.desc()]
+    rows = query.order_by(None).order_by(*order).limit(per_page + 1).all()
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor(*key(rows[-1]))
+    return Page(rows, next_cursor)
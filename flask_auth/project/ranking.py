@@ -0,0 +1,292 @@
+# ranking.py
+#
+# Classement "Most Popular" avec décroissance temporelle, mis à jour de façon
+# incrémentale.
+#
+# Chaque évènement (publication, like, commentaire) apporte un poids w qui
+# décroît en exp(-λ·âge). Comme tous les scores décroissent au même rythme,
+# on stocke plutôt  log(Σ w·exp(λ·(t_evt - EPOCH)))  : l'ordre est identique à
+# celui du score décru à n'importe quel instant, et un nouvel évènement
+# s'ajoute sans rien recalculer (log-add-exp). Rester en espace log évite le
+# dépassement de capacité de exp() au fil des années.
+#
+# Le fil classé est ensuite une sélection top-K : fusion (heapq) des listes
+# déjà triées de chaque auteur suivi, gardées en mémoire et relues en base
+# après RANKING_CACHE_TTL secondes. Les pages suivantes repartent d'un
+# curseur (score, id) ; au-delà des PER_AUTHOR tweets gardés par auteur, la
+# page est lue en base.
+
+import heapq
+import math
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from itertools import islice
+
+import click
+from flask import abort, current_app, request
+from flask.cli import with_appcontext
+from sqlalchemy import and_, func, or_, select
+
+from . import db
+from .models import Tweet, Like, Comment
+from .pagination import Page, page_size, encode_score_cursor, decode_score_cursor
+
+EPOCH = datetime(2020, 1, 1)
+
+PUBLISH_WEIGHT = 1.0
+LIKE_WEIGHT = 1.0
+COMMENT_WEIGHT = 2.0
+
+PER_AUTHOR = 200  # nb de tweets gardés en mémoire par auteur
+
+
+def _rate():
+    half_life = current_app.config.get('RANKING_HALF_LIFE_HOURS', 24) * 3600
+    return math.log(2) / half_life
+
+
+def contribution(weight, at):
+    """Poids d'un évènement survenu à `at`, en espace log."""
+    return math.log(weight) + _rate() * (at - EPOCH).total_seconds()
+
+
+def log_add(a, b):
+    if a is None:
+        return b
+    hi, lo = max(a, b), min(a, b)
+    return hi + math.log1p(math.exp(lo - hi))
+
+
+def log_sub(a, b):
+    """log(exp(a) - exp(b)) ; None si le résultat n'est pas strictement positif."""
+    if a is None or b >= a:
+        return None
+    return a + math.log1p(-math.exp(b - a))
+
+
+def decayed(score, now=None):
+    """Valeur effective d'un score à l'instant `now` (pour affichage / tests)."""
+    if score is None:
+        return 0.0
+    now = now or datetime.utcnow()
+    return math.exp(score - _rate() * (now - EPOCH).total_seconds())
+
+
+# ====================
+# Évènements (appelés dans la transaction d'écriture)
+# ====================
+# Le score chargé avec le tweet peut dater du début de la requête : un autre
+# worker a pu le modifier depuis. liked_score, unliked_score et on_comment relisent
+# donc la valeur en base, après une première écriture de la transaction : SQLite
+# tient alors le verrou d'écriture, PostgreSQL verrouille la ligne (FOR UPDATE).
+def on_publish(tweet):
+    tweet.rank_score = contribution(PUBLISH_WEIGHT, tweet.timestamp)
+
+
+def _stored_score(tweet):
+    return db.session.execute(
+        select(Tweet.rank_score).where(Tweet.id == tweet.id).with_for_update()
+    ).scalar_one()
+
+
+def liked_score(tweet, at):
+    """Score de `tweet` après un like reçu à `at`."""
+    return log_add(_stored_score(tweet), contribution(LIKE_WEIGHT, at))
+
+
+def unliked_score(tweet, liked_at):
+    """Score de `tweet` après le retrait d'un like donné à `liked_at`."""
+    # on retire exactement la contribution ajoutée lors du like
+    score = log_sub(_stored_score(tweet), contribution(LIKE_WEIGHT, liked_at))
+    return score if score is not None else contribution(PUBLISH_WEIGHT, tweet.timestamp)
+
+
+def on_comment(tweet, at):
+    tweet.rank_score = log_add(_stored_score(tweet), contribution(COMMENT_WEIGHT, at))
+
+
+# ====================
+# Index en mémoire : listes triées par auteur
+# ====================
+class RankingIndex:
+    def __init__(self, ttl, per_author=PER_AUTHOR):
+        self.ttl = ttl
+        self.per_author = per_author
+        self._lists = {}    # author_id -> [(-score, tweet_id)] trié
+        self._scores = {}   # author_id -> {tweet_id: score}
+        self._loaded = {}   # author_id -> time.monotonic() du chargement
+        self._lock = threading.Lock()
+
+    def _stale(self, author_ids):
+        now = time.monotonic()
+        return [a for a in author_ids if now - self._loaded.get(a, -math.inf) > self.ttl]
+
+    def _load(self, author_ids):
+        """Charge le top PER_AUTHOR de chaque auteur en une seule requête (ROW_NUMBER)."""
+        rn = func.row_number().over(
+            partition_by=Tweet.user_id,
+            order_by=(Tweet.rank_score.desc(), Tweet.id),
+        ).label('rn')
+        ranked = (
+            select(Tweet.user_id, Tweet.id, Tweet.rank_score, rn)
+            .where(Tweet.user_id.in_(author_ids))
+            .where(Tweet.rank_score.is_not(None))
+            .subquery()
+        )
+        rows = db.session.execute(
+            select(ranked.c.user_id, ranked.c.id, ranked.c.rank_score)
+            .where(ranked.c.rn <= self.per_author)
+        ).all()
+
+        lists = {a: [] for a in author_ids}
+        for author_id, tweet_id, score in rows:
+            lists[author_id].append((-score, tweet_id))
+        now = time.monotonic()
+        with self._lock:
+            for author_id, entries in lists.items():
+                entries.sort()
+                self._lists[author_id] = entries
+                self._scores[author_id] = {tid: -s for s, tid in entries}
+                self._loaded[author_id] = now
+
+    def top(self, author_ids, k, after=None):
+        """[(score, id)] des k tweets les mieux classés parmi les auteurs donnés.
+
+        `after` : clé (score, id) du dernier tweet de la page précédente.
+        Retourne None si la page sort de ce qui est gardé en mémoire.
+        """
+        author_ids = set(author_ids)
+        stale = self._stale(author_ids)
+        if stale:
+            self._load(stale)
+        start = (-after[0], after[1]) if after else None
+        with self._lock:
+            lists, horizon = [], None
+            for a in author_ids:
+                entries = self._lists.get(a, [])
+                if len(entries) >= self.per_author:
+                    # liste tronquée : exacte seulement jusqu'à sa dernière entrée
+                    horizon = entries[-1] if horizon is None else min(horizon, entries[-1])
+                lists.append(islice(entries, bisect_right(entries, start) if start else 0, None))
+            merged = list(islice(heapq.merge(*lists), k))
+        if horizon is not None and (len(merged) < k or merged[-1] > horizon):
+            return None
+        return [(-score, tweet_id) for score, tweet_id in merged]
+
+    def update(self, author_id, tweet_id, score):
+        with self._lock:
+            if author_id not in self._lists or score is None:
+                return  # auteur pas encore chargé : il sera lu en base
+            self._remove(author_id, tweet_id)
+            entries = self._lists[author_id]
+            insort(entries, (-score, tweet_id))
+            self._scores[author_id][tweet_id] = score
+            for _, dropped in entries[self.per_author:]:
+                self._scores[author_id].pop(dropped, None)
+            del entries[self.per_author:]
+
+    def discard(self, author_id, tweet_id):
+        with self._lock:
+            if author_id in self._lists:
+                self._remove(author_id, tweet_id)
+
+    def _remove(self, author_id, tweet_id):
+        old = self._scores[author_id].pop(tweet_id, None)
+        if old is None:
+            return
+        entries = self._lists[author_id]
+        i = bisect_left(entries, (-old, tweet_id))
+        if i < len(entries) and entries[i] == (-old, tweet_id):
+            del entries[i]
+
+
+def get_index():
+    ext = current_app.extensions
+    if 'ranking' not in ext:
+        ext.setdefault('ranking', RankingIndex(current_app.config.get('RANKING_CACHE_TTL', 60)))
+    return ext['ranking']
+
+
+def _top_from_db(author_ids, k, after=None):
+    query = (
+        select(Tweet.rank_score, Tweet.id)
+        .where(Tweet.user_id.in_(author_ids))
+        .where(Tweet.rank_score.is_not(None))
+    )
+    if after:
+        score, id_ = after
+        query = query.where(or_(
+            Tweet.rank_score < score,
+            and_(Tweet.rank_score == score, Tweet.id > id_),
+        ))
+    rows = db.session.execute(query.order_by(Tweet.rank_score.desc(), Tweet.id).limit(k)).all()
+    return [tuple(r) for r in rows]
+
+
+def _top(author_ids, k, after=None):
+    """[(score, id)] du classement ; lu en base quand l'index ne suffit pas."""
+    keys = get_index().top(author_ids, k, after)
+    return keys if keys is not None else _top_from_db(author_ids, k, after)
+
+
+def _load_tweets(ids):
+    if not ids:
+        return []
+    by_id = {t.id: t for t in Tweet.query.filter(Tweet.id.in_(ids)).all()}
+    return [by_id[i] for i in ids if i in by_id]
+
+
+def top_tweets(author_ids, k):
+    """Tweets les plus populaires des auteurs donnés, dans l'ordre du classement."""
+    return _load_tweets([tweet_id for _, tweet_id in _top(author_ids, k)])
+
+
+def ranked_page(author_ids, cursor=None, per_page=None):
+    """Une page du fil classé, paginée par curseur sur (score, id)."""
+    per_page = per_page or page_size()
+    if cursor is None:
+        cursor = request.args.get('cursor')
+    after = None
+    if cursor:
+        try:
+            after = decode_score_cursor(cursor)
+        except (ValueError, UnicodeDecodeError):
+            abort(400)
+
+    keys = _top(author_ids, per_page + 1, after)
+    next_cursor = None
+    if len(keys) > per_page:
+        keys = keys[:per_page]
+        next_cursor = encode_score_cursor(*keys[-1])
+    return Page(_load_tweets([tweet_id for _, tweet_id in keys]), next_cursor)
+
+
+def rescore():
+    """Recalcule tous les scores depuis les tables Like/Comment ; retourne le nb de tweets."""
+    likes = {}
+    for tweet_id, at in db.session.execute(select(Like.tweet_id, Like.created_at)):
+        likes.setdefault(tweet_id, []).append((LIKE_WEIGHT, at))
+    comments = {}
+    for tweet_id, at in db.session.execute(select(Comment.tweet_id, Comment.created_at)):
+        comments.setdefault(tweet_id, []).append((COMMENT_WEIGHT, at))
+
+    n = 0
+    for tweet in Tweet.query.all():
+        score = contribution(PUBLISH_WEIGHT, tweet.timestamp)
+        for weight, at in likes.get(tweet.id, []) + comments.get(tweet.id, []):
+            score = log_add(score, contribution(weight, at or tweet.timestamp))
+        tweet.rank_score = score
+        n += 1
+    current_app.extensions.pop('ranking', None)
+    return n
+
+
+@click.command('rescore-tweets')
+@with_appcontext
+def rescore_tweets_command():
+    """Recalcule les scores de popularité (bases existantes, changement de demi-vie)."""
+    n = rescore()
+    db.session.commit()
+    click.echo(f"{n} tweets rescored.")
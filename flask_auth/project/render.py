@@ -0,0 +1,103 @@
+# render.py
+#
+# Rendu HTML des tweets et commentaires, fait une seule fois à l'écriture.
+#
+# Le texte est échappé puis les hashtags deviennent des liens ; le résultat
+# est stocké dans `content_html` avec la version du rendu (`html_version`).
+# À l'affichage, la carte insère directement ce HTML. Si le rendu change,
+# on incrémente RENDER_VERSION : les lignes d'une version antérieure sont
+# rendues à la volée en attendant `flask rerender-content`.
+
+import hashlib
+import os
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from markupsafe import Markup, escape
+from sqlalchemy import or_, select, update
+
+from . import db
+from .hashtags import MAX_TAG_LENGTH, TAG_RE
+from .models import Tweet, Comment
+
+RENDER_VERSION = 1
+
+BATCH_SIZE = 1000
+
+
+def template_salt():
+    """Empreinte du rendu déployé (RENDER_VERSION + date des templates), pour les caches de pages."""
+    ext = current_app.extensions
+    if 'render_salt' not in ext:
+        parts = [str(RENDER_VERSION)]
+        folder = os.path.join(current_app.root_path, current_app.template_folder)
+        for name in sorted(os.listdir(folder)):
+            parts.append(f'{name}:{os.stat(os.path.join(folder, name)).st_mtime_ns}')
+        ext['render_salt'] = hashlib.sha1('|'.join(parts).encode()).hexdigest()[:8]
+    return ext['render_salt']
+
+
+def _url_adapter():
+    # sans contexte de requête (CLI), url_for ne sait pas construire d'URL :
+    # on passe directement par la table de routage
+    return current_app.url_map.bind('', script_name=current_app.config.get('APPLICATION_ROOT') or '/')
+
+
+def render(text):
+    """Texte brut -> HTML sûr, hashtags cliquables."""
+    out, pos, adapter = [], 0, None
+    text = text or ''
+    for match in TAG_RE.finditer(text):
+        out.append(escape(text[pos:match.start()]))
+        tag = match.group(1)
+        adapter = adapter or _url_adapter()
+        url = adapter.build('main.hashtag', {'tag': tag[:MAX_TAG_LENGTH]})
+        out.append(Markup('<a href="{}" class="hashtag">#{}</a>').format(url, tag))
+        pos = match.end()
+    out.append(escape(text[pos:]))
+    return Markup('').join(out)
+
+
+def apply(obj):
+    """Calcule et stocke le rendu d'un Tweet ou d'un Comment."""
+    obj.content_html = str(render(obj.content))
+    obj.html_version = RENDER_VERSION
+
+
+def html_of(obj):
+    """HTML à afficher : le rendu stocké s'il est à jour, sinon un rendu à la volée."""
+    if obj.content_html is not None and obj.html_version == RENDER_VERSION:
+        return Markup(obj.content_html)
+    return render(obj.content)
+
+
+def rerender(model, batch_size=BATCH_SIZE):
+    """Re-rend les lignes absentes ou d'une version antérieure ; retourne leur nombre."""
+    total, last_id = 0, 0
+    stale = or_(model.html_version.is_(None), model.html_version != RENDER_VERSION)
+    while True:
+        rows = db.session.execute(
+            select(model.id, model.content)
+            .where(stale, model.id > last_id)
+            .order_by(model.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return total
+        db.session.execute(update(model), [
+            {'id': id_, 'content_html': str(render(content)), 'html_version': RENDER_VERSION}
+            for id_, content in rows
+        ])
+        db.session.commit()
+        total += len(rows)
+        last_id = rows[-1].id
+
+
+@click.command('rerender-content')
+@with_appcontext
+def rerender_content_command():
+    """Calcule content_html des tweets et commentaires pas encore rendus (ou d'une ancienne version)."""
+    tweets = rerender(Tweet)
+    comments = rerender(Comment)
+    click.echo(f"{tweets} tweets and {comments} comments rendered (v{RENDER_VERSION}).")
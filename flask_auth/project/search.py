@@ -0,0 +1,236 @@
+# search.py
+#
+# Recherche plein texte sur SQLite FTS5.
+#
+#   user_fts  (name, bio)          -> utilisateurs
+#   tweet_fts (content, comments)  -> tweets, y compris le texte de leurs commentaires
+#
+# Les tables FTS sont tenues à jour par des triggers SQL : toute écriture
+# (ORM, insert en masse, CLI) est indexée dans la même transaction. Elles
+# sont créées avec le schéma (db.create_all) et remplies sur une base
+# existante par la migration v6.
+#
+# Chaque mot saisi est cherché en préfixe ("ali" trouve "alice"), les
+# résultats sont classés par BM25 puis paginés par curseur sur (score, id).
+# Hors SQLite, on retombe sur un LIKE.
+#
+# Pour rester rapide quand la table grossit :
+# - on ne classe que les SEARCH_CANDIDATES correspondances les plus récentes
+#   (les rowid FTS suivent les id, le parcours décroissant est direct).
+#   C'est une limite ferme : le curseur pagine dans cette fenêtre, les
+#   correspondances plus anciennes ne sont jamais renvoyées ;
+# - BM25 compte toutes les lignes de chaque terme pour son IDF : un mot
+#   présent dans une grande part des tweets récents (un "mot vide") coûte
+#   un parcours de centaines de milliers de lignes pour un poids quasi nul.
+#   On l'écarte du classement mais il reste un filtre : ses lignes de la
+#   fenêtre, lues par rowid sans calcul d'IDF, bornent les candidats. Si la
+#   requête n'a que des mots vides, les résultats sont simplement classés du
+#   plus récent au plus ancien.
+
+import re
+
+from flask import abort, current_app, request
+from sqlalchemy import event, or_, text
+
+from . import db
+from .models import User, Tweet
+from .pagination import Page, page_size, encode_score_cursor, decode_score_cursor
+
+# poids BM25 par colonne : un nom compte plus qu'une bio, un tweet plus que ses commentaires
+USER_WEIGHTS = (10.0, 1.0)
+TWEET_WEIGHTS = (4.0, 1.0)
+
+# au-delà, la requête devient plus chère sans être plus précise
+MAX_TERMS = 8
+# un préfixe plus court couvrirait une bonne part du vocabulaire : recherche exacte
+MIN_PREFIX = 3
+# un terme est "vide" si ses COMMON_PROBE dernières occurrences couvrent moins
+# de COMMON_PROBE / COMMON_DENSITY lignes (présent dans plus de 5 % des lignes récentes)
+COMMON_PROBE = 200
+COMMON_DENSITY = 0.05
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+_TOKENIZE = "tokenize = 'unicode61 remove_diacritics 2', prefix = '3'"
+
+_COMMENTS_OF = "(SELECT group_concat(content, ' ') FROM comment WHERE tweet_id = {ref})"
+
+DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS user_fts USING fts5(name, bio, {_TOKENIZE})",
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS tweet_fts USING fts5(content, comments, {_TOKENIZE})",
+
+    'CREATE TRIGGER IF NOT EXISTS user_fts_ai AFTER INSERT ON "user" BEGIN '
+    'INSERT INTO user_fts (rowid, name, bio) VALUES (new.id, new.name, new.bio); END',
+    'CREATE TRIGGER IF NOT EXISTS user_fts_au AFTER UPDATE OF name, bio ON "user" BEGIN '
+    'UPDATE user_fts SET name = new.name, bio = new.bio WHERE rowid = new.id; END',
+    'CREATE TRIGGER IF NOT EXISTS user_fts_ad AFTER DELETE ON "user" BEGIN '
+    'DELETE FROM user_fts WHERE rowid = old.id; END',
+
+    'CREATE TRIGGER IF NOT EXISTS tweet_fts_ai AFTER INSERT ON tweet BEGIN '
+    "INSERT INTO tweet_fts (rowid, content, comments) VALUES (new.id, new.content, ''); END",
+    'CREATE TRIGGER IF NOT EXISTS tweet_fts_au AFTER UPDATE OF content ON tweet BEGIN '
+    'UPDATE tweet_fts SET content = new.content WHERE rowid = new.id; END',
+    'CREATE TRIGGER IF NOT EXISTS tweet_fts_ad AFTER DELETE ON tweet BEGIN '
+    'DELETE FROM tweet_fts WHERE rowid = old.id; END',
+
+    # commentaires : on réécrit la colonne `comments` du tweet concerné
+    'CREATE TRIGGER IF NOT EXISTS comment_fts_ai AFTER INSERT ON comment BEGIN '
+    f'UPDATE tweet_fts SET comments = {_COMMENTS_OF.format(ref="new.tweet_id")} '
+    'WHERE rowid = new.tweet_id; END',
+    'CREATE TRIGGER IF NOT EXISTS comment_fts_au AFTER UPDATE OF content, tweet_id ON comment BEGIN '
+    f'UPDATE tweet_fts SET comments = {_COMMENTS_OF.format(ref="old.tweet_id")} '
+    'WHERE rowid = old.tweet_id; '
+    f'UPDATE tweet_fts SET comments = {_COMMENTS_OF.format(ref="new.tweet_id")} '
+    'WHERE rowid = new.tweet_id; END',
+    'CREATE TRIGGER IF NOT EXISTS comment_fts_ad AFTER DELETE ON comment BEGIN '
+    f'UPDATE tweet_fts SET comments = {_COMMENTS_OF.format(ref="old.tweet_id")} '
+    'WHERE rowid = old.tweet_id; END',
+]
+
+
+# ====================
+# Schéma
+# ====================
+def install(conn):
+    """Crée tables FTS et triggers (idempotent)."""
+    for stmt in DDL:
+        conn.execute(text(stmt))
+
+
+def rebuild(conn):
+    """Réindexe tout depuis les tables sources."""
+    conn.execute(text('DELETE FROM user_fts'))
+    conn.execute(text('INSERT INTO user_fts (rowid, name, bio) SELECT id, name, bio FROM "user"'))
+    conn.execute(text('DELETE FROM tweet_fts'))
+    conn.execute(text(
+        'INSERT INTO tweet_fts (rowid, content, comments) '
+        f'SELECT id, content, coalesce({_COMMENTS_OF.format(ref="tweet.id")}, \'\') FROM tweet'
+    ))
+
+
+@event.listens_for(db.metadata, 'after_create')
+def _after_create(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        install(connection)
+
+
+@event.listens_for(db.metadata, 'before_drop')
+def _before_drop(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        connection.execute(text('DROP TABLE IF EXISTS user_fts'))
+        connection.execute(text('DROP TABLE IF EXISTS tweet_fts'))
+
+
+# ====================
+# Requêtes
+# ====================
+def words(query):
+    return TOKEN_RE.findall(query)[:MAX_TERMS]
+
+
+def exact(word):
+    return f'"{word}"'
+
+
+def prefix(word):
+    """Terme FTS5 en préfixe s'il est assez long ; les guillemets neutralisent la syntaxe FTS5."""
+    return f'"{word}"*' if len(word) >= MIN_PREFIX else exact(word)
+
+
+def to_match(query):
+    """Expression FTS5 : tous les mots requis, en préfixe."""
+    return ' '.join(prefix(w) for w in words(query))
+
+
+def _window(table, match, size):
+    """(nb, plus petit rowid, plus grand rowid) des `size` correspondances les plus récentes."""
+    return db.session.execute(text(
+        f'SELECT count(*), min(rowid), max(rowid) FROM '
+        f'(SELECT rowid FROM {table} WHERE {table} MATCH :match ORDER BY rowid DESC LIMIT :size)'
+    ), {'match': match, 'size': size}).one()
+
+
+def _is_common(table, word):
+    # sonde sur le mot exact : un préfixe fusionnerait d'abord toutes ses listes
+    n, lo, hi = _window(table, exact(word), COMMON_PROBE)
+    return n == COMMON_PROBE and n / (hi - lo + 1) > COMMON_DENSITY
+
+
+def _ranked_ids(table, weights, query_words, cursor, limit):
+    """[(id, score)] par score croissant (meilleur d'abord), après le curseur.
+
+    Seules les SEARCH_CANDIDATES correspondances les plus récentes sont classées.
+    """
+    common = [w for w in query_words if _is_common(table, w)]
+    rare = [w for w in query_words if w not in common]
+    if rare:
+        match = ' '.join(prefix(w) for w in rare)
+        score = f"bm25({table}, {', '.join(map(str, weights))})"
+        required = ' '.join(exact(w) for w in common)
+    else:
+        # que des mots vides : mots exacts, du plus récent au plus ancien
+        match, score, required = ' '.join(exact(w) for w in query_words), '-rowid', ''
+
+    full = ' '.join(filter(None, (match, required)))
+    n, lo, _ = _window(table, full, current_app.config.get('SEARCH_CANDIDATES', 1000))
+    if not n:
+        return []
+    params = {'match': match, 'lo': lo, 'limit': limit}
+    filters = ''
+    if required:
+        # mots vides : filtre sur la même fenêtre, hors du MATCH classé (donc hors BM25)
+        params['required'] = required
+        filters += (f' AND rowid IN (SELECT rowid FROM {table} '
+                    f'WHERE {table} MATCH :required AND rowid >= :lo)')
+    if cursor:
+        params['score'], params['id'] = cursor
+        filters += f' AND ({score}, rowid) > (:score, :id)'
+    rows = db.session.execute(text(
+        f'SELECT rowid, {score} AS score FROM {table} '
+        f'WHERE {table} MATCH :match AND rowid >= :lo{filters} '
+        'ORDER BY score, rowid LIMIT :limit'
+    ), params).all()
+    return [(r[0], r[1]) for r in rows]
+
+
+def _search(model, table, weights, like_cols, query, cursor=None, per_page=None):
+    per_page = per_page or page_size()
+    query_words = words(query)
+    if not query_words:
+        return Page([], None)
+
+    if cursor is None:
+        cursor = request.args.get('cursor')
+    position = None
+    if cursor:
+        try:
+            position = decode_score_cursor(cursor)
+        except (ValueError, UnicodeDecodeError):
+            abort(400)
+
+    if db.engine.dialect.name != 'sqlite':
+        # repli sans FTS : LIKE, du plus récent au plus ancien
+        q = model.query.filter(or_(*(c.ilike(f"%{query}%") for c in like_cols)))
+        if position:
+            q = q.filter(model.id < position[1])
+        rows = q.order_by(model.id.desc()).limit(per_page + 1).all()
+        hits = [(r.id, 0.0) for r in rows]
+    else:
+        hits = _ranked_ids(table, weights, query_words, position, per_page + 1)
+
+    next_cursor = None
+    if len(hits) > per_page:
+        hits = hits[:per_page]
+        next_cursor = encode_score_cursor(hits[-1][1], hits[-1][0])
+
+    ids = [h[0] for h in hits]
+    by_id = {obj.id: obj for obj in model.query.filter(model.id.in_(ids))} if ids else {}
+    return Page([by_id[i] for i in ids if i in by_id], next_cursor)
+
+
+def search_users(query, cursor=None, per_page=None):
+    return _search(User, 'user_fts', USER_WEIGHTS, [User.name, User.bio], query, cursor, per_page)
+
+
+def search_tweets(query, cursor=None, per_page=None):
+    return _search(Tweet, 'tweet_fts', TWEET_WEIGHTS, [Tweet.content], query, cursor, per_page)
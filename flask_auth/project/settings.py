@@ -0,0 +1,68 @@
+# settings.py
+#
+# Chargement de la configuration et réglages du moteur SQL.
+#
+# Ordre de priorité (le dernier gagne) :
+#   1. valeurs par défaut de create_app ;
+#   2. instance/config.py, s'il existe (non versionné : secrets, URI...) ;
+#   3. DATABASE_URL puis les variables FLASK_* de l'environnement
+#      (valeurs JSON, `__` pour une clé imbriquée, ex.
+#      FLASK_SQLITE_PRAGMAS__busy_timeout=10000) ;
+#   4. le dictionnaire passé à create_app (tests, benchmarks).
+#
+# Avec SQLite, chaque nouvelle connexion reçoit les PRAGMA de
+# SQLITE_PRAGMAS : WAL (les lectures ne bloquent plus les écritures),
+# synchronous=NORMAL (sûr en WAL, un fsync par checkpoint au lieu d'un par
+# commit), busy_timeout (un écrivain attend le verrou au lieu d'échouer
+# avec "database is locked"), mmap_size et cache_size. Pour une base
+# serveur (PostgreSQL...), les options de pool DB_POOL_* sont passées au
+# moteur.
+
+import os
+
+from sqlalchemy import event
+
+
+def load(app, overrides=None):
+    """Complète app.config depuis l'instance, l'environnement puis `overrides`."""
+    app.config.from_pyfile('config.py', silent=True)
+    url = os.environ.get('DATABASE_URL')
+    if url:
+        # ancien schéma encore fourni par certains hébergeurs
+        app.config['SQLALCHEMY_DATABASE_URI'] = url.replace('postgres://', 'postgresql://', 1)
+    app.config.from_prefixed_env()
+    if overrides:
+        app.config.update(overrides)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+
+
+def engine_options(config):
+    """Options du moteur : celles fournies, complétées par le pool pour une base serveur."""
+    options = dict(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    if not config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        options.setdefault('pool_size', config.get('DB_POOL_SIZE', 10))
+        options.setdefault('max_overflow', config.get('DB_MAX_OVERFLOW', 20))
+        options.setdefault('pool_timeout', config.get('DB_POOL_TIMEOUT', 30))
+        options.setdefault('pool_recycle', config.get('DB_POOL_RECYCLE', 1800))
+        options.setdefault('pool_pre_ping', True)
+    return options
+
+
+def install_pragmas(engine, pragmas):
+    """Applique les PRAGMA à chaque nouvelle connexion SQLite du moteur."""
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_conn, connection_record):
+        cursor = dbapi_conn.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+
+def init_app(app, db):
+    pragmas = app.config.get('SQLITE_PRAGMAS')
+    with app.app_context():
+        for engine in db.engines.values():
+            install_pragmas(engine, pragmas)
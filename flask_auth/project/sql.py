@@ -0,0 +1,22 @@
+# sql.py
+#
+# Petits utilitaires SQL dépendant du dialecte.
+
+from sqlalchemy import insert
+
+from . import db
+
+
+def insert_ignore(table, *index_elements):
+    """INSERT ... ON CONFLICT DO NOTHING (SQLite, PostgreSQL) ; INSERT simple sinon."""
+    dialect = db.engine.dialect.name
+    # import des dialectes à la demande : celui de PostgreSQL coûte ~60 ms au démarrage
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects import sqlite
+        stmt = sqlite.insert(table)
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects import postgresql
+        stmt = postgresql.insert(table)
+    else:
+        return insert(table)
+    return stmt.on_conflict_do_nothing(index_elements=list(index_elements) or None)
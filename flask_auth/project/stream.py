@@ -0,0 +1,101 @@
+# stream.py
+#
+# Canal de push (Server-Sent Events) pour le badge de notifications.
+#
+# Au lieu que chaque onglet interroge /notifications/count toutes les 30 s,
+# le navigateur ouvre /notifications/stream et reçoit le nombre de non-lues
+# à chaque changement. Le hub de publication est en mémoire, par processus :
+# avec plusieurs workers, un client ne reçoit que les évènements du worker
+# qui sert son flux ; le polling de repli reste donc en place côté client.
+#
+# Chaque flux occupe un thread du serveur : il est fermé au bout de
+# NOTIFICATIONS_STREAM_MAX_AGE secondes, et EventSource se reconnecte seul.
+
+import json
+import queue
+import threading
+import time
+
+from flask import current_app
+
+from . import counters
+
+# on ne garde que quelques évènements par abonné : seul le dernier compte importe
+SUBSCRIBER_QUEUE_SIZE = 16
+
+
+class Hub:
+    def __init__(self):
+        self._subscribers = {}  # user_id -> set de queue.Queue
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        q = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(q)
+        return q
+
+    def unsubscribe(self, user_id, q):
+        with self._lock:
+            subs = self._subscribers.get(user_id)
+            if subs is not None:
+                subs.discard(q)
+                if not subs:
+                    del self._subscribers[user_id]
+
+    def has_subscribers(self, user_id):
+        return user_id in self._subscribers
+
+    def publish(self, user_id, event, data):
+        with self._lock:
+            subs = list(self._subscribers.get(user_id, ()))
+        for q in subs:
+            try:
+                q.put_nowait((event, data))
+            except queue.Full:
+                # abonné lent : on jette le plus ancien plutôt que de bloquer l'émetteur
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    pass
+                q.put_nowait((event, data))
+        return len(subs)
+
+
+def get_hub():
+    return current_app.extensions.setdefault('stream', Hub())
+
+
+def unread_count(user_id):
+    return counters.unread(user_id)[0]
+
+
+def publish_unread(user_ids):
+    """Pousse le nombre de non-lues aux abonnés ; appelé après le commit."""
+    hub = get_hub()
+    for user_id in user_ids:
+        if hub.has_subscribers(user_id):
+            hub.publish(user_id, 'unread', {'unread': unread_count(user_id)})
+
+
+def format_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def events(hub, user_id, q, initial, heartbeat, max_age):
+    """Générateur SSE : état initial, puis évènements et keep-alive jusqu'à max_age."""
+    try:
+        yield "retry: 3000\n" + format_event('unread', initial)
+        deadline = time.monotonic() + max_age
+        while True:
+            timeout = min(heartbeat, deadline - time.monotonic())
+            if timeout <= 0:
+                return
+            try:
+                event, data = q.get(timeout=timeout)
+            except queue.Empty:
+                yield ": keep-alive\n\n"
+                continue
+            yield format_event(event, data)
+    finally:
+        hub.unsubscribe(user_id, q)
@@ -0,0 +1,218 @@
+# throttle.py
+#
+# Limitation des tentatives de connexion, avant tout hachage.
+#
+# Chaque tentative consomme un jeton dans deux seaux : celui de l'email
+# visé et celui de l'IP cliente. Un seau se remplit de `rate` jetons par
+# seconde jusqu'à `burst`. Quand l'un des deux est vide, la tentative est
+# refusée (429 + Retry-After) avant tout calcul pbkdf2, et le seau est
+# bloqué pour une durée qui double à chaque refus consécutif
+# (LOGIN_THROTTLE_BACKOFF, plafonnée à LOGIN_THROTTLE_MAX_BACKOFF). Une
+# connexion réussie remet le seau de l'email à zéro ; les refus sont oubliés
+# après un silence assez long pour remplir tout le seau.
+#
+# L'état vit dans un store interchangeable :
+#   - MemoryStore : LRU en mémoire, borné à LOGIN_THROTTLE_MAX_KEYS seaux ;
+#   - SqliteStore : fichier SQLite local (LOGIN_THROTTLE_STORE), partagé par
+#     les workers d'une même machine.
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import astuple, dataclass
+
+from flask import current_app
+from werkzeug.exceptions import TooManyRequests
+
+
+class LoginThrottled(TooManyRequests):
+    description = "Too many sign-in attempts. Please wait before trying again."
+
+    def __init__(self, retry_after):
+        super().__init__(retry_after=max(1, int(retry_after + 0.999)))
+
+
+@dataclass
+class Bucket:
+    tokens: float
+    updated: float
+    strikes: int = 0
+    blocked_until: float = 0.0
+
+
+@dataclass(frozen=True)
+class Limit:
+    burst: int
+    rate: float  # jetons par seconde
+
+
+# ====================
+# Stores
+# ====================
+class MemoryStore:
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def update(self, keys, fn):
+        """Applique fn({clé: Bucket | None}) -> (résultat, {clé: Bucket}) de façon atomique."""
+        with self._lock:
+            result, changed = fn({k: self._buckets.get(k) for k in keys})
+            for key, bucket in changed.items():
+                self._buckets[key] = bucket
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+            return result
+
+    def delete(self, key):
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def prune(self, idle_before):
+        pass  # déjà borné par le LRU
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class SqliteStore:
+    def __init__(self, path, timeout=5):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._conn().execute(
+            'CREATE TABLE IF NOT EXISTS throttle_bucket ('
+            ' key TEXT PRIMARY KEY, tokens REAL, updated REAL, strikes INTEGER, blocked_until REAL)'
+        )
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def update(self, keys, fn):
+        conn = self._conn()
+        # verrou d'écriture dès la lecture : pas de double consommation entre workers
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            buckets = dict.fromkeys(keys)
+            rows = conn.execute(
+                f"SELECT key, tokens, updated, strikes, blocked_until FROM throttle_bucket"
+                f" WHERE key IN ({','.join('?' * len(keys))})", list(keys),
+            )
+            for key, *state in rows:
+                buckets[key] = Bucket(*state)
+            result, changed = fn(buckets)
+            conn.executemany(
+                'INSERT INTO throttle_bucket VALUES (?, ?, ?, ?, ?) ON CONFLICT(key) DO UPDATE SET'
+                ' tokens = excluded.tokens, updated = excluded.updated,'
+                ' strikes = excluded.strikes, blocked_until = excluded.blocked_until',
+                [(key, *astuple(b)) for key, b in changed.items()],
+            )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return result
+
+    def delete(self, key):
+        self._conn().execute('DELETE FROM throttle_bucket WHERE key = ?', (key,))
+
+    def prune(self, idle_before):
+        self._conn().execute(
+            'DELETE FROM throttle_bucket WHERE updated < ? AND blocked_until < ?', (idle_before, idle_before)
+        )
+
+    def __len__(self):
+        return self._conn().execute('SELECT count(*) FROM throttle_bucket').fetchone()[0]
+
+
+# ====================
+# Limiteur
+# ====================
+class LoginThrottle:
+    PRUNE_EVERY = 1000
+
+    def __init__(self, store, email_limit, ip_limit, backoff=2, max_backoff=900):
+        self.store = store
+        self.limits = {'email': email_limit, 'ip': ip_limit}
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._attempts = 0
+        self.stats = {'allowed': 0, 'rejected': 0, 'rejected_email': 0, 'rejected_ip': 0, 'hashes_saved': 0}
+
+    def _refill(self, bucket, limit, now):
+        if bucket is None:
+            return Bucket(limit.burst, now)
+        idle = now - max(bucket.updated, bucket.blocked_until)
+        bucket.tokens = min(limit.burst, bucket.tokens + (now - bucket.updated) * limit.rate)
+        bucket.updated = now
+        # le temps de remplir tout le seau sans aucune tentative : on oublie les refus
+        if idle >= limit.burst / limit.rate:
+            bucket.strikes = 0
+        return bucket
+
+    def _wait(self, bucket, limit, now):
+        """Secondes à attendre avant la prochaine tentative (0 si un jeton est disponible)."""
+        if now < bucket.blocked_until:
+            return bucket.blocked_until - now
+        if bucket.tokens >= 1:
+            return 0
+        bucket.strikes += 1
+        wait = max((1 - bucket.tokens) / limit.rate,
+                   min(self.max_backoff, self.backoff * 2 ** (bucket.strikes - 1)))
+        bucket.blocked_until = now + wait
+        return wait
+
+    def hit(self, email, ip, would_hash=True, now=None):
+        """Compte une tentative ; lève LoginThrottled si l'email ou l'IP est à court de jetons."""
+        now = time.time() if now is None else now
+        keys = {f'email:{(email or "").strip().lower()}': self.limits['email'], f'ip:{ip}': self.limits['ip']}
+
+        def take(buckets):
+            buckets = {k: self._refill(b, keys[k], now) for k, b in buckets.items()}
+            waits = {k: self._wait(b, keys[k], now) for k, b in buckets.items()}
+            if not any(waits.values()):
+                for bucket in buckets.values():
+                    bucket.tokens -= 1
+            return waits, buckets
+
+        waits = self.store.update(list(keys), take)
+        self._attempts += 1
+        if self._attempts % self.PRUNE_EVERY == 0:
+            self.store.prune(now - self.max_backoff - max(l.burst / l.rate for l in self.limits.values()))
+        blocked = {k.split(':', 1)[0]: w for k, w in waits.items() if w}
+        if not blocked:
+            self.stats['allowed'] += 1
+            return
+        self.stats['rejected'] += 1
+        for kind in blocked:
+            self.stats[f'rejected_{kind}'] += 1
+        if would_hash:
+            self.stats['hashes_saved'] += 1
+        raise LoginThrottled(max(blocked.values()))
+
+    def succeeded(self, email):
+        self.store.delete(f'email:{(email or "").strip().lower()}')
+
+
+def get_throttle():
+    ext = current_app.extensions
+    if 'login_throttle' not in ext:
+        config = current_app.config
+        path = config.get('LOGIN_THROTTLE_STORE')
+        store = SqliteStore(path) if path else MemoryStore(config.get('LOGIN_THROTTLE_MAX_KEYS', 100000))
+        ext.setdefault('login_throttle', LoginThrottle(
+            store,
+            email_limit=Limit(config.get('LOGIN_THROTTLE_EMAIL_BURST', 5), config.get('LOGIN_THROTTLE_EMAIL_RATE', 1 / 60)),
+            ip_limit=Limit(config.get('LOGIN_THROTTLE_IP_BURST', 30), config.get('LOGIN_THROTTLE_IP_RATE', 0.5)),
+            backoff=config.get('LOGIN_THROTTLE_BACKOFF', 2),
+            max_backoff=config.get('LOGIN_THROTTLE_MAX_BACKOFF', 900),
+        ))
+    return ext['login_throttle']
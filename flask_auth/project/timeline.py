@@ -0,0 +1,148 @@
+# timeline.py
+#
+# Home timelines pré-calculées (fan-out-on-write).
+# Chaque tweet publié est recopié dans la "boîte" (table timeline_entry) de son
+# auteur et de tous ses followers : la home devient une simple lecture triée
+# sur (user_id, timestamp) au lieu d'un IN sur tous les comptes suivis.
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import and_, delete, insert, literal, select, union
+from sqlalchemy.orm import aliased
+
+from . import db
+from .models import Tweet, TimelineEntry, followers
+
+
+def _max_length():
+    return current_app.config.get('TIMELINE_MAX_LENGTH', 800)
+
+
+def fan_out(tweet):
+    """Pousse un tweet (déjà flushé) dans la timeline de l'auteur et de ses followers."""
+    db.session.add(TimelineEntry(
+        user_id=tweet.user_id,
+        tweet_id=tweet.id,
+        author_id=tweet.user_id,
+        timestamp=tweet.timestamp,
+    ))
+    # un seul INSERT ... SELECT pour tous les followers
+    recipients = (
+        select(
+            followers.c.follower_id,
+            literal(tweet.id),
+            literal(tweet.user_id),
+            literal(tweet.timestamp),
+        )
+        .where(followers.c.followed_id == tweet.user_id)
+        .where(followers.c.follower_id != tweet.user_id)
+        .distinct()
+    )
+    db.session.execute(
+        insert(TimelineEntry).from_select(
+            ['user_id', 'tweet_id', 'author_id', 'timestamp'], recipients
+        )
+    )
+    # chaque timeline touchée a pris une entrée : on les borne toutes en une requête
+    _trim(union(
+        select(literal(tweet.user_id)),
+        select(followers.c.follower_id).where(followers.c.followed_id == tweet.user_id),
+    ))
+
+
+def backfill(user_id, author_id, limit=None):
+    """Ajoute les derniers tweets de `author_id` dans la timeline de `user_id` (après un follow)."""
+    limit = limit or _max_length()
+    already = select(TimelineEntry.tweet_id).where(TimelineEntry.user_id == user_id)
+    latest = (
+        select(literal(user_id), Tweet.id, Tweet.user_id, Tweet.timestamp)
+        .where(Tweet.user_id == author_id)
+        .where(Tweet.id.not_in(already))
+        .order_by(Tweet.timestamp.desc(), Tweet.id.desc())
+        .limit(limit)
+    )
+    db.session.execute(
+        insert(TimelineEntry).from_select(
+            ['user_id', 'tweet_id', 'author_id', 'timestamp'], latest
+        )
+    )
+    trim(user_id)
+
+
+def prune(user_id, author_id):
+    """Retire les tweets de `author_id` de la timeline de `user_id` (après un unfollow)."""
+    db.session.execute(
+        delete(TimelineEntry)
+        .where(TimelineEntry.user_id == user_id)
+        .where(TimelineEntry.author_id == author_id)
+    )
+
+
+def remove_tweet(tweet_id):
+    """Supprime un tweet de toutes les timelines."""
+    db.session.execute(delete(TimelineEntry).where(TimelineEntry.tweet_id == tweet_id))
+
+
+def trim(user_id):
+    """Borne la timeline d'un utilisateur à TIMELINE_MAX_LENGTH entrées."""
+    _trim(select(literal(user_id)))
+
+
+def _trim(owners):
+    """Borne les timelines des utilisateurs renvoyés par `owners` (une colonne d'ids).
+
+    Pour chaque timeline, la date de la N-ième entrée la plus récente est lue
+    par l'index (user_id, timestamp) avec LIMIT 1 OFFSET N-1, puis seules les
+    entrées plus anciennes sont parcourues et supprimées : rien à lire en
+    dehors de ces deux bornes. À date égale avec la N-ième, une entrée est
+    gardée (dépassement de quelques lignes au plus).
+    """
+    owners = owners.subquery()
+    owner = owners.c[0]
+    entry, nth = aliased(TimelineEntry), aliased(TimelineEntry)
+    cutoff = (
+        select(nth.timestamp)
+        .where(nth.user_id == owner)
+        .order_by(nth.timestamp.desc())
+        .limit(1)
+        .offset(_max_length() - 1)
+        .scalar_subquery()
+    )
+    overflow = select(entry.id).select_from(owners).join(
+        entry, and_(entry.user_id == owner, entry.timestamp < cutoff)
+    )
+    db.session.execute(delete(TimelineEntry).where(TimelineEntry.id.in_(overflow)))
+
+
+def home_query(user_id):
+    """Tweets de la timeline de `user_id`, déjà triés du plus récent au plus ancien."""
+    return (
+        Tweet.query
+        .join(TimelineEntry, TimelineEntry.tweet_id == Tweet.id)
+        .filter(TimelineEntry.user_id == user_id)
+        .order_by(TimelineEntry.timestamp.desc(), TimelineEntry.tweet_id.desc())
+    )
+
+
+def rebuild(user_id):
+    """Reconstruit entièrement la timeline d'un utilisateur (bases existantes, réparation)."""
+    db.session.execute(delete(TimelineEntry).where(TimelineEntry.user_id == user_id))
+    backfill(user_id, user_id)
+    followed_ids = db.session.execute(
+        select(followers.c.followed_id).where(followers.c.follower_id == user_id)
+    ).scalars().all()
+    for author_id in set(followed_ids):
+        backfill(user_id, author_id)
+
+
+@click.command('rebuild-timelines')
+@with_appcontext
+def rebuild_timelines_command():
+    """Recalcule les timelines de tous les utilisateurs."""
+    from .models import User
+    user_ids = db.session.execute(select(User.id)).scalars().all()
+    for user_id in user_ids:
+        rebuild(user_id)
+    db.session.commit()
+    click.echo(f"{len(user_ids)} timelines rebuilt.")
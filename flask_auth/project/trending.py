@@ -0,0 +1,244 @@
+# trending.py
+#
+# Hashtags tendance sur fenêtres glissantes (1h, 24h), en mémoire.
+#
+# Chaque fenêtre est un anneau de seaux de temps (une minute pour 1h, un
+# quart d'heure pour 24h) contenant le nombre de mentions par tag, plus un
+# total courant : publier un tweet ajoute ses tags au seau courant et au
+# total, et un seau sorti de la fenêtre est retranché du total avant d'être
+# réutilisé. Le top-K est recalculé au plus toutes les TRENDING_CACHE_TTL
+# secondes ; une lecture se contente de le copier (O(K)).
+#
+# L'index est alimenté par main.tweet (tags extraits par hashtags.py). Son
+# état est sauvegardé en base toutes les TRENDING_SNAPSHOT_INTERVAL
+# secondes, à la publication comme à la lecture (top()) : un worker qui ne
+# publie rien rattrape quand même la base et rafraîchit l'instantané. Il est
+# relu au démarrage, complété par les tweets publiés depuis
+# l'instantané ; sans sauvegarde, il est reconstruit par un recomptage
+# exact sur les dernières 24h.
+#
+# Plusieurs workers partagent l'instantané, mais chacun ne voit en direct
+# que ses propres tweets. Le filigrane `rebuilt_upto` signifie donc : tous
+# les tweets d'id inférieur ou égal, de tous les workers, sont comptés.
+# Seul catch_up() (relecture en base) l'avance ; les tweets comptés en
+# direct au-delà sont gardés à part (`pending`) pour ne pas être comptés
+# deux fois. save() rattrape la base avant d'écrire : l'instantané d'un
+# worker contient aussi les tweets des autres jusqu'à son filigrane.
+# On suppose que les id sont attribués dans l'ordre des commits (vrai avec
+# SQLite, qui sérialise les écritures).
+
+import heapq
+import json
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import select
+
+from . import db
+from .models import Hashtag, Tweet, TrendingSnapshot, tweet_hashtag
+
+# nom -> (durée, taille d'un seau), en secondes
+WINDOWS = {
+    '1h': (3600, 60),
+    '24h': (86400, 900),
+}
+
+TOP_K = 10
+
+
+def epoch_seconds(dt):
+    return dt.replace(tzinfo=timezone.utc).timestamp()
+
+
+class Window:
+    """Anneau de seaux couvrant `span` secondes, par pas de `bucket` secondes."""
+
+    def __init__(self, span, bucket):
+        self.bucket = bucket
+        self.size = span // bucket
+        self.slots = [Counter() for _ in range(self.size)]
+        self.epochs = [None] * self.size   # n° de seau occupant chaque case
+        self.totals = Counter()
+        self.head = None                   # n° du seau le plus récent vu
+
+    def _advance(self, b):
+        """Fait glisser la fenêtre jusqu'au seau b en vidant les seaux expirés."""
+        if self.head is not None and b <= self.head:
+            return
+        start = b - self.size + 1 if self.head is None else max(self.head + 1, b - self.size + 1)
+        for old in range(start, b + 1):
+            i = old % self.size
+            if self.epochs[i] is not None:
+                self.totals.subtract(self.slots[i])
+                self.slots[i].clear()
+            self.epochs[i] = old
+        self.head = b
+        self.totals = +self.totals  # retire les compteurs tombés à zéro
+
+    def add(self, tags, ts):
+        b = int(ts // self.bucket)
+        self._advance(b)
+        if b <= self.head - self.size:
+            return  # trop ancien pour la fenêtre
+        i = b % self.size
+        for tag in tags:
+            self.slots[i][tag] += 1
+            self.totals[tag] += 1
+
+    def top(self, k, now):
+        self._advance(int(now // self.bucket))
+        return heapq.nlargest(k, self.totals.items(), key=lambda kv: (kv[1], kv[0]))
+
+    def dump(self):
+        return {'head': self.head,
+                'slots': [[e, dict(c)] for e, c in zip(self.epochs, self.slots) if e is not None and c]}
+
+    def load(self, data):
+        self.head = data['head']
+        for epoch, counts in data['slots']:
+            i = epoch % self.size
+            self.epochs[i] = epoch
+            self.slots[i] = Counter(counts)
+            self.totals.update(counts)
+
+
+class TrendingIndex:
+    def __init__(self, cache_ttl=10, windows=WINDOWS):
+        self.cache_ttl = cache_ttl
+        self.windows = {name: Window(*spec) for name, spec in windows.items()}
+        self._cache = {}    # (nom, k) -> (time.monotonic(), [(tag, n)])
+        self._lock = threading.Lock()
+        self.last_snapshot = time.monotonic()
+        self.rebuilt_upto = 0   # tous les tweets d'id <= sont comptés (relus en base)
+        self.pending = set()    # ids > rebuilt_upto déjà comptés en direct
+
+    def record(self, tags, ts, tweet_id=None):
+        if not tags:
+            return
+        with self._lock:
+            if tweet_id is not None:
+                if tweet_id <= self.rebuilt_upto or tweet_id in self.pending:
+                    return
+                self.pending.add(tweet_id)
+            for window in self.windows.values():
+                window.add(tags, ts)
+
+    def catch_up(self, tweets, upto):
+        """Compte les tweets relus en base [(id, ts, tags)] puis avance le filigrane à `upto`."""
+        with self._lock:
+            for tweet_id, ts, tags in tweets:
+                if tweet_id <= self.rebuilt_upto or tweet_id in self.pending:
+                    continue
+                for window in self.windows.values():
+                    window.add(tags, ts)
+            self.rebuilt_upto = max(self.rebuilt_upto, upto)
+            self.pending = {i for i in self.pending if i > self.rebuilt_upto}
+
+    def top(self, window, k=TOP_K, now=None):
+        """[(tag, nb de mentions)] les plus cités dans la fenêtre."""
+        key = (window, k)
+        cached = self._cache.get(key)
+        if now is None and cached and time.monotonic() - cached[0] < self.cache_ttl:
+            return cached[1]
+        with self._lock:
+            result = self.windows[window].top(k, time.time() if now is None else now)
+        if now is None:
+            self._cache[key] = (time.monotonic(), result)
+        return result
+
+    def dump(self):
+        with self._lock:
+            return {name: dict(w.dump(), last_tweet_id=self.rebuilt_upto)
+                    for name, w in self.windows.items()}
+
+    def load(self, state):
+        with self._lock:
+            for name, data in state.items():
+                if name in self.windows:
+                    self.windows[name].load(data)
+            self.rebuilt_upto = min((d.get('last_tweet_id', 0) for d in state.values()), default=0)
+
+
+# ====================
+# Persistance
+# ====================
+def save(index):
+    """Écrit l'état de toutes les fenêtres (une ligne par fenêtre), après rattrapage de la base."""
+    rebuild(index)
+    now = datetime.utcnow()
+    for name, data in index.dump().items():
+        db.session.merge(TrendingSnapshot(window=name, payload=json.dumps(data), taken_at=now))
+    db.session.commit()
+    index.last_snapshot = time.monotonic()
+
+
+def rebuild(index, now=None):
+    """Recompte exact des mentions des dernières 24h postérieures au filigrane de l'index.
+
+    Sur un index vide, c'est la reconstruction à froid ; après load(), cela
+    rattrape les tweets publiés depuis l'instantané ; ensuite, ceux des
+    autres workers.
+    """
+    now = now or datetime.utcnow()
+    span = max(s for s, _ in WINDOWS.values())
+    rows = db.session.execute(
+        select(Hashtag.tag, Tweet.timestamp, Tweet.id)
+        .select_from(tweet_hashtag)
+        .join(Tweet, Tweet.id == tweet_hashtag.c.tweet_id)
+        .join(Hashtag, Hashtag.id == tweet_hashtag.c.hashtag_id)
+        .where(Tweet.timestamp >= now - timedelta(seconds=span), Tweet.id > index.rebuilt_upto)
+        .order_by(Tweet.timestamp)
+    ).all()
+    tweets = {}
+    for tag, ts, tweet_id in rows:
+        tweets.setdefault(tweet_id, (epoch_seconds(ts), []))[1].append(tag)
+    upto = max(tweets, default=index.rebuilt_upto)
+    index.catch_up([(i, ts, tags) for i, (ts, tags) in tweets.items()], upto)
+
+
+def get_index():
+    ext = current_app.extensions
+    if 'trending' not in ext:
+        index = TrendingIndex(current_app.config.get('TRENDING_CACHE_TTL', 10))
+        snapshots = TrendingSnapshot.query.filter(TrendingSnapshot.window.in_(WINDOWS)).all()
+        if snapshots:
+            index.load({s.window: json.loads(s.payload) for s in snapshots})
+        rebuild(index)
+        ext.setdefault('trending', index)
+    return ext['trending']
+
+
+def _save_if_due(index):
+    interval = current_app.config.get('TRENDING_SNAPSHOT_INTERVAL', 60)
+    if time.monotonic() - index.last_snapshot > interval:
+        save(index)
+
+
+def record(tweet, tags):
+    """Ajoute les tags d'un tweet publié ; sauvegarde l'état si le dernier instantané est ancien."""
+    index = get_index()
+    index.record(tags, epoch_seconds(tweet.timestamp), tweet.id)
+    _save_if_due(index)
+
+
+def top(window, k=TOP_K):
+    """Top-K de la fenêtre pour les pages ; sauvegarde aussi si l'instantané est ancien."""
+    index = get_index()
+    _save_if_due(index)
+    return index.top(window, k)
+
+
+@click.command('rebuild-trending')
+@with_appcontext
+def rebuild_trending_command():
+    """Recalcule les tendances depuis la base et remplace l'instantané."""
+    index = TrendingIndex(current_app.config.get('TRENDING_CACHE_TTL', 10))
+    rebuild(index)
+    save(index)
+    current_app.extensions['trending'] = index
+    click.echo(", ".join(f"#{t} ({n})" for t, n in index.top('24h', now=time.time())) or "No hashtags.")
@@ -0,0 +1,121 @@
+# validators.py
+#
+# GET conditionnels (ETag / Last-Modified) pour les pages de tweets.
+#
+# Chaque ressource a une version peu coûteuse à lire, stockée en base pour
+# être partagée par tous les workers :
+#   - un auteur : User.content_version / content_updated_at, incrémentés
+#     quand il publie ou supprime un tweet, qu'un de ses tweets est aimé ou
+#     commenté, qu'il change de bio ou que son graphe de follow bouge ;
+#   - un hashtag : Hashtag.version / updated_at, pour les mêmes évènements
+#     sur les tweets qui le portent ;
+#   - le fil d'accueil : les versions de l'ensemble suivi (et du lecteur).
+# Les écritures appellent touch_*() dans leur propre transaction.
+#
+# Une vue calcule d'abord son validateur (une requête indexée), répond 304
+# via not_modified() si le client a déjà cette version, et sinon seulement
+# exécute ses requêtes et le rendu Jinja, puis send() ajoute les en-têtes.
+# L'ETag dépend aussi du lecteur, de l'URL et d'un sel de déploiement
+# (templates, RENDER_VERSION). Une page qui affiche un message flash n'a pas
+# de validateur : le message ne doit pas resservir depuis le cache.
+
+import hashlib
+from collections import namedtuple
+from datetime import datetime, timezone
+
+from flask import current_app, make_response, request, session
+from sqlalchemy import select, update
+
+from . import db
+from .models import Hashtag, User, tweet_hashtag
+from .render import template_salt
+
+Validator = namedtuple('Validator', 'etag last_modified')
+
+
+# ====================
+# Écritures
+# ====================
+def touch_authors(*user_ids):
+    db.session.execute(
+        update(User)
+        .where(User.id.in_(set(user_ids)))
+        .values(content_version=User.content_version + 1, content_updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+
+
+def touch_tweet(tweet):
+    """Le tweet a changé (publication, suppression, like, commentaire) : son auteur et ses hashtags."""
+    touch_authors(tweet.user_id)
+    db.session.execute(
+        update(Hashtag)
+        .where(Hashtag.id.in_(select(tweet_hashtag.c.hashtag_id).where(tweet_hashtag.c.tweet_id == tweet.id)))
+        .values(version=Hashtag.version + 1, updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+
+
+# ====================
+# Lectures
+# ====================
+def _validator(kind, viewer_id, versions, last_modified, extra=(), shows_flashes=True):
+    if shows_flashes and session.get('_flashes'):
+        return None
+    key = repr((template_salt(), viewer_id, request.full_path, sorted(versions), extra))
+    return Validator(f'{kind}-{hashlib.sha1(key.encode()).hexdigest()[:20]}', last_modified)
+
+
+def for_authors(kind, viewer_id, user_ids, extra=(), shows_flashes=True):
+    """Validateur d'une page qui n'affiche que des tweets de `user_ids`.
+
+    shows_flashes=False pour une réponse qui n'affiche pas les messages flash (API JSON).
+    """
+    rows = db.session.execute(
+        select(User.id, User.content_version, User.content_updated_at).where(User.id.in_(set(user_ids)))
+    ).all()
+    if not rows:
+        return None
+    stamps = [r.content_updated_at for r in rows if r.content_updated_at]
+    return _validator(kind, viewer_id, [(r.id, r.content_version) for r in rows],
+                      max(stamps, default=None), extra, shows_flashes)
+
+
+def for_hashtag(viewer_id, tag, shows_flashes=True):
+    row = db.session.execute(select(Hashtag.version, Hashtag.updated_at).where(Hashtag.tag == tag)).first()
+    version, updated_at = row if row else (0, None)
+    return _validator('h', viewer_id, [(tag, version)], updated_at, shows_flashes=shows_flashes)
+
+
+# ====================
+# Réponses
+# ====================
+def not_modified(validator):
+    """Réponse 304 si le client a déjà cette version de la page, sinon None."""
+    if validator is None:
+        return None
+    if request.if_none_match:
+        # comparaison faible : la version compressée (compress.py) a un ETag faible
+        fresh = request.if_none_match.contains_weak(validator.etag)
+    elif request.if_modified_since and validator.last_modified:
+        fresh = _http_date(validator.last_modified) <= request.if_modified_since
+    else:
+        fresh = False
+    if not fresh:
+        return None
+    return send(current_app.response_class(status=304), validator)
+
+
+def send(body, validator):
+    resp = make_response(body)
+    resp.headers['Cache-Control'] = 'private, no-cache'
+    if validator is not None:
+        resp.set_etag(validator.etag)
+        if validator.last_modified:
+            resp.last_modified = _http_date(validator.last_modified)
+    return resp
+
+
+def _http_date(dt):
+    # les dates HTTP sont à la seconde, en UTC
+    return dt.replace(microsecond=0, tzinfo=timezone.utc)
@@ -1,6 +1,8 @@
 # conftest.py
 import tempfile
+from contextlib import contextmanager
 import pytest
+from sqlalchemy import event
 
 from flask_auth.project import create_app, db
 
@@ -16,19 +18,27 @@ if ROOT not in sys.path:
 def app():
     # App de test avec base SQLite temporaire
     db_fd, db_path = tempfile.mkstemp()
-    app = create_app()
-    app.config.update(
+    # config passée à la factory : le moteur SQL est créé directement sur la base de test
+    app = create_app(dict(
         TESTING=True,
         WTF_CSRF_ENABLED=False,   # faciliter les POST dans les tests
         SQLALCHEMY_DATABASE_URI=f"sqlite:///{db_path}",
         SQLALCHEMY_TRACK_MODIFICATIONS=False,
         SERVER_NAME="localhost",  # utile pour url_for dans tests
         SECRET_KEY="test-secret",
-    )
+        PASSWORD_HASH_METHOD="pbkdf2:sha256:1000",  # même coût que les helpers des tests
+        DB_AUTO_UPGRADE=False,    # schéma créé ci-dessous
+    ))
     with app.app_context():
         db.create_all()
     yield app
     # Teardown
+    pipeline = app.extensions.get("notifications")
+    if pipeline is not None:
+        pipeline.shutdown()
+    hasher = app.extensions.get("hasher")
+    if hasher is not None:
+        hasher.shutdown()
     with app.app_context():
         db.session.remove()
         db.drop_all()
@@ -41,4 +51,36 @@ def client(app):
 
 @pytest.fixture
 def runner(app):
-    return app.test_cli_runner()
\ No newline at end of file
+    return app.test_cli_runner()
+
+# ------------------------
+# Capture des requêtes SQL
+# ------------------------
+@contextmanager
+def capture_sql(app, listener):
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        yield
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+@pytest.fixture
+def statements(app):
+    """Texte de chaque requête SQL exécutée par l'app pendant le test."""
+    seen = []
+    with capture_sql(app, lambda conn, cursor, statement, params, context, executemany: seen.append(statement)):
+        yield seen
+
+@pytest.fixture
+def queries(app):
+    """(requête, paramètres) des requêtes simples (hors executemany), pour EXPLAIN."""
+    captured = []
+
+    def before(conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            captured.append((statement, parameters))
+
+    with capture_sql(app, before):
+        yield captured
@@ -0,0 +1,130 @@
+# flask_auth/tests/test_api.py
+import pytest
+from werkzeug.security import generate_password_hash
+from flask_auth.project import db
+from flask_auth.project.models import User, Tweet
+
+# ------------------------
+# Helpers
+# ------------------------
+def create_user(app, email="alice@example.com", name="Alice", password="Abcdef1!"):
+    with app.app_context():
+        user = User(
+            email=email,
+            name=name,
+            password=generate_password_hash(password, method="pbkdf2:sha256:1000")
+        )
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+def login(client, email="alice@example.com", password="Abcdef1!"):
+    return client.post("/login", data={"email": email, "password": password}, follow_redirects=True)
+
+def switch_to(client, email):
+    client.get("/logout")
+    login(client, email=email)
+
+def post_tweets(client, *contents):
+    for content in contents:
+        client.post("/tweet", data={"content": content})
+
+def ids(resp):
+    return [item["id"] for item in resp.get_json()["items"]]
+
+@pytest.fixture
+def alice_follows_bob(app, client):
+    app.config["NOTIFICATIONS_ASYNC"] = False
+    alice = create_user(app)
+    bob = create_user(app, email="bob@example.com", name="Bob")
+    login(client, email="bob@example.com")
+    post_tweets(client, "bob 1 #news", "bob 2")
+    switch_to(client, "alice@example.com")
+    client.post(f"/follow/{bob}")
+    post_tweets(client, "alice 1 #news")
+    return alice, bob
+
+# ------------------------
+# Fils de tweets
+# ------------------------
+def test_home_projection(app, client, alice_follows_bob):
+    alice, bob = alice_follows_bob
+    with app.app_context():
+        bob_tweet = Tweet.query.filter_by(content="bob 2").one().id
+    client.post(f"/like/{bob_tweet}")
+
+    data = client.get("/api/home").get_json()
+    assert [t["content"] for t in data["items"]] == ["alice 1 #news", "bob 2", "bob 1 #news"]
+    assert data["next_cursor"] is None
+    first = data["items"][1]
+    assert set(first) == {"id", "content", "created_at", "author", "like_count", "comment_count", "liked"}
+    assert first["author"] == {"id": bob, "name": "Bob"}
+    assert first["like_count"] == 1 and first["liked"] is True
+    assert data["items"][2]["liked"] is False
+
+def test_cursor_pages_without_gaps(app, client, alice_follows_bob):
+    seen, url = [], "/api/home?limit=2"
+    while url:
+        data = client.get(url).get_json()
+        seen += [t["id"] for t in data["items"]]
+        url = data["next_cursor"] and f"/api/home?limit=2&cursor={data['next_cursor']}"
+    assert seen == ids(client.get("/api/home")) and len(seen) == 3
+
+def test_since_id_returns_only_newer_items(app, client, alice_follows_bob):
+    newest = ids(client.get("/api/home"))[0]
+    assert ids(client.get(f"/api/home?since_id={newest}")) == []
+    post_tweets(client, "alice 2", "alice 3", "alice 4")
+    delta = client.get(f"/api/home?since_id={newest}&limit=2").get_json()
+    assert len(delta["items"]) == 2 and all(t["id"] > newest for t in delta["items"])
+    rest = client.get(f"/api/home?since_id={newest}&limit=2&cursor={delta['next_cursor']}").get_json()
+    assert len(rest["items"]) == 1 and rest["next_cursor"] is None
+
+def test_unchanged_feed_is_not_modified(app, client, alice_follows_bob):
+    alice, bob = alice_follows_bob
+    for url in ["/api/home", f"/api/users/{bob}/tweets", "/api/hashtags/news"]:
+        etag = client.get(url).headers["ETag"]
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    etag = client.get("/api/home").headers["ETag"]
+    post_tweets(client, "something new")
+    assert client.get("/api/home", headers={"If-None-Match": etag}).status_code == 200
+
+def test_user_tweets_and_hashtags(app, client, alice_follows_bob):
+    alice, bob = alice_follows_bob
+    assert [t["content"] for t in client.get(f"/api/users/{bob}/tweets").get_json()["items"]] == ["bob 2", "bob 1 #news"]
+    assert client.get("/api/users/999/tweets").status_code == 404
+    assert client.get("/api/hashtags/unknown").get_json() == {"items": [], "next_cursor": None}
+
+    client.get("/logout")
+    data = client.get("/api/hashtags/news").get_json()  # public, sans `liked`
+    assert [t["content"] for t in data["items"]] == ["alice 1 #news", "bob 1 #news"]
+    assert "liked" not in data["items"][0]
+
+# ------------------------
+# Notifications
+# ------------------------
+def test_notifications(app, client, alice_follows_bob):
+    alice, bob = alice_follows_bob
+    switch_to(client, "bob@example.com")
+    data = client.get("/api/notifications").get_json()
+    assert [(n["type"], n["actor"]["name"]) for n in data["items"]] == [("follow", "Alice")]
+    newest = data["items"][0]["id"]
+
+    with app.app_context():
+        tweet_id = Tweet.query.filter_by(content="bob 2").one().id
+    switch_to(client, "alice@example.com")
+    client.post(f"/comment/{tweet_id}", data={"comment_content": "hi"})
+    switch_to(client, "bob@example.com")
+    delta = client.get(f"/api/notifications?since_id={newest}").get_json()["items"]
+    assert [(n["type"], n["tweet_id"], n["payload"]["comment"]) for n in delta] == [("comment", tweet_id, "hi")]
+
+# ------------------------
+# Erreurs
+# ------------------------
+def test_errors_are_json(app, client):
+    resp = client.get("/api/home")
+    assert resp.status_code == 401 and resp.get_json()["status"] == 401
+    create_user(app)
+    login(client)
+    resp = client.get("/api/home?since_id=abc")
+    assert resp.status_code == 400 and resp.is_json
+    assert client.get("/api/home?cursor=!!!").status_code == 400
@@ -0,0 +1,81 @@
+# flask_auth/tests/test_assets.py
+import os
+import re
+from werkzeug.security import generate_password_hash
+from flask_auth.project import db
+from flask_auth.project.models import User
+
+# ------------------------
+# Helpers
+# ------------------------
+def create_user(app, email="alice@example.com", name="Alice", password="Abcdef1!"):
+    with app.app_context():
+        user = User(
+            email=email,
+            name=name,
+            password=generate_password_hash(password, method="pbkdf2:sha256:1000")
+        )
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+def login(client, email="alice@example.com", password="Abcdef1!"):
+    return client.post("/login", data={"email": email, "password": password}, follow_redirects=True)
+
+def stylesheets(html):
+    return re.findall(r'<link rel="stylesheet" href="(/assets/[^"]+)"', html)
+
+# ------------------------
+# Taille des pages
+# ------------------------
+def test_feed_does_not_ship_css_per_card(app, client):
+    app.config["PAGE_SIZE"] = 50
+    create_user(app)
+    login(client)
+    empty = client.get("/home").data.decode()
+    for i in range(50):
+        client.post("/tweet", data={"content": f"tweet {i} #topic{i % 5}"})
+    feed = client.get("/home").data.decode()
+
+    assert "<style>" not in feed
+    assert len(stylesheets(feed)) == 2  # base.css + cards.css
+    # ~2,3 Ko par carte et ~15 Ko de page vide avec les styles en ligne
+    assert len(empty) < 8 * 1024
+    assert (len(feed) - len(empty)) / 50 < 1200
+
+def test_pages_without_cards_only_load_base_css(app, client):
+    html = client.get("/login").data.decode()
+    assert [url.split("/")[-1].split(".")[0] for url in stylesheets(html)] == ["base"]
+
+# ------------------------
+# Fichiers versionnés
+# ------------------------
+def test_fingerprinted_asset_is_cached_forever(app, client):
+    with app.test_request_context():
+        url = app.jinja_env.globals["asset_url"]("css/base.css")
+    assert re.fullmatch(r"/assets/css/base\.[0-9a-f]{12}\.css", url)
+    resp = client.get(url)
+    assert resp.status_code == 200 and resp.mimetype == "text/css"
+    assert resp.cache_control.max_age == 365 * 24 * 3600
+    assert resp.cache_control.public and resp.cache_control.immutable
+
+def test_stale_or_unknown_fingerprints(app, client):
+    stale = client.get("/assets/css/base.000000000000.css")
+    assert stale.status_code == 200 and stale.cache_control.max_age == 0
+    assert not stale.cache_control.immutable
+    assert client.get("/assets/css/missing.000000000000.css").status_code == 404
+    assert client.get("/assets/css/base.css").status_code == 404
+    assert client.get("/assets/css.000000000000").status_code == 404
+    assert client.get("/assets/../__init__.000000000000.py").status_code == 404
+
+def test_fingerprint_follows_content(app, tmp_path):
+    (tmp_path / "app.css").write_text("body { color: red; }")
+    app.static_folder = str(tmp_path)
+    app.debug = True
+    asset_url = app.jinja_env.globals["asset_url"]
+    with app.test_request_context():
+        before = asset_url("app.css")
+        assert asset_url("app.css") == before
+        (tmp_path / "app.css").write_text("body { color: blue; }")
+        os.utime(tmp_path / "app.css", ns=(0, 10**9))  # date différente même sur un FS peu précis
+        assert asset_url("app.css") != before
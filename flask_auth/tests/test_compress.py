@@ -0,0 +1,108 @@
+# flask_auth/tests/test_compress.py
+import gzip
+import zlib
+from flask import Response, stream_with_context
+from werkzeug.datastructures import Accept
+from werkzeug.http import parse_accept_header
+from werkzeug.security import generate_password_hash
+from flask_auth.project import db
+from flask_auth.project.compress import negotiate
+from flask_auth.project.models import User
+
+GZIP = {"Accept-Encoding": "gzip, deflate"}
+
+# ------------------------
+# Helpers
+# ------------------------
+def create_user(app, email="alice@example.com", name="Alice", password="Abcdef1!"):
+    with app.app_context():
+        user = User(
+            email=email,
+            name=name,
+            password=generate_password_hash(password, method="pbkdf2:sha256:1000")
+        )
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+def login(client, email="alice@example.com", password="Abcdef1!"):
+    return client.post("/login", data={"email": email, "password": password}, follow_redirects=True)
+
+def seeded_feed(app, client, tweets=30):
+    create_user(app)
+    login(client)
+    for i in range(tweets):
+        client.post("/tweet", data={"content": f"tweet {i} #topic{i % 5}"})
+    client.get("/profile")  # consomme le message flash
+
+def accept(value):
+    return parse_accept_header(value)
+
+# ------------------------
+# Négociation
+# ------------------------
+def test_feed_is_gzipped(app, client):
+    seeded_feed(app, client)
+    plain = client.get("/home")
+    resp = client.get("/home", headers=GZIP)
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in resp.headers["Vary"] and "Accept-Encoding" in plain.headers["Vary"]
+    assert int(resp.headers["Content-Length"]) == len(resp.data)
+    assert gzip.decompress(resp.data) == plain.data
+    assert len(resp.data) * 5 < len(plain.data)
+
+def test_identity_when_refused_or_small(app, client):
+    seeded_feed(app, client, tweets=1)
+    assert "Content-Encoding" not in client.get("/home", headers={"Accept-Encoding": "gzip;q=0"}).headers
+    small = client.get("/notifications/count", headers=GZIP)
+    assert "Content-Encoding" not in small.headers
+    assert "Accept-Encoding" not in small.headers.get("Vary", "")
+    app.config["COMPRESS_ENABLED"] = False
+    assert "Content-Encoding" not in client.get("/home", headers=GZIP).headers
+
+def test_only_allowed_types(app, client):
+    @app.route("/blob")
+    def blob():
+        return Response(b"\x00" * 10000, mimetype="image/png")
+    assert "Content-Encoding" not in client.get("/blob", headers=GZIP).headers
+
+def test_preference_and_quality():
+    codecs = {"gzip": object, "br": object, "zstd": object}
+    assert negotiate(accept("gzip, br, zstd"), codecs) == "br"
+    assert negotiate(accept("gzip, br;q=0.5"), codecs) == "gzip"
+    assert negotiate(accept("gzip, br"), {"gzip": object}) == "gzip"
+    assert negotiate(accept("*"), {"gzip": object}) == "gzip"
+    assert negotiate(accept("identity"), codecs) is None
+    assert negotiate(Accept(), codecs) is None
+
+# ------------------------
+# Validateurs et flux
+# ------------------------
+def test_compressed_etag_is_weak_and_still_revalidates(app, client):
+    seeded_feed(app, client)
+    resp = client.get("/profile", headers=GZIP)
+    etag = resp.headers["ETag"]
+    assert etag.startswith('W/"')
+    assert client.get("/profile", headers={**GZIP, "If-None-Match": etag}).status_code == 304
+
+def test_streamed_response_is_compressed_chunk_by_chunk(app, client):
+    produced = []
+
+    @app.route("/stream")
+    def streamed():
+        def chunks():
+            for i in range(3):
+                produced.append(i)
+                yield f"<p>part {i}</p>" * 50
+        return Response(stream_with_context(chunks()), mimetype="text/html")
+
+    resp = client.get("/stream", headers=GZIP, buffered=False)
+    assert resp.headers["Content-Encoding"] == "gzip" and "Content-Length" not in resp.headers
+    body = iter(resp.response)
+    inflate = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    first = inflate.decompress(next(body))
+    # le premier morceau est lisible avant que le générateur ait produit la suite
+    assert first.decode() == "<p>part 0</p>" * 50 and produced == [0]
+    rest = b"".join(inflate.decompress(chunk) for chunk in body) + inflate.flush()
+    assert rest.decode() == "<p>part 1</p>" * 50 + "<p>part 2</p>" * 50
+    resp.close()
@@ -0,0 +1,146 @@
+# flask_auth/tests/test_counters.py
+from werkzeug.security import generate_password_hash
+from flask_auth.project import db
+from flask_auth.project.models import User, Tweet, Like, Notification
+from flask_auth.project.counters import recount, recount_unread, unread
+from flask_auth.project.notify import get_pipeline
+
+# ------------------------
+# Helpers
+# ------------------------
+def create_user(app, email="alice@example.com", name="Alice", password="Abcdef1!"):
+    with app.app_context():
+        user = User(
+            email=email,
+            name=name,
+            password=generate_password_hash(password, method="pbkdf2:sha256:1000")
+        )
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+def login(client, email="alice@example.com", password="Abcdef1!"):
+    return client.post("/login", data={"email": email, "password": password}, follow_redirects=True)
+
+def create_tweet(app, user_id, content="hello"):
+    with app.app_context():
+        tweet = Tweet(content=content, user_id=user_id)
+        db.session.add(tweet)
+        db.session.commit()
+        return tweet.id
+
+def counts(app, tweet_id):
+    with app.app_context():
+        tweet = db.session.get(Tweet, tweet_id)
+        return tweet.like_count, tweet.comment_count
+
+# ------------------------
+# Mise à jour transactionnelle
+# ------------------------
+def test_like_and_unlike_update_counter(app, client):
+    alice = create_user(app)
+    tweet_id = create_tweet(app, alice)
+    login(client)
+
+    client.post(f"/like/{tweet_id}")
+    assert counts(app, tweet_id) == (1, 0)
+
+    client.post(f"/like/{tweet_id}")
+    assert counts(app, tweet_id) == (0, 0)
+
+def test_comment_updates_counter(app, client):
+    alice = create_user(app)
+    tweet_id = create_tweet(app, alice)
+    login(client)
+
+    client.post(f"/comment/{tweet_id}", data={"comment_content": "nice"})
+    client.post(f"/comment/{tweet_id}", data={"comment_content": ""})  # refusé
+    assert counts(app, tweet_id) == (0, 1)
+
+def test_ranked_feed_favours_liked_tweets(app, client):
+    create_user(app)
+    login(client)
+    client.post("/tweet", data={"content": "popular-tweet"})
+    client.post("/tweet", data={"content": "quiet-tweet"})  # plus récent mais sans like
+    with app.app_context():
+        popular = Tweet.query.filter_by(content="popular-tweet").first().id
+    client.post(f"/like/{popular}")
+
+    html = client.get("/home?sort=ranked").data.decode()
+    assert html.index("popular-tweet") < html.index("quiet-tweet")
+
+def test_unread_counter_follows_notifications(app, client):
+    alice = create_user(app)
+    bob = create_user(app, "bob@example.com", "Bob")
+    tweet_id = create_tweet(app, alice)
+    login(client, "bob@example.com")
+    client.post(f"/follow/{alice}")
+    client.post(f"/comment/{tweet_id}", data={"comment_content": "nice"})
+    with app.app_context():
+        get_pipeline().flush()
+        assert unread(alice)[0] == 2
+        notif_id = Notification.query.filter_by(type="comment").one().id
+
+    login(client)
+    client.post(f"/notifications/{notif_id}/read")
+    client.post(f"/notifications/{notif_id}/read")  # déjà lue : pas de double décompte
+    with app.app_context():
+        assert unread(alice)[0] == 1
+    client.post("/notifications/mark_all_read")
+    with app.app_context():
+        assert unread(alice)[0] == 0
+
+def test_count_endpoint_is_conditional(app, client):
+    alice = create_user(app)
+    bob = create_user(app, "bob@example.com", "Bob")
+    login(client)
+    resp = client.get("/notifications/count")
+    assert resp.get_json() == {"unread": 0}
+    etag = resp.headers["ETag"]
+
+    resp = client.get("/notifications/count", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.data == b""
+
+    with app.app_context():
+        db.session.add(Notification(recipient_id=alice, actor_id=bob, type="follow"))
+        recount_unread()
+        db.session.commit()
+    resp = client.get("/notifications/count", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.get_json() == {"unread": 1}
+    assert resp.headers["ETag"] != etag
+
+# ------------------------
+# Réparation
+# ------------------------
+def test_recount_repairs_drift(app):
+    alice = create_user(app)
+    tweet_id = create_tweet(app, alice)
+    with app.app_context():
+        db.session.add(Like(user_id=alice, tweet_id=tweet_id))
+        db.session.get(Tweet, tweet_id).comment_count = 5
+        db.session.commit()
+
+        assert recount() == 1
+        db.session.commit()
+    assert counts(app, tweet_id) == (1, 0)
+
+def test_recount_command(app, runner):
+    alice = create_user(app)
+    create_tweet(app, alice)
+    result = runner.invoke(args=["recount-tweets"])
+    assert "0 tweets fixed." in result.output
+
+def test_recount_unread_repairs_drift(app, runner):
+    alice = create_user(app)
+    bob = create_user(app, "bob@example.com", "Bob")
+    with app.app_context():
+        db.session.add(Notification(recipient_id=alice, actor_id=bob, type="follow"))
+        db.session.add(Notification(recipient_id=alice, actor_id=bob, type="follow", is_read=True))
+        db.session.commit()
+        assert unread(alice)[0] == 0
+    result = runner.invoke(args=["recount-notifications"])
+    assert "1 users fixed." in result.output
+    with app.app_context():
+        assert unread(alice)[0] == 1
@@ -0,0 +1,152 @@
+# flask_auth/tests/test_follow_graph.py
+import pytest
+from werkzeug.security import generate_password_hash
+from flask_auth.project import create_app, db
+from flask_auth.project.models import User, Notification, followers
+from flask_auth.project.follow_graph import FollowGraph, get_graph
+from flask_auth.project.notify import get_pipeline
+
+# ------------------------
+# Helpers
+# ------------------------
+def create_user(app, email, name, password="Abcdef1!"):
+    with app.app_context():
+        user = User(
+            email=email,
+            name=name,
+            password=generate_password_hash(password, method="pbkdf2:sha256:1000")
+        )
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+def login(client, email, password="Abcdef1!"):
+    return client.post("/login", data={"email": email, "password": password}, follow_redirects=True)
+
+@pytest.fixture
+def other_worker(app):
+    # second processus sur la même base, avec son propre index en mémoire
+    other = create_app(dict(app.config))
+    yield other
+    for name in ("notifications", "hasher"):
+        service = other.extensions.get(name)
+        if service is not None:
+            service.shutdown()
+    with other.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+def follows(app, follower_id, followed_id):
+    with app.app_context():
+        return db.session.execute(
+            followers.select()
+            .where(followers.c.follower_id == follower_id)
+            .where(followers.c.followed_id == followed_id)
+        ).first() is not None
+
+# ------------------------
+# Index
+# ------------------------
+def test_graph_is_loaded_lazily_from_association_table(app):
+    alice = create_user(app, "alice@example.com", "Alice")
+    bob = create_user(app, "bob@example.com", "Bob")
+    with app.app_context():
+        db.session.execute(followers.insert().values(follower_id=alice, followed_id=bob))
+        db.session.commit()
+
+        graph = FollowGraph(ttl=60)
+        assert not graph.loaded
+        assert graph.is_following(alice, bob)
+        assert not graph.is_following(bob, alice)
+        assert graph.following(alice) == {bob}
+        assert graph.followers_count(bob) == 1
+
+def test_follow_and_unfollow_routes_keep_graph_consistent(app, client):
+    alice = create_user(app, "alice@example.com", "Alice")
+    bob = create_user(app, "bob@example.com", "Bob")
+    login(client, "alice@example.com")
+
+    client.post(f"/follow/{bob}")
+    with app.app_context():
+        assert get_graph().is_following(alice, bob)
+        assert get_graph().followers(bob) == {alice}
+
+    client.post(f"/unfollow/{bob}")
+    with app.app_context():
+        assert not get_graph().is_following(alice, bob)
+        assert get_graph().followers_count(bob) == 0
+
+def test_delete_follower_updates_graph(app):
+    alice = create_user(app, "alice@example.com", "Alice")
+    bob = create_user(app, "bob@example.com", "Bob")
+    with app.app_context():
+        a, b = db.session.get(User, alice), db.session.get(User, bob)
+        a.follow(b)
+        db.session.commit()
+        assert get_graph().is_following(alice, bob)
+
+        b.delete_follower(a)
+        db.session.commit()
+        assert not get_graph().is_following(alice, bob)
+
+def test_rolled_back_follow_is_not_applied(app):
+    alice = create_user(app, "alice@example.com", "Alice")
+    bob = create_user(app, "bob@example.com", "Bob")
+    with app.app_context():
+        get_graph().following(alice)  # force le chargement
+        a, b = db.session.get(User, alice), db.session.get(User, bob)
+        a.follow(b)
+        db.session.rollback()
+        db.session.commit()
+        assert not get_graph().is_following(alice, bob)
+
+def test_profile_shows_counts_from_graph(app, client):
+    alice = create_user(app, "alice@example.com", "Alice")
+    bob = create_user(app, "bob@example.com", "Bob")
+    login(client, "alice@example.com")
+    client.post(f"/follow/{bob}")
+
+    html = client.get("/profile").data.decode()
+    assert "1 Following" in html
+    html = client.get(f"/profile/{bob}").data.decode()
+    assert "1 Followers" in html
+    assert "Unfollow" in html
+
+def test_writes_do_not_trust_a_stale_graph(app, client, other_worker):
+    alice = create_user(app, "alice@example.com", "Alice")
+    bob = create_user(app, "bob@example.com", "Bob")
+    other = other_worker.test_client()
+    login(other, "alice@example.com")
+    other.get(f"/profile/{bob}")  # le second worker charge son index : pas de follow
+    login(client, "alice@example.com")
+
+    client.post(f"/follow/{bob}")
+    other.post(f"/unfollow/{bob}")  # son index ne connaît pas ce follow
+    assert not follows(app, alice, bob)
+
+    client.post(f"/follow/{bob}")  # l'index du premier worker le croit absent
+    assert other.post(f"/follow/{bob}").status_code == 302  # déjà en base : pas d'IntegrityError
+    assert follows(app, alice, bob)
+    with other_worker.app_context():
+        assert get_graph().is_following(alice, bob)
+
+def test_repeated_follow_notifies_once(app, client, other_worker):
+    alice = create_user(app, "alice@example.com", "Alice")
+    bob = create_user(app, "bob@example.com", "Bob")
+    other = other_worker.test_client()
+    login(client, "alice@example.com")
+    login(other, "alice@example.com")
+
+    resp = client.post(f"/follow/{bob}", follow_redirects=True)
+    assert "You are now following Bob!" in resp.data.decode()
+    with app.app_context():
+        get_pipeline().flush()
+        Notification.query.update({"is_read": True})  # lue : un doublon ne serait plus regroupé
+        db.session.commit()
+    resp = other.post(f"/follow/{bob}", follow_redirects=True)  # déjà suivi, index en retard
+    assert "You are now following" not in resp.data.decode()
+    for worker in (app, other_worker):
+        with worker.app_context():
+            get_pipeline().flush()
+    with app.app_context():
+        assert Notification.query.filter_by(recipient_id=bob, type="follow").count() == 1
@@ -0,0 +1,107 @@
+# flask_auth/tests/test_fragments.py
+import pytest
+from werkzeug.security import generate_password_hash
+from flask_auth.project import db
+from flask_auth.project.models import User, Tweet
+from flask_auth.project.fragments import Fragment, FragmentCache, get_cache
+
+# ------------------------
+# Helpers
+# ------------------------
+def create_user(app, email="alice@example.com", name="Alice", password="Abcdef1!"):
+    with app.app_context():
+        user = User(
+            email=email,
+            name=name,
+            password=generate_password_hash(password, method="pbkdf2:sha256:1000")
+        )
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+def login(client, email="alice@example.com", password="Abcdef1!"):
+    return client.post("/login", data={"email": email, "password": password}, follow_redirects=True)
+
+def switch_to(client, email):
+    client.get("/logout")
+    login(client, email=email)
+
+@pytest.fixture
+def tweet_id(app, client):
+    create_user(app)
+    create_user(app, email="bob@example.com", name="Bob")
+    login(client)
+    client.post("/tweet", data={"content": "hello #news"})
+    with app.app_context():
+        return Tweet.query.one().id
+
+def fragment(parts=("<div>", "<form>x</form>", '<b class="like-btn', '">1</b></div>')):
+    return Fragment(*parts)
+
+# ------------------------
+# Cache dans les pages
+# ------------------------
+def test_cards_are_rendered_once_per_version(app, client, tweet_id, statements):
+    client.get("/profile")
+    statements.clear()
+    html = client.get("/profile").data.decode()
+    assert "hello" in html and 'class="delete-btn"' in html
+    # ni commentaires ni auteurs relus pour une carte déjà rendue
+    assert not [s for s in statements if "FROM comment" in s]
+    with app.app_context():
+        stats = get_cache().stats
+        assert stats["misses"] == 1 and stats["hits"] >= 1
+        assert get_cache().hit_rate > 0
+
+def test_viewer_specific_parts_are_spliced(app, client, tweet_id):
+    client.post(f"/like/{tweet_id}")
+    own = client.get("/hashtag/news").data.decode()
+    assert 'class="delete-btn"' in own and "like-btn liked" in own
+
+    switch_to(client, "bob@example.com")
+    other = client.get("/hashtag/news").data.decode()
+    assert 'class="delete-btn"' not in other and "like-btn liked" not in other
+    assert 'class="like-btn"' in other
+    with app.app_context():
+        assert get_cache().stats["hits"] >= 1
+
+def test_like_and_comment_change_the_version(app, client, tweet_id):
+    client.get("/profile")
+    client.post(f"/like/{tweet_id}")
+    assert '<span class="like-count">1</span>' in client.get("/profile").data.decode()
+    client.post(f"/comment/{tweet_id}", data={"comment_content": "first!"})
+    assert "first!" in client.get("/profile").data.decode()
+
+def test_deleted_tweet_leaves_the_cache(app, client, tweet_id):
+    client.get("/profile")
+    client.post(f"/delete_tweet/{tweet_id}")
+    with app.app_context():
+        assert len(get_cache()) == 0
+
+# ------------------------
+# FragmentCache
+# ------------------------
+def test_splice():
+    f = fragment()
+    assert f.splice() == '<div><b class="like-btn">1</b></div>'
+    assert f.splice(show_delete=True, liked=True) == '<div><form>x</form><b class="like-btn liked">1</b></div>'
+
+def test_eviction_is_by_bytes():
+    size = fragment().size
+    cache = FragmentCache(max_bytes=size * 2)
+    for key in (1, 2, 3):
+        cache.set(key, "v", fragment())
+    assert len(cache) == 2 and cache.bytes == size * 2
+    assert cache.get(1, "v") is None and cache.stats["evictions"] == 1
+    # une nouvelle version remplace l'ancienne
+    cache.set(3, "v2", fragment())
+    assert len(cache) == 2 and cache.get(3, "v") is None and cache.get(3, "v2") is not None
+
+def test_disk_tier_is_shared_and_versioned(tmp_path):
+    FragmentCache(directory=str(tmp_path)).set(7, "v1", fragment())
+    other = FragmentCache(directory=str(tmp_path))  # autre worker
+    assert other.get(7, "v1") == fragment() and other.stats["disk_hits"] == 1
+    assert other.get(7, "v1") is not None and other.stats["hits"] == 1
+    assert FragmentCache(directory=str(tmp_path)).get(7, "v2") is None
+    other.discard(7)
+    assert FragmentCache(directory=str(tmp_path)).get(7, "v1") is None
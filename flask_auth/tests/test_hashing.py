@@ -0,0 +1,99 @@
+# flask_auth/tests/test_hashing.py
+import pytest
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash, check_password_hash
+from flask_auth.project import db
+from flask_auth.project.models import User
+from flask_auth.project.hashing import PasswordHasher, HasherBusy, get_hasher, method_prefix
+
+# ------------------------
+# Helpers
+# ------------------------
+def create_user(app, email="alice@example.com", name="Alice", password="Abcdef1!",
+                method="pbkdf2:sha256:1000"):
+    with app.app_context():
+        user = User(
+            email=email,
+            name=name,
+            password=generate_password_hash(password, method=method)
+        )
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+def login(client, email="alice@example.com", password="Abcdef1!"):
+    return client.post("/login", data={"email": email, "password": password}, follow_redirects=True)
+
+def stored_hash(app, user_id):
+    with app.app_context():
+        return db.session.get(User, user_id).password
+
+# ------------------------
+# Pool de hachage
+# ------------------------
+def test_pool_hashes_in_worker_process():
+    hasher = PasswordHasher("pbkdf2:sha256:1000", workers=1, queue_depth=0)
+    try:
+        hashed = hasher.hash("secret")
+        assert hashed.startswith("pbkdf2:sha256:1000$")
+        assert check_password_hash(hashed, "secret")
+        assert hasher.verify(hashed, "secret") and not hasher.verify(hashed, "nope")
+        assert hasher._pool is not None
+        assert hasher.stats["rejected"] == 0
+    finally:
+        hasher.shutdown()
+
+def test_inline_mode_without_workers():
+    hasher = PasswordHasher("pbkdf2:sha256:1000", workers=0)
+    assert hasher.verify(hasher.hash("secret"), "secret")
+    assert hasher._pool is None
+
+def test_saturated_pool_fails_fast_with_503(app, client):
+    create_user(app)
+    hasher = PasswordHasher("pbkdf2:sha256:1000", workers=1, queue_depth=0)
+    app.extensions["hasher"] = hasher
+    # la seule place est occupée par une autre requête
+    hasher._slots.acquire()
+    with pytest.raises(HasherBusy):
+        hasher.verify("x", "y")
+    resp = client.post("/login", data={"email": "alice@example.com", "password": "Abcdef1!"})
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == "1"
+    assert hasher.stats["rejected"] == 2
+
+    hasher._slots.release()
+    assert login(client).request.path == "/profile"
+
+# ------------------------
+# Paramètres configurables et mise à niveau
+# ------------------------
+def test_signup_uses_configured_method(app, client):
+    app.config["PASSWORD_HASH_METHOD"] = "pbkdf2:sha256:1500"
+    client.post("/signup", data={"email": "new@example.com", "name": "New", "password": "Abcdef1!"})
+    with app.app_context():
+        assert User.query.filter_by(email="new@example.com").one().password.startswith("pbkdf2:sha256:1500$")
+
+def test_login_upgrades_outdated_hash(app, client):
+    alice = create_user(app, method="pbkdf2:sha256:500")
+    assert login(client).request.path == "/profile"
+    upgraded = stored_hash(app, alice)
+    assert upgraded.startswith("pbkdf2:sha256:1000$")
+    with app.app_context():
+        assert get_hasher().stats["rehashed"] == 1
+
+    # connexion suivante : rien à refaire
+    client.get("/logout")
+    assert login(client).request.path == "/profile"
+    assert stored_hash(app, alice) == upgraded
+
+def test_shorthand_methods_are_not_rehashed():
+    hasher = PasswordHasher("scrypt", workers=0)
+    assert not hasher.needs_rehash(hasher.hash("Abcdef1!"))
+    assert hasher.needs_rehash(generate_password_hash("Abcdef1!", method="scrypt:16384:8:1"))
+    assert method_prefix("pbkdf2") == method_prefix("pbkdf2:sha256") == f"pbkdf2:sha256:{DEFAULT_PBKDF2_ITERATIONS}"
+    assert method_prefix("pbkdf2:sha256:1000") == "pbkdf2:sha256:1000"
+
+def test_failed_login_does_not_rehash(app, client):
+    alice = create_user(app, method="pbkdf2:sha256:500")
+    before = stored_hash(app, alice)
+    login(client, password="Wrong1!")
+    assert stored_hash(app, alice) == before
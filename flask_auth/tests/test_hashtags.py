@@ -0,0 +1,94 @@
+# flask_auth/tests/test_hashtags.py
+from werkzeug.security import generate_password_hash
+from flask_auth.project import db
+from flask_auth.project.models import User, Tweet, Comment, Hashtag, tweet_hashtag
+from flask_auth.project.hashtags import extract, index_tweet
+
+# ------------------------
+# Helpers
+# ------------------------
+def create_user(app, email="alice@example.com", name="Alice", password="Abcdef1!"):
+    with app.app_context():
+        user = User(
+            email=email,
+            name=name,
+            password=generate_password_hash(password, method="pbkdf2:sha256:1000")
+        )
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+def login(client, email="alice@example.com", password="Abcdef1!"):
+    return client.post("/login", data={"email": email, "password": password}, follow_redirects=True)
+
+def tags_of(tweet_id):
+    rows = db.session.execute(
+        db.select(Hashtag.tag).join(tweet_hashtag).where(tweet_hashtag.c.tweet_id == tweet_id)
+    )
+    return sorted(rows.scalars())
+
+# ------------------------
+# Extraction
+# ------------------------
+def test_extract_is_ordered_and_distinct():
+    assert extract("#b hello #a #b #café") == ["b", "a", "café"]
+    assert extract("no tags") == []
+    assert extract(None) == []
+
+def test_comment_links_use_same_tokenizer(app):
+    with app.test_request_context():
+        html = Comment(content="see #news").content_with_hashtags
+        assert 'href="/hashtag/news"' in html and ">#news</a>" in html
+
+# ------------------------
+# Indexation
+# ------------------------
+def test_publish_indexes_tags_once(app, client):
+    create_user(app)
+    login(client)
+    client.post("/tweet", data={"content": "#one #two #one"})
+    with app.app_context():
+        tweet = Tweet.query.one()
+        assert tags_of(tweet.id) == ["one", "two"]
+        assert Hashtag.query.count() == 2
+
+def test_existing_tags_are_reused(app):
+    alice = create_user(app)
+    with app.app_context():
+        db.session.add(Hashtag(tag="old"))
+        t1 = Tweet(content="#old #new", user_id=alice)
+        db.session.add(t1)
+        db.session.flush()
+        index_tweet(t1)
+        # re-indexer le même tweet ne duplique rien
+        index_tweet(t1)
+        db.session.commit()
+        assert tags_of(t1.id) == ["new", "old"]
+        assert Hashtag.query.count() == 2
+
+def test_statement_count_is_constant(app, statements):
+    alice = create_user(app)
+    counts = []
+    with app.app_context():
+        for n in (1, 10):
+            tweet = Tweet(content=" ".join(f"#t{n}x{i}" for i in range(n)), user_id=alice)
+            db.session.add(tweet)
+            db.session.flush()
+            statements.clear()
+            index_tweet(tweet)
+            counts.append(len(statements))
+            db.session.commit()
+    assert counts[0] == counts[1] == 3
+
+def test_tag_created_concurrently_does_not_abort_publish(app, client):
+    create_user(app)
+    login(client)
+    # simule un tag créé par une autre requête entre-temps
+    with app.app_context():
+        db.session.add(Hashtag(tag="race"))
+        db.session.commit()
+    resp = client.post("/tweet", data={"content": "#race"})
+    assert resp.status_code == 302
+    with app.app_context():
+        assert tags_of(Tweet.query.one().id) == ["race"]
+    assert "#race" in client.get("/hashtag/race").data.decode()
@@ -0,0 +1,102 @@
+# flask_auth/tests/test_identity.py
+import pytest
+from werkzeug.security import generate_password_hash
+from flask_auth.project import db, identity
+from flask_auth.project.models import User
+from flask_auth.project.identity import CachedUser, IdentityCache, get_cache
+
+# ------------------------
+# Helpers
+# ------------------------
+def create_user(app, email="alice@example.com", name="Alice", password="Abcdef1!"):
+    with app.app_context():
+        user = User(
+            email=email,
+            name=name,
+            password=generate_password_hash(password, method="pbkdf2:sha256:1000")
+        )
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+def login(client, email="alice@example.com", password="Abcdef1!"):
+    return client.post("/login", data={"email": email, "password": password}, follow_redirects=True)
+
+def user_row_loads(statements):
+    # le SELECT complet de la ligne user (celui de db.session.get)
+    return [s for s in statements if "user.password" in s]
+
+# ------------------------
+# Cache
+# ------------------------
+def test_polling_does_not_reload_user(app, client, statements):
+    create_user(app)
+    login(client)
+    client.get("/notifications/count")
+    statements.clear()
+    for _ in range(3):
+        assert client.get("/notifications/count").status_code == 200
+    assert user_row_loads(statements) == []
+    with app.app_context():
+        assert get_cache().stats["hits"] >= 3
+
+def test_lru_eviction_and_ttl(app):
+    ids = [create_user(app, email=f"u{i}@example.com", name=f"u{i}") for i in range(3)]
+    with app.app_context():
+        cache = IdentityCache(maxsize=2, ttl=60)
+        for user_id in ids:
+            cache.get(user_id)
+        assert len(cache) == 2 and cache.stats["evictions"] == 1
+        cache.get(ids[2])
+        assert cache.stats["hits"] == 1
+
+        expired = IdentityCache(maxsize=2, ttl=0)
+        expired.get(ids[0])
+        expired.get(ids[0])
+        assert expired.stats == {"hits": 0, "misses": 2, "expired": 1, "evictions": 0, "invalidations": 0}
+        assert cache.get(9999) is None
+
+def test_cached_user_reads_without_row(app):
+    alice = create_user(app)
+    with app.app_context():
+        user = identity.load_user(alice)
+        assert isinstance(user, CachedUser)
+        assert (user.name, user.email, user.get_id()) == ("Alice", "alice@example.com", str(alice))
+        assert user.following_count == 0
+        assert user._row is None
+        # attribut hors instantané : chargement à la demande
+        assert user.password.startswith("pbkdf2:")
+        assert user._row is not None
+        assert user == db.session.get(User, alice)
+        with pytest.raises(AttributeError):
+            user.bio = "nope"
+
+# ------------------------
+# Invalidation
+# ------------------------
+def test_edit_bio_invalidates(app, client):
+    create_user(app)
+    login(client)
+    client.get("/profile")
+    client.post("/profile/edit_bio", data={"bio": "fresh bio"})
+    assert "fresh bio" in client.get("/profile").data.decode()
+    with app.app_context():
+        assert get_cache().stats["invalidations"] >= 1
+
+def test_follow_and_password_invalidate(app, client):
+    alice = create_user(app)
+    bob = create_user(app, email="bob@example.com", name="Bob")
+    login(client)
+    with app.app_context():
+        get_cache().get(bob)
+    client.post(f"/follow/{bob}")
+    with app.app_context():
+        cache = get_cache()
+        assert alice not in cache._entries and bob not in cache._entries
+
+    client.get("/profile")
+    client.post("/password", data={"current_password": "Abcdef1!", "new_password": "Newpass1!"})
+    with app.app_context():
+        assert alice not in get_cache()._entries
+    client.get("/logout")
+    assert login(client, password="Newpass1!").request.path == "/profile"
@@ -0,0 +1,123 @@
+# flask_auth/tests/test_likes.py
+import threading
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from werkzeug.security import generate_password_hash
+from flask_auth.project import counters, db
+from flask_auth.project.models import User, Tweet, Like, Notification
+from flask_auth.project.notify import NotificationPipeline, get_pipeline
+
+# ------------------------
+# Helpers
+# ------------------------
+def create_user(app, email="alice@example.com", name="Alice", password="Abcdef1!"):
+    with app.app_context():
+        user = User(
+            email=email,
+            name=name,
+            password=generate_password_hash(password, method="pbkdf2:sha256:1000")
+        )
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+def login(client, email="alice@example.com", password="Abcdef1!"):
+    return client.post("/login", data={"email": email, "password": password}, follow_redirects=True)
+
+def create_tweet(app, user_id, content="hello"):
+    with app.app_context():
+        tweet = Tweet(content=content, user_id=user_id)
+        db.session.add(tweet)
+        db.session.commit()
+        return tweet.id
+
+# ------------------------
+# Toggle
+# ------------------------
+def test_json_toggle_returns_state_and_count(app, client):
+    alice = create_user(app)
+    tweet_id = create_tweet(app, alice)
+    login(client)
+
+    assert client.post(f"/like/{tweet_id}.json").get_json() == {"tweet_id": tweet_id, "liked": True, "like_count": 1}
+    assert client.post(f"/like/{tweet_id}.json").get_json() == {"tweet_id": tweet_id, "liked": False, "like_count": 0}
+
+def test_notification_only_on_like(app, client):
+    alice = create_user(app)
+    create_user(app, "bob@example.com", "Bob")
+    tweet_id = create_tweet(app, alice)
+    login(client, "bob@example.com")
+
+    client.post(f"/like/{tweet_id}")
+    client.post(f"/like/{tweet_id}")  # unlike
+    with app.app_context():
+        get_pipeline().flush()
+        assert Notification.query.filter_by(recipient_id=alice, type="like").count() == 1
+        assert Like.query.count() == 0
+
+def test_toggle_commits_once(app, client):
+    alice = create_user(app)
+    tweet_id = create_tweet(app, alice)
+    login(client)
+
+    # seuls les commits du thread de la requête (pas ceux du pipeline de notifications)
+    commits, request_thread = [], threading.get_ident()
+    with app.app_context():
+        engine = db.engine
+    listener = lambda conn: threading.get_ident() == request_thread and commits.append(1)
+    event.listen(engine, "commit", listener)
+    try:
+        client.post(f"/like/{tweet_id}.json")
+    finally:
+        event.remove(engine, "commit", listener)
+    assert len(commits) == 1
+
+def test_notification_is_committed_with_the_like(app, client):
+    alice = create_user(app)
+    create_user(app, "bob@example.com", "Bob")
+    tweet_id = create_tweet(app, alice)
+    # le processus s'arrête avant que le pipeline n'écrive quoi que ce soit
+    pipeline = NotificationPipeline(app)
+    pipeline._start = lambda: None
+    app.extensions["notifications"] = pipeline
+    login(client, "bob@example.com")
+    client.post(f"/like/{tweet_id}")
+    with app.app_context():
+        assert Notification.query.filter_by(recipient_id=alice, type="like").count() == 1
+        assert counters.unread(alice)[0] == 1
+    app.extensions.pop("notifications")
+
+def test_stored_likes_are_coalesced(app, client):
+    alice = create_user(app)
+    tweet_id = create_tweet(app, alice)
+    fans = [create_user(app, f"fan{i}@example.com", f"Fan{i}") for i in range(3)]
+    for i in range(3):
+        login(client, f"fan{i}@example.com")
+        client.post(f"/like/{tweet_id}")
+        client.get("/logout")
+    with app.app_context():
+        get_pipeline().flush()
+        row = Notification.query.filter_by(recipient_id=alice).one()
+        assert (row.actor_count, row.actor_id) == (3, fans[-1])
+        assert counters.unread(alice)[0] == 1
+
+def test_like_is_unique_per_user_and_tweet(app):
+    alice = create_user(app)
+    tweet_id = create_tweet(app, alice)
+    with app.app_context():
+        db.session.add(Like(user_id=alice, tweet_id=tweet_id))
+        db.session.commit()
+        db.session.add(Like(user_id=alice, tweet_id=tweet_id))
+        with pytest.raises(IntegrityError):
+            db.session.commit()
+        db.session.rollback()
+
+def test_html_form_still_redirects(app, client):
+    alice = create_user(app)
+    tweet_id = create_tweet(app, alice)
+    login(client)
+    resp = client.post(f"/like/{tweet_id}", headers={"Referer": "/home"})
+    assert resp.status_code == 302
+    html = client.get("/profile").data.decode()
+    assert 'class="like-count">1<' in html
@@ -0,0 +1,97 @@
+# flask_auth/tests/test_loaders.py
+from contextlib import contextmanager
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+from flask_auth.project import db
+from flask_auth.project.models import User, Tweet, Comment, Like
+
+# ------------------------
+# Helpers
+# ------------------------
+def create_user(app, email, name, password="Abcdef1!"):
+    with app.app_context():
+        user = User(
+            email=email,
+            name=name,
+            password=generate_password_hash(password, method="pbkdf2:sha256:1000")
+        )
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+def login(client, email, password="Abcdef1!"):
+    return client.post("/login", data={"email": email, "password": password}, follow_redirects=True)
+
+def seed(app, author_id, commenter_ids, n):
+    with app.app_context():
+        for i in range(n):
+            tweet = Tweet(content=f"tweet-{i} #seed", user_id=author_id)
+            db.session.add(tweet)
+            db.session.flush()
+            for c in commenter_ids:
+                db.session.add(Comment(content=f"comment by {c}", user_id=c, tweet_id=tweet.id))
+        db.session.commit()
+
+@contextmanager
+def count_queries(app):
+    counter = {"n": 0}
+    with app.app_context():
+        engine = db.engine
+
+    def before(*args, **kwargs):
+        counter["n"] += 1
+
+    event.listen(engine, "before_cursor_execute", before)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", before)
+
+# ------------------------
+# Nombre de requêtes constant
+# ------------------------
+def test_profile_query_count_does_not_grow_with_tweets(app, client):
+    alice = create_user(app, "alice@example.com", "Alice")
+    bob = create_user(app, "bob@example.com", "Bob")
+    carol = create_user(app, "carol@example.com", "Carol")
+    login(client, "alice@example.com")
+
+    seed(app, alice, [bob, carol], 2)
+    with count_queries(app) as small:
+        assert client.get("/profile").status_code == 200
+
+    seed(app, alice, [bob, carol], 10)
+    with count_queries(app) as large:
+        assert client.get("/profile").status_code == 200
+
+    assert large["n"] == small["n"]
+
+def test_cards_render_preloaded_authors_comments_and_likes(app, client):
+    alice = create_user(app, "alice@example.com", "Alice")
+    bob = create_user(app, "bob@example.com", "Bob")
+    seed(app, alice, [bob], 1)
+    with app.app_context():
+        tweet = Tweet.query.first()
+        db.session.add(Like(user_id=alice, tweet_id=tweet.id))
+        db.session.commit()
+
+    login(client, "alice@example.com")
+    html = client.get("/profile").data.decode()
+    assert "@Alice" in html
+    assert "@Bob" in html
+    assert "like-btn liked" in html
+
+def test_search_users_query_count_is_constant(app, client):
+    create_user(app, "alice@example.com", "Alice")
+    login(client, "alice@example.com")
+    create_user(app, "x1@example.com", "Xavier 1")
+    with count_queries(app) as small:
+        client.get("/search?q=Xavier")
+
+    for i in range(2, 8):
+        create_user(app, f"x{i}@example.com", f"Xavier {i}")
+    with count_queries(app) as large:
+        html = client.get("/search?q=Xavier").data.decode()
+
+    assert "Xavier 7" in html
+    assert large["n"] == small["n"]
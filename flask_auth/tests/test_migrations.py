@@ -0,0 +1,153 @@
+# flask_auth/tests/test_migrations.py
+import math
+import os
+import json
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+import pytest
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import Engine
+from flask_auth.project import create_app, db, migrations, ranking
+from flask_auth.project.migrations import head, current_version
+
+# Schéma d'un db.sqlite créé avant l'introduction des migrations
+BASELINE_SCHEMA = """
+CREATE TABLE user (id INTEGER NOT NULL, email VARCHAR(100), password VARCHAR(100),
+    name VARCHAR(1000), bio VARCHAR(300), PRIMARY KEY (id), UNIQUE (email));
+CREATE TABLE hashtag (id INTEGER NOT NULL, tag VARCHAR(100) NOT NULL, PRIMARY KEY (id), UNIQUE (tag));
+CREATE TABLE followers (follower_id INTEGER, followed_id INTEGER,
+    FOREIGN KEY(follower_id) REFERENCES user (id), FOREIGN KEY(followed_id) REFERENCES user (id));
+CREATE TABLE tweet (id INTEGER NOT NULL, content VARCHAR(280), timestamp DATETIME, user_id INTEGER,
+    PRIMARY KEY (id), FOREIGN KEY(user_id) REFERENCES user (id));
+CREATE TABLE notifications (id INTEGER NOT NULL, recipient_id INTEGER NOT NULL, actor_id INTEGER NOT NULL,
+    type VARCHAR(30) NOT NULL, payload TEXT, is_read BOOLEAN, created_at DATETIME, PRIMARY KEY (id));
+CREATE TABLE "like" (id INTEGER NOT NULL, user_id INTEGER NOT NULL, tweet_id INTEGER NOT NULL, PRIMARY KEY (id));
+CREATE TABLE comment (id INTEGER NOT NULL, content TEXT NOT NULL, user_id INTEGER NOT NULL,
+    tweet_id INTEGER NOT NULL, PRIMARY KEY (id));
+CREATE TABLE tweet_hashtag (tweet_id INTEGER, hashtag_id INTEGER);
+
+INSERT INTO user (id, email, name) VALUES (1, 'a@example.com', 'A'), (2, 'b@example.com', 'B');
+INSERT INTO followers VALUES (1, 2), (1, 2), (2, 1);
+INSERT INTO tweet (id, content, timestamp, user_id) VALUES (1, 'hi #old', '2024-01-01 10:00:00', 2);
+INSERT INTO hashtag (id, tag) VALUES (1, 'old');
+INSERT INTO tweet_hashtag VALUES (1, 1), (1, 1);
+INSERT INTO "like" (user_id, tweet_id) VALUES (1, 1), (2, 1);
+INSERT INTO comment (content, user_id, tweet_id) VALUES ('yo', 1, 1);
+INSERT INTO notifications (recipient_id, actor_id, type, payload) VALUES (2, 1, 'like', '{"tweet_id": 1}');
+"""
+
+@pytest.fixture
+def legacy_db():
+    fd, path = tempfile.mkstemp(suffix=".sqlite")
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_SCHEMA)
+    conn.commit()
+    conn.close()
+    yield path
+    os.close(fd)
+    os.unlink(path)
+
+def test_legacy_database_is_upgraded(legacy_db):
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{legacy_db}"})
+    with app.app_context():
+        migrations.upgrade()  # étape de déploiement (flask db-upgrade)
+        assert current_version() == head()
+        insp = inspect(db.engine)
+
+        # clés primaires + dédoublonnage des tables d'association
+        assert insp.get_pk_constraint("followers")["constrained_columns"] == ["follower_id", "followed_id"]
+        assert insp.get_pk_constraint("tweet_hashtag")["constrained_columns"] == ["tweet_id", "hashtag_id"]
+        assert db.session.execute(db.text("SELECT COUNT(*) FROM followers")).scalar() == 2
+        assert db.session.execute(db.text("SELECT COUNT(*) FROM tweet_hashtag")).scalar() == 1
+
+        # nouvelles colonnes, remplies depuis les données existantes
+        row = db.session.execute(db.text("SELECT like_count, comment_count FROM tweet WHERE id = 1")).one()
+        assert tuple(row) == (2, 1)
+        row = db.session.execute(db.text("SELECT tweet_id, actor_count FROM notifications")).one()
+        assert tuple(row) == (1, 1)
+
+        # index plein texte rempli depuis les lignes existantes
+        hits = db.session.execute(db.text("SELECT rowid FROM tweet_fts WHERE tweet_fts MATCH 'hi'")).scalars().all()
+        assert hits == [1]
+
+        # index de performance
+        assert "ix_tweet_user_ts" in {i["name"] for i in insp.get_indexes("tweet")}
+        assert "ix_notif_recipient_read_created" in {i["name"] for i in insp.get_indexes("notifications")}
+        assert insp.has_table("timeline_entry")
+
+        # timelines et scores des tweets existants
+        rows = db.session.execute(db.text("SELECT user_id, tweet_id FROM timeline_entry ORDER BY user_id")).all()
+        assert [tuple(r) for r in rows] == [(1, 1), (2, 1)]
+        posted = datetime(2024, 1, 1, 10)  # likes et commentaire sans date : celle du tweet
+        expected = ranking.contribution(ranking.PUBLISH_WEIGHT, posted)
+        for weight in (ranking.LIKE_WEIGHT, ranking.LIKE_WEIGHT, ranking.COMMENT_WEIGHT):
+            expected = ranking.log_add(expected, ranking.contribution(weight, posted))
+        score = db.session.execute(db.text("SELECT rank_score FROM tweet WHERE id = 1")).scalar()
+        assert math.isclose(score, expected)
+        db.session.remove()
+        db.engine.dispose()
+
+def test_upgrade_is_idempotent(legacy_db):
+    config = {"SQLALCHEMY_DATABASE_URI": f"sqlite:///{legacy_db}", "DB_AUTO_UPGRADE": True}
+    create_app(config)
+    migrations._verified.clear()  # comme un nouveau processus
+    app = create_app(config)
+    with app.app_context():
+        assert current_version() == head()
+        assert db.session.execute(db.text("SELECT COUNT(*) FROM followers")).scalar() == 2
+        db.session.remove()
+        db.engine.dispose()
+
+def test_db_upgrade_command(app, runner):
+    result = runner.invoke(args=["db-upgrade"])
+    assert f"Schema at version {head()}." in result.output
+
+# ------------------------
+# Contrôle du schéma au démarrage
+# ------------------------
+@pytest.fixture
+def statements():
+    seen = []
+    listener = lambda conn, cursor, statement, params, context, executemany: seen.append(statement)
+    event.listen(Engine, "before_cursor_execute", listener)
+    yield seen
+    event.remove(Engine, "before_cursor_execute", listener)
+
+def test_factory_without_auto_upgrade_has_no_side_effects(tmp_path, statements):
+    path = tmp_path / "untouched.sqlite"
+    create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}", "DB_AUTO_UPGRADE": False})
+    assert not path.exists()
+    assert statements == []
+
+def test_up_to_date_schema_is_verified_once(tmp_path, statements):
+    config = {"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'app.sqlite'}", "DB_AUTO_UPGRADE": True}
+    create_app(config)
+    migrations._verified.clear()  # comme un nouveau processus
+
+    statements.clear()
+    create_app(config)
+    assert not [s for s in statements if s.lstrip().upper().startswith(("CREATE", "INSERT", "DELETE"))]
+    assert any("schema_version" in s for s in statements)
+
+    statements.clear()
+    create_app(config)
+    assert statements == []
+
+def test_factory_does_not_import_subsystems():
+    # nouveau processus : les modules sont déjà chargés dans celui des tests
+    code = (
+        "from flask_auth.project import create_app\n"
+        "app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://'})\n"
+        "import json, sys\n"
+        "print(json.dumps([[m.rsplit('.', 1)[1] for m in sys.modules if m.startswith('flask_auth.project.')],\n"
+        "                  sorted(app.cli.commands)]))\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                         env={**os.environ, "PYTHONPATH": root}).stdout
+    loaded, commands = json.loads(out)
+    assert not set(loaded) & {"migrations", "ranking", "trending", "search", "stream", "counters", "likes", "notify"}
+    assert {"db-upgrade", "rebuild-trending", "rescore-tweets"} <= set(commands)
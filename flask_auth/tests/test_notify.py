@@ -0,0 +1,138 @@
+# flask_auth/tests/test_notify.py
+from werkzeug.security import generate_password_hash
+from flask_auth.project import db
+from flask_auth.project.models import User, Tweet, Notification
+from flask_auth.project.notify import NotificationPipeline, get_pipeline, publish
+
+# ------------------------
+# Helpers
+# ------------------------
+def create_user(app, email="alice@example.com", name="Alice", password="Abcdef1!"):
+    with app.app_context():
+        user = User(
+            email=email,
+            name=name,
+            password=generate_password_hash(password, method="pbkdf2:sha256:1000")
+        )
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+def login(client, email="alice@example.com", password="Abcdef1!"):
+    return client.post("/login", data={"email": email, "password": password}, follow_redirects=True)
+
+def create_tweet(app, user_id, content="hello"):
+    with app.app_context():
+        tweet = Tweet(content=content, user_id=user_id)
+        db.session.add(tweet)
+        db.session.commit()
+        return tweet.id
+
+def create_fans(app, n):
+    return [create_user(app, f"fan{i}@example.com", f"Fan{i}") for i in range(n)]
+
+# ------------------------
+# Pipeline
+# ------------------------
+def test_like_burst_is_coalesced(app, client):
+    alice = create_user(app)
+    tweet_id = create_tweet(app, alice)
+    fans = create_fans(app, 5)
+    with app.app_context():
+        for fan in fans:
+            publish(alice, fan, "like", {"tweet_id": tweet_id})
+        get_pipeline().flush()
+        rows = Notification.query.filter_by(recipient_id=alice).all()
+        assert len(rows) == 1
+        assert rows[0].actor_count == 5
+        assert rows[0].actor_id == fans[-1]
+        assert rows[0].tweet_id == tweet_id
+
+    login(client)
+    assert "and 4 others" in client.get("/notifications").data.decode()
+
+def test_like_toggles_count_distinct_actors(app, client):
+    alice = create_user(app)
+    tweet_id = create_tweet(app, alice)
+    create_fans(app, 2)
+    for _ in range(3):
+        for fan in ("fan0@example.com", "fan1@example.com"):
+            login(client, fan)
+            client.post(f"/like/{tweet_id}")  # like
+            client.post(f"/like/{tweet_id}")  # unlike
+            client.get("/logout")
+    with app.app_context():
+        get_pipeline().flush()
+        row = Notification.query.filter_by(recipient_id=alice).one()
+        assert row.actor_count == 2
+
+def test_distinct_tweets_and_comments_are_not_merged(app):
+    alice = create_user(app)
+    bob = create_user(app, "bob@example.com", "Bob")
+    t1, t2 = create_tweet(app, alice), create_tweet(app, alice)
+    with app.app_context():
+        publish(alice, bob, "like", {"tweet_id": t1})
+        publish(alice, bob, "like", {"tweet_id": t2})
+        publish(alice, bob, "comment", {"tweet_id": t1, "comment": "a"})
+        publish(alice, bob, "comment", {"tweet_id": t1, "comment": "b"})
+        get_pipeline().flush()
+        assert Notification.query.filter_by(recipient_id=alice).count() == 4
+
+def test_read_aggregate_is_not_reopened(app):
+    alice = create_user(app)
+    bob, carol = create_fans(app, 2)
+    with app.app_context():
+        publish(alice, bob, "follow")
+        get_pipeline().flush()
+        Notification.query.update({"is_read": True})
+        db.session.commit()
+
+        publish(alice, carol, "follow")
+        get_pipeline().flush()
+        assert Notification.query.filter_by(recipient_id=alice).count() == 2
+
+def test_events_are_written_in_order(app):
+    alice = create_user(app)
+    bob = create_user(app, "bob@example.com", "Bob")
+    with app.app_context():
+        for i in range(10):
+            publish(alice, bob, "comment", {"comment": str(i)})
+        get_pipeline().flush()
+        rows = Notification.query.order_by(Notification.id).all()
+        assert [n.get_payload()["comment"] for n in rows] == [str(i) for i in range(10)]
+
+def test_shutdown_drains_queue(app):
+    alice = create_user(app)
+    bob = create_user(app, "bob@example.com", "Bob")
+    with app.app_context():
+        pipeline = get_pipeline()
+        for i in range(20):
+            publish(alice, bob, "comment", {"comment": str(i)})
+        pipeline.shutdown()
+        assert Notification.query.count() == 20
+        assert pipeline.stats["written"] == 20
+
+def test_full_queue_writes_inline(app):
+    alice = create_user(app)
+    bob = create_user(app, "bob@example.com", "Bob")
+    app.config["NOTIFICATIONS_QUEUE_SIZE"] = 1
+    app.config["NOTIFICATIONS_ENQUEUE_TIMEOUT"] = 0
+    with app.app_context():
+        pipeline = NotificationPipeline(app)
+        pipeline._start = lambda: None  # pas de consommateur : la file reste pleine
+        app.extensions["notifications"] = pipeline
+        publish(alice, bob, "comment", {"comment": "queued"})
+        publish(alice, bob, "comment", {"comment": "inline"})
+        assert pipeline.stats == {"enqueued": 1, "written": 0, "batches": 0, "inline": 1, "errors": 0}
+        assert [n.get_payload()["comment"] for n in Notification.query.all()] == ["inline"]
+    app.extensions.pop("notifications")
+
+def test_synchronous_mode(app, client):
+    alice = create_user(app)
+    create_user(app, "bob@example.com", "Bob")
+    app.config["NOTIFICATIONS_ASYNC"] = False
+    login(client, "bob@example.com")
+    client.post(f"/follow/{alice}")
+    with app.app_context():
+        assert "notifications" not in app.extensions
+        assert Notification.query.filter_by(recipient_id=alice, type="follow").count() == 1
@@ -0,0 +1,114 @@
+# flask_auth/tests/test_pagination.py
+import re
+from datetime import datetime, timedelta
+from werkzeug.security import generate_password_hash
+from flask_auth.project import db
+from flask_auth.project.models import User, Tweet, Notification
+from flask_auth.project.pagination import encode_cursor, decode_cursor
+
+# ------------------------
+# Helpers
+# ------------------------
+def create_user(app, email="alice@example.com", name="Alice", password="Abcdef1!"):
+    with app.app_context():
+        user = User(
+            email=email,
+            name=name,
+            password=generate_password_hash(password, method="pbkdf2:sha256:1000")
+        )
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+def login(client, email="alice@example.com", password="Abcdef1!"):
+    return client.post("/login", data={"email": email, "password": password}, follow_redirects=True)
+
+def seed_tweets(app, user_id, n):
+    # plusieurs tweets partagent le même timestamp pour tester le départage par id
+    base = datetime(2024, 1, 1)
+    with app.app_context():
+        for i in range(n):
+            db.session.add(Tweet(content=f"tweet-{i:03d}", user_id=user_id,
+                                 timestamp=base + timedelta(minutes=i // 2)))
+        db.session.commit()
+
+def next_link(html):
+    m = re.search(r'href="([^"]*cursor=[^"]*)"', html)
+    return m.group(1).replace("&amp;", "&") if m else None
+
+def walk(client, url):
+    """Suit les liens 'Load more' et retourne tous les tweets vus, dans l'ordre."""
+    seen = []
+    while url:
+        html = client.get(url).data.decode()
+        seen += re.findall(r"tweet-\d{3}", html)
+        url = next_link(html)
+    return seen
+
+# ------------------------
+# Curseurs
+# ------------------------
+def test_cursor_roundtrip():
+    ts = datetime(2024, 5, 17, 12, 30, 1, 123456)
+    assert decode_cursor(encode_cursor(ts, 42)) == (ts, 42)
+    assert decode_cursor(encode_cursor(None, 7)) == (None, 7)
+
+def test_invalid_cursor_is_rejected(app, client):
+    create_user(app)
+    login(client)
+    resp = client.get("/profile?cursor=not-a-cursor")
+    assert resp.status_code == 400
+
+# ------------------------
+# Pages
+# ------------------------
+def test_profile_is_paginated_without_gaps_or_duplicates(app, client):
+    app.config["PAGE_SIZE"] = 4
+    user_id = create_user(app)
+    seed_tweets(app, user_id, 11)
+    login(client)
+
+    first = client.get("/profile").data.decode()
+    assert len(re.findall(r"tweet-\d{3}", first)) == 4
+    assert "Load more" in first
+
+    seen = walk(client, "/profile")
+    assert seen == [f"tweet-{i:03d}" for i in reversed(range(11))]
+
+def test_hashtag_page_is_paginated(app, client):
+    app.config["PAGE_SIZE"] = 2
+    create_user(app)
+    login(client)
+    for i in range(5):
+        client.post("/tweet", data={"content": f"tweet-{i:03d} #python"})
+    seen = walk(client, "/hashtag/python")
+    assert sorted(seen) == [f"tweet-{i:03d}" for i in range(5)]
+
+def test_home_is_paginated(app, client):
+    app.config["PAGE_SIZE"] = 3
+    create_user(app)
+    login(client)
+    for i in range(7):
+        client.post("/tweet", data={"content": f"tweet-{i:03d}"})
+    seen = walk(client, "/home")
+    assert sorted(seen) == [f"tweet-{i:03d}" for i in range(7)]
+    assert len(seen) == 7
+
+def test_notifications_are_paginated(app, client):
+    app.config["PAGE_SIZE"] = 2
+    alice = create_user(app)
+    bob = create_user(app, email="bob@example.com", name="Bob")
+    with app.app_context():
+        for _ in range(5):
+            db.session.add(Notification(recipient_id=alice, actor_id=bob, type="follow"))
+        db.session.commit()
+    login(client)
+
+    url, pages, total = "/notifications", 0, 0
+    while url:
+        html = client.get(url).data.decode()
+        total += html.count("is now following you")
+        url = next_link(html)
+        pages += 1
+    assert total == 5
+    assert pages == 3
@@ -0,0 +1,89 @@
+# flask_auth/tests/test_query_plans.py
+#
+# Non-régression des plans d'exécution : chaque requête SQL émise par les
+# routes "chaudes" est rejouée avec EXPLAIN QUERY PLAN, et le test échoue si
+# l'une d'elles parcourt entièrement une table (SCAN <table>).
+import re
+from werkzeug.security import generate_password_hash
+from flask_auth.project import db
+from flask_auth.project.models import User, Tweet, Notification
+
+# Requêtes qui lisent volontairement toute la table
+ALLOWED_FULL_SCANS = [
+    # chargement initial de l'index du graphe de follow (follow_graph.py)
+    re.compile(r"^SELECT followers\.follower_id, followers\.followed_id\s+FROM followers$"),
+]
+
+# ------------------------
+# Helpers
+# ------------------------
+def create_user(app, email, name, password="Abcdef1!"):
+    with app.app_context():
+        user = User(
+            email=email,
+            name=name,
+            password=generate_password_hash(password, method="pbkdf2:sha256:1000")
+        )
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+def login(client, email, password="Abcdef1!"):
+    return client.post("/login", data={"email": email, "password": password}, follow_redirects=True)
+
+def full_scans(app, captured):
+    tables = set(db.metadata.tables)
+    offenders = []
+    with app.app_context():
+        with db.engine.connect() as conn:
+            for statement, params in captured:
+                sql = statement.strip()
+                if not re.match(r"^(SELECT|INSERT INTO \S+ \(.*\) SELECT|UPDATE|DELETE)", sql, re.S):
+                    continue
+                if any(p.match(sql) for p in ALLOWED_FULL_SCANS):
+                    continue
+                plan = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql, params).all()
+                for row in plan:
+                    m = re.match(r"SCAN (\w+)", row[-1])
+                    if m and m.group(1).strip('"') in tables:
+                        offenders.append((row[-1], sql))
+    return offenders
+
+# ------------------------
+# Routes chaudes
+# ------------------------
+def test_hot_routes_never_scan_whole_tables(app, client, queries):
+    alice = create_user(app, "alice@example.com", "Alice")
+    bob = create_user(app, "bob@example.com", "Bob")
+    with app.app_context():
+        db.session.add(Notification(recipient_id=alice, actor_id=bob, type="follow"))
+        db.session.commit()
+
+    login(client, "bob@example.com")
+    client.post(f"/follow/{alice}")
+    client.get("/logout")
+
+    login(client, "alice@example.com")
+    client.post("/tweet", data={"content": "hello #plans"})
+    client.post("/tweet", data={"content": "second #plans"})
+    with app.app_context():
+        tweet_id = Tweet.query.filter_by(content="hello #plans").first().id
+
+    queries.clear()
+    client.get("/home")
+    client.get("/home?sort=ranked")
+    client.get("/profile")
+    client.get(f"/profile/{bob}")
+    client.get("/hashtag/plans")
+    client.post(f"/like/{tweet_id}")
+    client.post(f"/like/{tweet_id}")
+    client.post(f"/comment/{tweet_id}", data={"comment_content": "nice #plans"})
+    client.get("/notifications")
+    client.get("/notifications/count")
+    client.post("/notifications/mark_all_read")
+    client.post(f"/follow/{bob}")
+    client.post(f"/unfollow/{bob}")
+    client.post(f"/delete_tweet/{tweet_id}")
+
+    assert queries, "aucune requête capturée"
+    assert full_scans(app, queries) == []
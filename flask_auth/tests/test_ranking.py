@@ -0,0 +1,143 @@
+# flask_auth/tests/test_ranking.py
+import math
+from datetime import datetime, timedelta
+from werkzeug.security import generate_password_hash
+from flask_auth.project import db, ranking
+from flask_auth.project.likes import toggle_like
+from flask_auth.project.models import User, Tweet, Like
+
+# ------------------------
+# Helpers
+# ------------------------
+def create_user(app, email="alice@example.com", name="Alice", password="Abcdef1!"):
+    with app.app_context():
+        user = User(
+            email=email,
+            name=name,
+            password=generate_password_hash(password, method="pbkdf2:sha256:1000")
+        )
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+def login(client, email="alice@example.com", password="Abcdef1!"):
+    return client.post("/login", data={"email": email, "password": password}, follow_redirects=True)
+
+def ranked_order(client, *contents):
+    html = client.get("/home?sort=ranked").data.decode()
+    return sorted(contents, key=lambda c: html.index(c) if c in html else math.inf)
+
+# ------------------------
+# Score
+# ------------------------
+def test_log_add_and_sub_are_inverse(app):
+    with app.app_context():
+        a = ranking.contribution(1.0, datetime(2024, 1, 1))
+        b = ranking.contribution(1.0, datetime(2024, 1, 2))
+        assert math.isclose(ranking.log_sub(ranking.log_add(a, b), b), a)
+        assert ranking.log_sub(a, a) is None
+
+def test_score_halves_after_half_life(app):
+    app.config["RANKING_HALF_LIFE_HOURS"] = 10
+    with app.app_context():
+        t0 = datetime(2024, 1, 1)
+        score = ranking.contribution(4.0, t0)
+        assert math.isclose(ranking.decayed(score, t0), 4.0)
+        assert math.isclose(ranking.decayed(score, t0 + timedelta(hours=10)), 2.0)
+
+# ------------------------
+# Fil "Most Popular"
+# ------------------------
+def test_recent_like_outranks_old_viral_tweet(app, client):
+    alice = create_user(app)
+    fans = [create_user(app, f"fan{i}@example.com", f"Fan{i}") for i in range(5)]
+    old = datetime.utcnow() - timedelta(days=10)
+    with app.app_context():
+        viral = Tweet(content="old-viral", user_id=alice, timestamp=old)
+        db.session.add(viral)
+        db.session.flush()
+        for fan in fans:
+            db.session.add(Like(user_id=fan, tweet_id=viral.id, created_at=old))
+        db.session.add(Tweet(content="fresh-tweet", user_id=alice))
+        db.session.commit()
+        ranking.rescore()
+        db.session.commit()
+
+    login(client)
+    assert ranked_order(client, "old-viral", "fresh-tweet") == ["fresh-tweet", "old-viral"]
+
+def test_like_and_delete_update_ranked_feed_incrementally(app, client):
+    create_user(app)
+    login(client)
+    client.post("/tweet", data={"content": "first-tweet"})
+    client.post("/tweet", data={"content": "second-tweet"})
+    assert ranked_order(client, "first-tweet", "second-tweet") == ["second-tweet", "first-tweet"]
+
+    with app.app_context():
+        first = Tweet.query.filter_by(content="first-tweet").first().id
+    client.post(f"/like/{first}")
+    assert ranked_order(client, "first-tweet", "second-tweet") == ["first-tweet", "second-tweet"]
+
+    client.post(f"/like/{first}")  # unlike
+    assert ranked_order(client, "first-tweet", "second-tweet") == ["second-tweet", "first-tweet"]
+
+    client.post(f"/delete_tweet/{first}")
+    assert "first-tweet" not in client.get("/home?sort=ranked").data.decode()
+
+def test_score_updates_start_from_the_stored_value(app):
+    alice = create_user(app)
+    with app.app_context():
+        tweet = Tweet(content="hello", user_id=alice, timestamp=datetime.utcnow())
+        ranking.on_publish(tweet)
+        db.session.add(tweet)
+        db.session.commit()
+        user, tweet = db.session.get(User, alice), db.session.get(Tweet, tweet.id)
+        stale = tweet.rank_score
+        # un autre worker modifie le score entre la lecture et l'écriture
+        with db.engine.begin() as conn:
+            conn.execute(db.update(Tweet).where(Tweet.id == tweet.id).values(rank_score=stale + 5))
+
+        with app.test_request_context():
+            toggle_like(user, tweet)
+        like = Like.query.one()
+        expected = ranking.log_add(stale + 5, ranking.contribution(ranking.LIKE_WEIGHT, like.created_at))
+        assert math.isclose(db.session.get(Tweet, tweet.id).rank_score, expected)
+
+def test_index_merges_authors_top_k(app):
+    index = ranking.RankingIndex(ttl=60)
+    alice = create_user(app)
+    bob = create_user(app, "bob@example.com", "Bob")
+    with app.app_context():
+        for i, author in enumerate([alice, bob, alice, bob, alice]):
+            db.session.add(Tweet(content=f"t{i}", user_id=author, rank_score=float(i)))
+        db.session.commit()
+        keys = index.top([alice, bob], 3)
+        scores = [db.session.get(Tweet, i).rank_score for _, i in keys]
+    assert scores == [score for score, _ in keys] == [4.0, 3.0, 2.0]
+
+def test_ranked_feed_is_paginated(app, client):
+    alice = create_user(app)
+    bob = create_user(app, "bob@example.com", "Bob")
+    scores = [9.0, 8.0, 8.0, 6.0, 5.0, 3.0, 2.0, 1.0]  # une égalité : départagée par id
+    with app.app_context():
+        for i, score in enumerate(scores):
+            db.session.add(Tweet(content=f"t{i}", user_id=(alice, bob)[i % 2], rank_score=score))
+        db.session.commit()
+        expected = [t.id for t in Tweet.query.order_by(Tweet.rank_score.desc(), Tweet.id)]
+
+    for per_author in (200, 2):  # tout en mémoire, puis listes tronquées (lecture en base)
+        with app.test_request_context():
+            app.extensions["ranking"] = ranking.RankingIndex(ttl=60, per_author=per_author)
+            seen, cursor = [], None
+            while True:
+                page = ranking.ranked_page([alice, bob], cursor=cursor, per_page=3)
+                seen += [t.id for t in page.items]
+                if not page.has_more:
+                    break
+                cursor = page.next_cursor
+        assert seen == expected
+
+    app.config["PAGE_SIZE"] = 2
+    login(client)
+    html = client.get("/home?sort=ranked").data.decode()
+    assert "sort=ranked" in html and "cursor=" in html
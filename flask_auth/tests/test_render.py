@@ -0,0 +1,74 @@
+# flask_auth/tests/test_render.py
+from werkzeug.security import generate_password_hash
+from flask_auth.project import db, render
+from flask_auth.project.models import User, Tweet, Comment
+from flask_auth.project.render import RENDER_VERSION, rerender
+
+# ------------------------
+# Helpers
+# ------------------------
+def create_user(app, email="alice@example.com", name="Alice", password="Abcdef1!"):
+    with app.app_context():
+        user = User(
+            email=email,
+            name=name,
+            password=generate_password_hash(password, method="pbkdf2:sha256:1000")
+        )
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+def login(client, email="alice@example.com", password="Abcdef1!"):
+    return client.post("/login", data={"email": email, "password": password}, follow_redirects=True)
+
+# ------------------------
+# Rendu
+# ------------------------
+def test_render_escapes_and_links_hashtags(app):
+    with app.app_context():
+        html = render.render('<b>hi</b> #news & #café')
+    assert html == ('&lt;b&gt;hi&lt;/b&gt; <a href="/hashtag/news" class="hashtag">#news</a>'
+                    ' &amp; <a href="/hashtag/caf%C3%A9" class="hashtag">#café</a>')
+
+def test_tweet_and_comment_are_rendered_on_write(app, client):
+    create_user(app)
+    login(client)
+    client.post("/tweet", data={"content": "hello #world"})
+    with app.app_context():
+        tweet = Tweet.query.one()
+        assert tweet.html_version == RENDER_VERSION
+        assert '<a href="/hashtag/world" class="hashtag">#world</a>' in tweet.content_html
+    client.post(f"/comment/{tweet.id}", data={"comment_content": "<script>x</script> #reply"})
+    with app.app_context():
+        comment = Comment.query.one()
+        assert comment.content_html.startswith("&lt;script&gt;")
+
+    html = client.get("/profile").data.decode()
+    assert 'hello <a href="/hashtag/world" class="hashtag">#world</a>' in html
+    assert "<script>x</script>" not in html
+
+def test_stale_rows_render_on_the_fly(app, client):
+    alice = create_user(app)
+    with app.app_context():
+        db.session.add(Tweet(content="legacy #old", user_id=alice))
+        db.session.add(Tweet(content="outdated", user_id=alice, content_html="STALE", html_version=RENDER_VERSION - 1))
+        db.session.commit()
+    login(client)
+    html = client.get("/profile").data.decode()
+    assert '<a href="/hashtag/old" class="hashtag">#old</a>' in html
+    assert "STALE" not in html
+
+def test_rerender_backfills_stale_rows(app, runner):
+    alice = create_user(app)
+    with app.app_context():
+        tweets = [Tweet(content=f"t{i} #tag", user_id=alice) for i in range(5)]
+        db.session.add_all(tweets)
+        db.session.flush()
+        render.apply(tweets[0])
+        db.session.add(Comment(content="c", user_id=alice, tweet_id=tweets[0].id))
+        db.session.commit()
+
+        assert rerender(Tweet, batch_size=2) == 4
+        assert Tweet.query.filter(Tweet.html_version.is_(None)).count() == 0
+    result = runner.invoke(args=["rerender-content"])
+    assert f"0 tweets and 1 comments rendered (v{RENDER_VERSION})." in result.output
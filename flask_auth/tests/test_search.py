@@ -0,0 +1,178 @@
+# flask_auth/tests/test_search.py
+import re
+from werkzeug.security import generate_password_hash
+from flask_auth.project import db
+from flask_auth.project.models import User, Tweet, Comment
+from flask_auth.project import search
+from flask_auth.project.search import search_users, search_tweets, to_match, rebuild
+
+# ------------------------
+# Helpers
+# ------------------------
+def create_user(app, email="alice@example.com", name="Alice", password="Abcdef1!", bio=None):
+    with app.app_context():
+        user = User(
+            email=email,
+            name=name,
+            bio=bio,
+            password=generate_password_hash(password, method="pbkdf2:sha256:1000")
+        )
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+def login(client, email="alice@example.com", password="Abcdef1!"):
+    return client.post("/login", data={"email": email, "password": password}, follow_redirects=True)
+
+def create_tweet(app, user_id, content="hello"):
+    with app.app_context():
+        tweet = Tweet(content=content, user_id=user_id)
+        db.session.add(tweet)
+        db.session.commit()
+        return tweet.id
+
+def ids(page):
+    return [obj.id for obj in page.items]
+
+# ------------------------
+# Expression de recherche
+# ------------------------
+def test_query_is_tokenized_as_prefixes():
+    assert to_match("ali  bo") == '"ali"* "bo"'  # mot trop court : recherche exacte
+    assert to_match('abc"def OR ghi*') == '"abc"* "def"* "OR" "ghi"*'  # pas de syntaxe FTS5 injectable
+    assert to_match("  ") == ""
+
+# ------------------------
+# Utilisateurs
+# ------------------------
+def test_users_prefix_and_bio(app):
+    alice = create_user(app, bio="gardener")
+    bob = create_user(app, "bob@example.com", "Bob", bio="loves alice's garden")
+    create_user(app, "carol@example.com", "Carol")
+    with app.test_request_context():
+        assert ids(search_users("ali")) == [alice, bob]  # le nom pèse plus que la bio
+        assert ids(search_users("gard")) == [alice, bob]
+        assert ids(search_users("Élise")) == []
+        assert ids(search_users("car")) == [User.query.filter_by(name="Carol").one().id]
+
+def test_accents_are_ignored(app):
+    helene = create_user(app, "h@example.com", "Hélène")
+    with app.test_request_context():
+        assert ids(search_users("helene")) == [helene]
+
+def test_index_follows_updates_and_deletes(app):
+    alice = create_user(app)
+    with app.app_context():
+        user = db.session.get(User, alice)
+        user.name = "Alicia"
+        db.session.commit()
+    with app.test_request_context():
+        assert ids(search_users("alicia")) == [alice]
+        db.session.delete(db.session.get(User, alice))
+        db.session.commit()
+        assert ids(search_users("alicia")) == []
+
+# ------------------------
+# Tweets et commentaires
+# ------------------------
+def test_tweets_match_content_and_comments(app):
+    alice = create_user(app)
+    t1 = create_tweet(app, alice, "sunny weather today")
+    t2 = create_tweet(app, alice, "nothing here")
+    with app.test_request_context():
+        db.session.add(Comment(user_id=alice, tweet_id=t2, content="so sunny"))
+        db.session.commit()
+        assert ids(search_tweets("sunny")) == [t1, t2]  # le contenu pèse plus que les commentaires
+
+        db.session.delete(Comment.query.one())
+        db.session.commit()
+        assert ids(search_tweets("sunny")) == [t1]
+
+def test_results_are_paginated(app):
+    alice = create_user(app)
+    expected = {create_tweet(app, alice, f"topic number {i}") for i in range(7)}
+    with app.test_request_context():
+        seen, cursor = [], None
+        while True:
+            page = search_tweets("topic", cursor=cursor, per_page=3)
+            seen += ids(page)
+            if not page.has_more:
+                break
+            cursor = page.next_cursor
+        assert len(seen) == 7 and set(seen) == expected
+
+def test_only_recent_matches_are_ranked(app):
+    alice = create_user(app)
+    old = create_tweet(app, alice, "jam jam jam")  # meilleur score BM25, mais hors fenêtre
+    recent = [create_tweet(app, alice, f"jam and bread {i}") for i in range(3)]
+    app.config["SEARCH_CANDIDATES"] = 3
+    with app.test_request_context():
+        assert set(ids(search_tweets("jam"))) == set(recent)
+    app.config["SEARCH_CANDIDATES"] = 10
+    with app.test_request_context():
+        assert ids(search_tweets("jam"))[0] == old
+
+def test_common_words_are_dropped_or_ranked_by_recency(app, monkeypatch):
+    monkeypatch.setattr(search, "COMMON_PROBE", 2)
+    alice = create_user(app)
+    t1, t2, t3, t4 = [create_tweet(app, alice, c) for c in ("the mat", "the cat sat", "the hat", "the bat")]
+    with app.test_request_context():
+        assert ids(search_tweets("the cat")) == [t2]  # "the" est un mot vide
+        assert ids(search_tweets("the")) == [t4, t3, t2, t1]  # seulement des mots vides : par date
+
+        first = search_tweets("the", per_page=3)
+        assert ids(first) == [t4, t3, t2]
+        assert ids(search_tweets("the", cursor=first.next_cursor, per_page=3)) == [t1]
+
+def test_common_words_still_filter(app, monkeypatch):
+    monkeypatch.setattr(search, "COMMON_PROBE", 3)
+    alice_smith, _, _ = [create_user(app, email=f"{n}@example.com", name=f"Alice {n}")
+                         for n in ("Smith", "Jones", "Brown")]
+    create_user(app, email="bob@example.com", name="Bob Smith")
+    with app.test_request_context():
+        # "alice" est un mot vide : il ne compte pas dans BM25 mais reste exigé
+        assert ids(search_users("alice smith")) == [alice_smith]
+        assert len(ids(search_users("alice"))) == 3
+
+def test_rebuild_indexes_existing_rows(app):
+    alice = create_user(app)
+    tweet_id = create_tweet(app, alice, "indexed later")
+    with app.test_request_context():
+        db.session.execute(db.text("DELETE FROM tweet_fts"))
+        assert ids(search_tweets("indexed")) == []
+        rebuild(db.session.connection())
+        assert ids(search_tweets("indexed")) == [tweet_id]
+
+# ------------------------
+# Vue
+# ------------------------
+def test_search_page_tabs(app, client):
+    create_user(app)
+    bob = create_user(app, "bob@example.com", "Bob")
+    create_tweet(app, bob, "pancakes")
+    login(client)
+
+    html = client.get("/search?q=bob").data.decode()
+    assert "Bob" in html and "No users found." not in html
+
+    html = client.get("/search?q=pancak&type=tweets").data.decode()
+    assert "pancakes" in html
+
+    html = client.get("/search?q=waffles&type=tweets").data.decode()
+    assert "No tweets found." in html
+
+def test_search_page_load_more(app, client):
+    alice = create_user(app)
+    for i in range(25):
+        create_tweet(app, alice, f"crumble{i}")
+    login(client)
+    html = client.get("/search?q=crumble&type=tweets").data.decode()
+    assert html.count('class="tweet-card"') == 20
+    next_url = re.search(r'href="([^"]*cursor=[^"]*)"', html).group(1).replace("&amp;", "&")
+    html = client.get(next_url).data.decode()
+    assert html.count('class="tweet-card"') == 5
+
+def test_bad_cursor_is_rejected(app, client):
+    create_user(app)
+    login(client)
+    assert client.get("/search?q=x&type=tweets&cursor=@@").status_code == 400
@@ -0,0 +1,65 @@
+# flask_auth/tests/test_settings.py
+from flask import Flask
+from sqlalchemy import text
+from flask_auth.project import create_app, db, settings
+
+# ------------------------
+# Helpers
+# ------------------------
+def pragma(app, name):
+    with app.app_context():
+        return db.session.execute(text(f"PRAGMA {name}")).scalar()
+
+def sqlite_uri(tmp_path, name="app.sqlite"):
+    return f"sqlite:///{tmp_path / name}"
+
+# ------------------------
+# PRAGMA SQLite
+# ------------------------
+def test_pragmas_are_applied_to_each_connection(tmp_path):
+    app = create_app({"SQLALCHEMY_DATABASE_URI": sqlite_uri(tmp_path)})
+    assert pragma(app, "journal_mode") == "wal"
+    assert pragma(app, "synchronous") == 1  # NORMAL
+    assert pragma(app, "busy_timeout") == 5000
+    assert pragma(app, "cache_size") == -64 * 1024
+    with app.app_context():
+        db.engine.dispose()
+
+def test_pragmas_can_be_disabled(tmp_path):
+    app = create_app({"SQLALCHEMY_DATABASE_URI": sqlite_uri(tmp_path), "SQLITE_PRAGMAS": {}})
+    assert pragma(app, "journal_mode") == "delete"
+
+# ------------------------
+# Sources de configuration
+# ------------------------
+def test_environment_overrides_defaults(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", sqlite_uri(tmp_path, "env.sqlite"))
+    monkeypatch.setenv("FLASK_SECRET_KEY", "from-env")
+    monkeypatch.setenv("FLASK_SQLITE_PRAGMAS__busy_timeout", "1234")
+    app = create_app()
+    assert app.config["SQLALCHEMY_DATABASE_URI"].endswith("env.sqlite")
+    assert app.config["SECRET_KEY"] == "from-env"
+    assert app.config["SQLITE_PRAGMAS"]["journal_mode"] == "WAL"
+    assert pragma(app, "busy_timeout") == 1234
+
+def test_explicit_config_wins_over_environment(tmp_path, monkeypatch):
+    monkeypatch.setenv("FLASK_PAGE_SIZE", "5")
+    app = create_app({"SQLALCHEMY_DATABASE_URI": sqlite_uri(tmp_path), "PAGE_SIZE": 7})
+    assert app.config["PAGE_SIZE"] == 7
+
+def test_instance_config_file(tmp_path):
+    (tmp_path / "config.py").write_text("SECRET_KEY = 'from-instance'\nPAGE_SIZE = 3\n")
+    app = Flask(__name__, instance_path=str(tmp_path), instance_relative_config=True)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    settings.load(app)
+    assert app.config["SECRET_KEY"] == "from-instance" and app.config["PAGE_SIZE"] == 3
+
+def test_pool_options_only_for_server_databases():
+    assert settings.engine_options({"SQLALCHEMY_DATABASE_URI": "sqlite:///x.db"}) == {}
+    options = settings.engine_options({
+        "SQLALCHEMY_DATABASE_URI": "postgresql://db/app",
+        "DB_POOL_SIZE": 4,
+        "SQLALCHEMY_ENGINE_OPTIONS": {"pool_recycle": 60},
+    })
+    assert options == {"pool_size": 4, "max_overflow": 20, "pool_timeout": 30,
+                       "pool_recycle": 60, "pool_pre_ping": True}
@@ -0,0 +1,119 @@
+# flask_auth/tests/test_stream.py
+import json
+from werkzeug.security import generate_password_hash
+from flask_auth.project import counters, db
+from flask_auth.project.models import User, Notification
+from flask_auth.project.notify import get_pipeline
+from flask_auth.project.stream import Hub, SUBSCRIBER_QUEUE_SIZE, get_hub
+
+# ------------------------
+# Helpers
+# ------------------------
+def create_user(app, email="alice@example.com", name="Alice", password="Abcdef1!"):
+    with app.app_context():
+        user = User(
+            email=email,
+            name=name,
+            password=generate_password_hash(password, method="pbkdf2:sha256:1000")
+        )
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+def login(client, email="alice@example.com", password="Abcdef1!"):
+    return client.post("/login", data={"email": email, "password": password}, follow_redirects=True)
+
+def parse(chunk):
+    """Décode un évènement SSE en (event, data)."""
+    event, data = None, None
+    for line in chunk.decode().splitlines():
+        if line.startswith("event: "):
+            event = line[len("event: "):]
+        elif line.startswith("data: "):
+            data = json.loads(line[len("data: "):])
+    return event, data
+
+def open_stream(client):
+    resp = client.get("/notifications/stream", buffered=False)
+    assert resp.status_code == 200
+    assert resp.mimetype == "text/event-stream"
+    return resp, iter(resp.response)
+
+# ------------------------
+# Hub
+# ------------------------
+def test_hub_delivers_only_to_recipient():
+    hub = Hub()
+    alice, bob = hub.subscribe(1), hub.subscribe(2)
+    assert hub.publish(1, "unread", {"unread": 3}) == 1
+    assert alice.get_nowait() == ("unread", {"unread": 3})
+    assert bob.empty()
+
+    hub.unsubscribe(1, alice)
+    assert not hub.has_subscribers(1)
+    assert hub.publish(1, "unread", {"unread": 4}) == 0
+
+def test_slow_subscriber_keeps_latest_events():
+    hub = Hub()
+    q = hub.subscribe(1)
+    for i in range(SUBSCRIBER_QUEUE_SIZE + 5):
+        hub.publish(1, "unread", {"unread": i})
+    assert q.qsize() == SUBSCRIBER_QUEUE_SIZE
+    last = None
+    while not q.empty():
+        last = q.get_nowait()
+    assert last == ("unread", {"unread": SUBSCRIBER_QUEUE_SIZE + 4})
+
+# ------------------------
+# Endpoint
+# ------------------------
+def test_stream_requires_login(client):
+    resp = client.get("/notifications/stream")
+    assert resp.status_code == 302
+
+def test_stream_pushes_unread_changes(app, client):
+    alice = create_user(app)
+    bob = create_user(app, "bob@example.com", "Bob")
+    login(client)
+    resp, chunks = open_stream(client)
+    assert parse(next(chunks)) == ("unread", {"unread": 0})
+
+    # un follow de Bob : le pipeline pousse le nouveau compteur après écriture
+    bob_client = app.test_client()
+    login(bob_client, "bob@example.com")
+    bob_client.post(f"/follow/{alice}")
+    with app.app_context():
+        get_pipeline().flush()
+    assert parse(next(chunks)) == ("unread", {"unread": 1})
+
+    client.post("/notifications/mark_all_read")
+    assert parse(next(chunks)) == ("unread", {"unread": 0})
+
+    resp.close()
+    with app.app_context():
+        assert not get_hub().has_subscribers(alice)
+
+def test_read_single_notification_is_pushed(app, client):
+    alice = create_user(app)
+    bob = create_user(app, "bob@example.com", "Bob")
+    with app.app_context():
+        for _ in range(2):
+            db.session.add(Notification(recipient_id=alice, actor_id=bob, type="comment"))
+        counters.recount_unread()
+        db.session.commit()
+        notif_id = Notification.query.first().id
+    login(client)
+    resp, chunks = open_stream(client)
+    assert parse(next(chunks)) == ("unread", {"unread": 2})
+
+    client.post(f"/notifications/{notif_id}/read")
+    assert parse(next(chunks)) == ("unread", {"unread": 1})
+    resp.close()
+
+def test_stream_sends_keep_alive_and_ends(app, client):
+    create_user(app)
+    app.config.update(NOTIFICATIONS_STREAM_HEARTBEAT=0.05, NOTIFICATIONS_STREAM_MAX_AGE=0.2)
+    login(client)
+    resp, chunks = open_stream(client)
+    rest = list(chunks)[1:]  # le flux se termine seul après MAX_AGE
+    assert rest and all(c == b": keep-alive\n\n" for c in rest)
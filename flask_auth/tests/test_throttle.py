@@ -0,0 +1,111 @@
+# flask_auth/tests/test_throttle.py
+import pytest
+from werkzeug.security import generate_password_hash
+from flask_auth.project import db
+from flask_auth.project.models import User
+from flask_auth.project.hashing import get_hasher
+from flask_auth.project.throttle import (
+    Limit, LoginThrottle, LoginThrottled, MemoryStore, SqliteStore, get_throttle,
+)
+
+# ------------------------
+# Helpers
+# ------------------------
+def create_user(app, email="alice@example.com", name="Alice", password="Abcdef1!"):
+    with app.app_context():
+        user = User(
+            email=email,
+            name=name,
+            password=generate_password_hash(password, method="pbkdf2:sha256:1000")
+        )
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+def login(client, email="alice@example.com", password="Abcdef1!"):
+    return client.post("/login", data={"email": email, "password": password}, follow_redirects=True)
+
+def make_throttle(store=None, email=Limit(1, 0.1), ip=Limit(100, 10), backoff=8):
+    return LoginThrottle(MemoryStore() if store is None else store, email, ip, backoff=backoff, max_backoff=900)
+
+def retry_after(throttle, now, email="a@x.com", ip="1.2.3.4"):
+    """0 si la tentative passe, sinon le Retry-After annoncé."""
+    try:
+        throttle.hit(email, ip, now=now)
+        return 0
+    except LoginThrottled as exc:
+        return exc.retry_after
+
+# ------------------------
+# Seaux à jetons
+# ------------------------
+def test_backoff_doubles_on_repeated_rejections():
+    throttle = make_throttle()
+    assert retry_after(throttle, 0) == 0
+    assert retry_after(throttle, 0) == 10     # attente du prochain jeton
+    assert retry_after(throttle, 5) == 5      # toujours bloqué, sans nouvelle pénalité
+    assert retry_after(throttle, 10) == 0
+    assert retry_after(throttle, 10) == 16    # 8 * 2
+    assert retry_after(throttle, 26) == 0
+    assert retry_after(throttle, 26) == 32    # 8 * 4
+    assert throttle.stats["rejected"] == 4 and throttle.stats["rejected_email"] == 4
+
+def test_email_key_is_normalized_and_reset_on_success():
+    throttle = make_throttle()
+    assert retry_after(throttle, 0, email="A@X.com ") == 0
+    assert retry_after(throttle, 0, email="a@x.com") > 0
+    throttle.succeeded("a@x.com")
+    assert retry_after(throttle, 1) == 0
+
+def test_ip_bucket_spans_emails():
+    throttle = make_throttle(ip=Limit(3, 0.01))
+    for i in range(3):
+        assert retry_after(throttle, 0, email=f"u{i}@x.com") == 0
+    assert retry_after(throttle, 0, email="other@x.com") > 0
+    assert retry_after(throttle, 0, email="other@x.com", ip="5.6.7.8") == 0
+    assert throttle.stats["rejected_ip"] == 1 and throttle.stats["rejected_email"] == 0
+
+def test_memory_store_is_bounded():
+    store = MemoryStore(maxsize=10)
+    throttle = make_throttle(store)
+    for i in range(50):
+        retry_after(throttle, 0, email=f"u{i}@x.com", ip=f"10.0.0.{i}")
+    assert len(store) == 10
+
+def test_sqlite_store_is_shared_between_workers(tmp_path):
+    path = str(tmp_path / "throttle.sqlite")
+    worker_a = make_throttle(SqliteStore(path))
+    worker_b = make_throttle(SqliteStore(path))
+    assert retry_after(worker_a, 0) == 0
+    assert retry_after(worker_b, 0) == 10
+    worker_b.store.prune(idle_before=100)
+    assert len(worker_a.store) == 0
+
+# ------------------------
+# Connexion
+# ------------------------
+def test_login_is_rejected_before_hashing(app, client):
+    create_user(app)
+    for _ in range(5):
+        login(client, password="Wrong1!")
+    with app.app_context():
+        verified = get_hasher().stats["verified"]
+
+    resp = client.post("/login", data={"email": "alice@example.com", "password": "Abcdef1!"})
+    assert resp.status_code == 429
+    assert int(resp.headers["Retry-After"]) >= 1
+    with app.app_context():
+        assert get_hasher().stats["verified"] == verified
+        assert get_throttle().stats["hashes_saved"] == 1
+
+    # une autre adresse depuis la même IP passe toujours
+    create_user(app, email="bob@example.com", name="Bob")
+    assert login(client, email="bob@example.com").request.path == "/profile"
+
+def test_throttle_can_be_disabled(app, client):
+    app.config["LOGIN_THROTTLE_ENABLED"] = False
+    create_user(app)
+    for _ in range(8):
+        login(client, password="Wrong1!")
+    assert login(client).request.path == "/profile"
+    assert "login_throttle" not in app.extensions
@@ -0,0 +1,113 @@
+# flask_auth/tests/test_timeline.py
+from werkzeug.security import generate_password_hash
+from flask_auth.project import db
+from flask_auth.project.models import User, Tweet, TimelineEntry
+
+# ------------------------
+# Helpers
+# ------------------------
+def create_user(app, email, name, password="Abcdef1!"):
+    with app.app_context():
+        user = User(
+            email=email,
+            name=name,
+            password=generate_password_hash(password, method="pbkdf2:sha256:1000")
+        )
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+def login(client, email, password="Abcdef1!"):
+    return client.post("/login", data={"email": email, "password": password}, follow_redirects=True)
+
+def post_tweet(client, content):
+    return client.post("/tweet", data={"content": content}, follow_redirects=True)
+
+def timeline_tweets(app, user_id):
+    with app.app_context():
+        entries = TimelineEntry.query.filter_by(user_id=user_id).order_by(TimelineEntry.timestamp.desc()).all()
+        return [db.session.get(Tweet, e.tweet_id).content for e in entries]
+
+# ------------------------
+# Fan-out
+# ------------------------
+def test_tweet_is_pushed_to_author_and_followers(app, client):
+    alice = create_user(app, "alice@example.com", "Alice")
+    bob = create_user(app, "bob@example.com", "Bob")
+
+    login(client, "bob@example.com")
+    client.post(f"/follow/{alice}")
+    client.get("/logout")
+
+    login(client, "alice@example.com")
+    post_tweet(client, "hello followers")
+
+    assert timeline_tweets(app, alice) == ["hello followers"]
+    assert timeline_tweets(app, bob) == ["hello followers"]
+
+def test_follow_backfills_and_unfollow_prunes(app, client):
+    alice = create_user(app, "alice@example.com", "Alice")
+    bob = create_user(app, "bob@example.com", "Bob")
+
+    login(client, "alice@example.com")
+    post_tweet(client, "first")
+    post_tweet(client, "second")
+    client.get("/logout")
+
+    login(client, "bob@example.com")
+    client.post(f"/follow/{alice}")
+    assert sorted(timeline_tweets(app, bob)) == ["first", "second"]
+
+    resp = client.get("/home")
+    assert b"first" in resp.data and b"second" in resp.data
+
+    client.post(f"/unfollow/{alice}")
+    assert timeline_tweets(app, bob) == []
+
+def test_delete_tweet_removes_timeline_entries(app, client):
+    alice = create_user(app, "alice@example.com", "Alice")
+    bob = create_user(app, "bob@example.com", "Bob")
+
+    login(client, "bob@example.com")
+    client.post(f"/follow/{alice}")
+    client.get("/logout")
+
+    login(client, "alice@example.com")
+    post_tweet(client, "ephemeral")
+    with app.app_context():
+        tweet_id = Tweet.query.filter_by(content="ephemeral").first().id
+    client.post(f"/delete_tweet/{tweet_id}")
+
+    assert timeline_tweets(app, alice) == []
+    assert timeline_tweets(app, bob) == []
+
+def test_backfill_is_bounded(app, client):
+    app.config["TIMELINE_MAX_LENGTH"] = 3
+    alice = create_user(app, "alice@example.com", "Alice")
+    create_user(app, "bob@example.com", "Bob")
+
+    login(client, "alice@example.com")
+    for i in range(5):
+        post_tweet(client, f"tweet {i}")
+    client.get("/logout")
+
+    login(client, "bob@example.com")
+    client.post(f"/follow/{alice}")
+    with app.app_context():
+        bob = User.query.filter_by(email="bob@example.com").first()
+        assert TimelineEntry.query.filter_by(user_id=bob.id).count() == 3
+
+def test_fan_out_is_bounded(app, client):
+    app.config["TIMELINE_MAX_LENGTH"] = 3
+    alice = create_user(app, "alice@example.com", "Alice")
+    bob = create_user(app, "bob@example.com", "Bob")
+
+    login(client, "bob@example.com")
+    client.post(f"/follow/{alice}")
+    client.get("/logout")
+
+    login(client, "alice@example.com")
+    for i in range(10):
+        post_tweet(client, f"tweet {i}")
+    for user_id in (alice, bob):
+        assert timeline_tweets(app, user_id) == ["tweet 9", "tweet 8", "tweet 7"]
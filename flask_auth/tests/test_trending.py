@@ -0,0 +1,180 @@
+# flask_auth/tests/test_trending.py
+import json
+import random
+from collections import Counter
+from datetime import datetime, timedelta
+from werkzeug.security import generate_password_hash
+from flask_auth.project import db, trending
+from flask_auth.project.models import User, Tweet, TrendingSnapshot
+from flask_auth.project.hashtags import index_tweet
+from flask_auth.project.trending import TrendingIndex, Window, epoch_seconds
+
+# ------------------------
+# Helpers
+# ------------------------
+def create_user(app, email="alice@example.com", name="Alice", password="Abcdef1!"):
+    with app.app_context():
+        user = User(
+            email=email,
+            name=name,
+            password=generate_password_hash(password, method="pbkdf2:sha256:1000")
+        )
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+def login(client, email="alice@example.com", password="Abcdef1!"):
+    return client.post("/login", data={"email": email, "password": password}, follow_redirects=True)
+
+def exact_top(events, start, end, k):
+    counts = Counter(tag for ts, tag in events if start <= ts < end)
+    return sorted(counts.items(), key=lambda kv: (kv[1], kv[0]), reverse=True)[:k]
+
+# ------------------------
+# Fenêtres glissantes
+# ------------------------
+def test_window_matches_exact_recount():
+    rng = random.Random(42)
+    tags = [f"t{i}" for i in range(50)]
+    weights = [1 / (i + 1) for i in range(len(tags))]
+    cum = [sum(weights[:i + 1]) for i in range(len(weights))]
+    t0 = 1_700_000_000 - 1_700_000_000 % 900
+    events = sorted((t0 + rng.randrange(26 * 3600), tag)
+                    for tag in rng.choices(tags, cum_weights=cum, k=5000))
+    index = TrendingIndex(cache_ttl=0)
+    for ts, tag in events:
+        index.record([tag], ts)
+
+    # à la fin d'un seau, la fenêtre couvre exactement les seaux complets
+    now = t0 + 26 * 3600 - 1
+    for name, (span, bucket) in trending.WINDOWS.items():
+        head = int(now // bucket) * bucket
+        expected = exact_top(events, head + bucket - span, now + 1, 10)
+        assert index.top(name, now=now) == expected
+
+def test_old_buckets_expire():
+    window = Window(3600, 60)
+    window.add(["a", "b"], 0)
+    window.add(["a"], 1800)
+    assert window.top(10, 1800) == [("a", 2), ("b", 1)]
+    assert window.top(10, 3600) == [("a", 1)]
+    assert window.top(10, 3600 * 10) == []
+    # un événement plus vieux que la fenêtre est ignoré
+    window.add(["late"], 0)
+    assert window.top(10, 3600 * 10) == []
+
+def test_top_is_cached_for_ttl():
+    index = TrendingIndex(cache_ttl=60)
+    index.record(["a"], epoch_seconds(datetime.utcnow()))
+    first = index.top("1h")
+    index.record(["b", "b2"], epoch_seconds(datetime.utcnow()))
+    assert index.top("1h") is first
+
+# ------------------------
+# Persistance
+# ------------------------
+def test_snapshot_round_trip(app):
+    now = 1_700_000_000
+    with app.app_context():
+        index = TrendingIndex(cache_ttl=0)
+        for i in range(20):
+            index.record(["x", f"y{i % 3}"], now - i * 200)
+        trending.save(index)
+        assert TrendingSnapshot.query.count() == len(trending.WINDOWS)
+
+        app.extensions.pop("trending", None)
+        restored = trending.get_index()
+        for name in trending.WINDOWS:
+            assert restored.top(name, now=now) == index.top(name, now=now)
+        payload = json.loads(db.session.get(TrendingSnapshot, "1h").payload)
+        assert payload["head"] == now // 60
+
+def test_cold_start_rebuilds_from_database(app):
+    alice = create_user(app)
+    now = datetime.utcnow()
+    with app.app_context():
+        for i, content in enumerate(["#a #b", "#a", "#a #c", "#old"]):
+            age = timedelta(hours=30) if content == "#old" else timedelta(minutes=10 * i)
+            tweet = Tweet(content=content, user_id=alice, timestamp=now - age)
+            db.session.add(tweet)
+            db.session.flush()
+            index_tweet(tweet)
+        db.session.commit()
+
+        app.extensions.pop("trending", None)
+        index = trending.get_index()
+        assert index.top("24h", now=epoch_seconds(now)) == [("a", 3), ("c", 1), ("b", 1)]
+
+def test_snapshot_catches_up_with_later_tweets(app, client):
+    create_user(app)
+    login(client)
+    client.post("/tweet", data={"content": "#early"})
+    with app.app_context():
+        trending.save(trending.get_index())
+    # publié après l'instantané, puis redémarrage
+    client.post("/tweet", data={"content": "#early #late"})
+    with app.app_context():
+        app.extensions.pop("trending", None)
+        index = trending.get_index()
+        assert index.top("24h", now=epoch_seconds(datetime.utcnow()) + 60) == [("early", 2), ("late", 1)]
+
+def test_snapshot_keeps_other_workers_tweets(app, client):
+    alice = create_user(app)
+    login(client)
+    with app.app_context():
+        trending.get_index()  # ce worker démarre
+        other = TrendingIndex(cache_ttl=0)  # un autre worker
+        tweet = Tweet(content="#theirs", user_id=alice)
+        db.session.add(tweet)
+        db.session.flush()
+        tags = index_tweet(tweet)
+        db.session.commit()
+        other.record(tags, epoch_seconds(tweet.timestamp), tweet.id)
+    client.post("/tweet", data={"content": "#mine"})  # id plus grand, vu en direct ici seulement
+
+    now = epoch_seconds(datetime.utcnow()) + 60
+    with app.app_context():
+        trending.save(trending.get_index())
+        app.extensions.pop("trending", None)
+        assert sorted(trending.get_index().top("24h", now=now)) == [("mine", 1), ("theirs", 1)]
+
+        trending.save(other)  # l'autre worker sauvegarde à son tour : rien de compté deux fois
+        app.extensions.pop("trending", None)
+        assert sorted(trending.get_index().top("24h", now=now)) == [("mine", 1), ("theirs", 1)]
+
+def test_quiet_worker_refreshes_snapshot_on_read(app, client):
+    alice = create_user(app)
+    login(client)
+    with app.app_context():
+        trending.save(trending.get_index())
+        # un autre worker publie ; celui-ci ne fait que lire
+        tweet = Tweet(content="#elsewhere", user_id=alice)
+        db.session.add(tweet)
+        db.session.flush()
+        index_tweet(tweet)
+        db.session.commit()
+        tweet_id = tweet.id
+        trending.get_index().last_snapshot -= app.config.get("TRENDING_SNAPSHOT_INTERVAL", 60) + 1
+
+    assert "#elsewhere" in client.get("/trending").data.decode()
+    with app.app_context():
+        payload = json.loads(db.session.get(TrendingSnapshot, "24h").payload)
+        assert payload["last_tweet_id"] == tweet_id
+
+# ------------------------
+# Pages
+# ------------------------
+def test_trending_page_and_home_partial(app, client):
+    create_user(app)
+    login(client)
+    for content in ["#python rocks", "#python #flask", "hello #flask", "#python"]:
+        client.post("/tweet", data={"content": content})
+
+    html = client.get("/trending").data.decode()
+    assert html.index("#python") < html.index("#flask")
+    assert "3 tweets" in html and "2 tweets" in html
+    assert client.get("/trending?window=1h").status_code == 200
+    assert client.get("/trending?window=1y").status_code == 404
+
+    html = client.get("/home").data.decode()
+    assert 'href="/hashtag/python"' in html and "Trending (1h)" in html
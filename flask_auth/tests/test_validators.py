@@ -0,0 +1,126 @@
+# flask_auth/tests/test_validators.py
+import pytest
+from werkzeug.http import http_date
+from werkzeug.security import generate_password_hash
+from flask_auth.project import db
+from flask_auth.project.models import User, Tweet
+
+# ------------------------
+# Helpers
+# ------------------------
+def create_user(app, email="alice@example.com", name="Alice", password="Abcdef1!"):
+    with app.app_context():
+        user = User(
+            email=email,
+            name=name,
+            password=generate_password_hash(password, method="pbkdf2:sha256:1000")
+        )
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+def login(client, email="alice@example.com", password="Abcdef1!"):
+    return client.post("/login", data={"email": email, "password": password}, follow_redirects=True)
+
+def revalidate(client, url, etag):
+    return client.get(url, headers={"If-None-Match": etag})
+
+@pytest.fixture
+def alice_and_bob(app, client):
+    alice = create_user(app)
+    bob = create_user(app, email="bob@example.com", name="Bob")
+    login(client)
+    client.post("/tweet", data={"content": "hello #news"})
+    with app.app_context():
+        tweet_id = Tweet.query.one().id
+    client.get("/profile")  # consomme le message flash éventuel
+    return alice, bob, tweet_id
+
+PAGES = ["/profile", "/home", "/hashtag/news"]
+
+def etags(client, urls=PAGES):
+    return {url: client.get(url).headers["ETag"] for url in urls}
+
+# ------------------------
+# 304
+# ------------------------
+def test_unchanged_pages_return_304_before_any_heavy_query(app, client, alice_and_bob, statements):
+    alice, bob, _ = alice_and_bob
+    for url in PAGES + [f"/profile/{bob}"]:
+        first = client.get(url)
+        assert first.status_code == 200 and first.headers["ETag"]
+        assert first.headers["Cache-Control"] == "private, no-cache"
+
+        statements.clear()
+        resp = revalidate(client, url, first.headers["ETag"])
+        assert resp.status_code == 304 and resp.data == b""
+        # le validateur lui-même, sans lecture de tweets ni rendu
+        assert not [s for s in statements if "FROM tweet" in s or "timeline_entry" in s]
+
+def test_if_modified_since(app, client, alice_and_bob):
+    resp = client.get("/profile")
+    last_modified = resp.headers["Last-Modified"]
+    assert client.get("/profile", headers={"If-Modified-Since": last_modified}).status_code == 304
+    assert client.get("/profile", headers={"If-Modified-Since": http_date(0)}).status_code == 200
+
+def test_etag_depends_on_viewer_and_url(app, client, alice_and_bob):
+    alice, bob, _ = alice_and_bob
+    own = client.get(f"/profile/{alice}").headers["ETag"]
+    assert client.get("/home?sort=ranked").headers["ETag"] != client.get("/home").headers["ETag"]
+    client.get("/logout")
+    login(client, email="bob@example.com")
+    assert client.get(f"/profile/{alice}").headers["ETag"] != own
+
+def test_pending_flash_is_never_served_from_cache(app, client, alice_and_bob):
+    etag = client.get("/profile").headers["ETag"]
+    client.post("/profile/edit_bio", data={"bio": "x" * 301})  # refusé, flash d'erreur
+    resp = revalidate(client, "/profile", etag)
+    assert resp.status_code == 200 and "ETag" not in resp.headers
+    assert "Bio is too long" in resp.data.decode()
+
+# ------------------------
+# Invalidation
+# ------------------------
+def test_new_tweet_invalidates(app, client, alice_and_bob):
+    before = etags(client)
+    client.post("/tweet", data={"content": "again #news"})
+    after = etags(client)
+    assert all(before[url] != after[url] for url in PAGES)
+
+def test_delete_tweet_invalidates(app, client, alice_and_bob):
+    _, _, tweet_id = alice_and_bob
+    before = etags(client)
+    client.post(f"/delete_tweet/{tweet_id}")
+    after = etags(client)
+    assert all(before[url] != after[url] for url in PAGES)
+
+def test_like_invalidates(app, client, alice_and_bob):
+    _, _, tweet_id = alice_and_bob
+    before = etags(client)
+    client.post(f"/like/{tweet_id}")
+    after = etags(client)
+    assert all(before[url] != after[url] for url in PAGES)
+
+def test_comment_invalidates(app, client, alice_and_bob):
+    _, _, tweet_id = alice_and_bob
+    before = etags(client)
+    client.post(f"/comment/{tweet_id}", data={"comment_content": "nice"})
+    client.get("/profile")  # consomme "Comment added!"
+    after = etags(client)
+    assert all(before[url] != after[url] for url in PAGES)
+
+def test_follow_invalidates_both_profiles_and_feed(app, client, alice_and_bob):
+    alice, bob, _ = alice_and_bob
+    urls = ["/home", f"/profile/{bob}", "/profile"]
+    before = etags(client, urls)
+    client.post(f"/follow/{bob}")
+    client.get("/profile")  # consomme le flash
+    after = etags(client, urls)
+    assert all(before[url] != after[url] for url in urls)
+    # le tweet d'un compte suivi change aussi le fil
+    client.get("/logout")
+    login(client, email="bob@example.com")
+    client.post("/tweet", data={"content": "bob again"})
+    client.get("/logout")
+    login(client)
+    assert client.get("/home").headers["ETag"] != after["/home"]